@@ -0,0 +1,444 @@
+/*
+ * Long-lived Checkstyle + javac worker for analyzers/java_analyzer.py.
+ *
+ *   java -cp checkstyle-all.jar analyzers/CheckstyleServer.java google_checks.xml [scratch root]
+ *
+ * Runs as a single-file source program (JDK 11+), so there is nothing to build.
+ * The Checkstyle configuration is parsed once and the Checker is reused, and
+ * syntax checking goes through the in-process compiler API (javax.tools), so a
+ * request costs no JVM start-up.
+ *
+ * Request:  {"id": 1, "code": "...", "checks": ["syntax", "style"]}
+ * Response: {"id": 1, "syntax": {"valid": false, "line": 3, "error": "';' expected"},
+ *            "style": {"messages": [{"line": 1, "column": 1, "severity": "warning",
+ *                                    "message": "...", "source": "com.puppycrawl..."}]}}
+ *
+ * Style results are only computed when the syntax check passes (or was not
+ * requested). One JSON object per line on stdin/stdout.
+ */
+
+import com.puppycrawl.tools.checkstyle.Checker;
+import com.puppycrawl.tools.checkstyle.ConfigurationLoader;
+import com.puppycrawl.tools.checkstyle.PropertiesExpander;
+import com.puppycrawl.tools.checkstyle.api.AuditEvent;
+import com.puppycrawl.tools.checkstyle.api.AuditListener;
+import com.puppycrawl.tools.checkstyle.api.Configuration;
+import com.sun.source.util.JavacTask;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+public class CheckstyleServer {
+    // javac insists that a public top-level type lives in a file of the same name
+    private static final Pattern PUBLIC_TYPE = Pattern.compile(
+        "public\\s+(?:(?:abstract|final|sealed|non-sealed|strictfp|static)\\s+)*(?:class|interface|enum|record|@interface)\\s+([A-Za-z_$][\\w$]*)");
+
+    private final Path scratchDir;
+    private final Checker checker;
+    private final List<Map<String, Object>> events = new ArrayList<>();
+    private final JavaCompiler compiler;
+    private final StandardJavaFileManager fileManager;
+
+    CheckstyleServer(String configPath, String scratchRoot) throws Exception {
+        scratchDir = scratchRoot != null
+            ? Files.createTempDirectory(Paths.get(scratchRoot), "checkstyle-server-")
+            : Files.createTempDirectory("checkstyle-server-");
+
+        Configuration config = ConfigurationLoader.loadConfiguration(
+            configPath,
+            new PropertiesExpander(System.getProperties()),
+            ConfigurationLoader.IgnoredModulesOptions.OMIT);
+        checker = new Checker();
+        checker.setModuleClassLoader(Checker.class.getClassLoader());
+        checker.configure(config);
+        checker.addListener(new Collector());
+
+        compiler = ToolProvider.getSystemJavaCompiler();
+        fileManager = compiler == null ? null : compiler.getStandardFileManager(null, Locale.ENGLISH, StandardCharsets.UTF_8);
+    }
+
+    Map<String, Object> handle(Map<String, Object> request) throws Exception {
+        String code = (String) request.get("code");
+        Object checksValue = request.get("checks");
+        List<?> checks = checksValue instanceof List ? (List<?>) checksValue : List.of("syntax", "style");
+        String fileName = sourceFileName(code);
+
+        Map<String, Object> response = new LinkedHashMap<>();
+        Map<String, Object> syntax = null;
+        if (checks.contains("syntax")) {
+            syntax = checkSyntax(fileName, code);
+            response.put("syntax", syntax);
+        }
+        if (checks.contains("style") && (syntax == null || Boolean.TRUE.equals(syntax.get("valid")))) {
+            response.put("style", checkStyle(fileName, code));
+        }
+        return response;
+    }
+
+    private static String sourceFileName(String code) {
+        Matcher matcher = PUBLIC_TYPE.matcher(code);
+        return (matcher.find() ? matcher.group(1) : "Snippet") + ".java";
+    }
+
+    private Map<String, Object> checkSyntax(String fileName, String code) throws Exception {
+        if (compiler == null) {
+            throw new IllegalStateException("no system Java compiler (a JDK is required for syntax checks)");
+        }
+        JavaFileObject source = new SimpleJavaFileObject(URI.create("string:///" + fileName), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+                return code;
+            }
+        };
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        JavacTask task = (JavacTask) compiler.getTask(
+            null, fileManager, diagnostics, List.of("-proc:none", "-Xlint:none"), null, List.of(source));
+        // Parse and attribute like `javac` would, without generating class files
+        task.parse();
+        task.analyze();
+
+        Map<String, Object> result = new LinkedHashMap<>();
+        for (Diagnostic<? extends JavaFileObject> diagnostic : diagnostics.getDiagnostics()) {
+            if (diagnostic.getKind() == Diagnostic.Kind.ERROR) {
+                result.put("valid", false);
+                result.put("line", diagnostic.getLineNumber() > 0 ? diagnostic.getLineNumber() : 1);
+                result.put("error", diagnostic.getMessage(Locale.ENGLISH).split("\\R", 2)[0]);
+                return result;
+            }
+        }
+        result.put("valid", true);
+        result.put("line", null);
+        result.put("error", null);
+        return result;
+    }
+
+    private Map<String, Object> checkStyle(String fileName, String code) throws Exception {
+        Path file = scratchDir.resolve(fileName);
+        Files.write(file, code.getBytes(StandardCharsets.UTF_8));
+        events.clear();
+        try {
+            checker.process(Collections.singletonList(file.toFile()));
+        } finally {
+            Files.deleteIfExists(file);
+        }
+        Map<String, Object> result = new LinkedHashMap<>();
+        result.put("messages", new ArrayList<>(events));
+        return result;
+    }
+
+    void close() {
+        checker.destroy();
+        File[] leftovers = scratchDir.toFile().listFiles();
+        if (leftovers != null) {
+            for (File leftover : leftovers) {
+                leftover.delete();
+            }
+        }
+        scratchDir.toFile().delete();
+    }
+
+    private final class Collector implements AuditListener {
+        @Override
+        public void auditStarted(AuditEvent event) {
+        }
+
+        @Override
+        public void auditFinished(AuditEvent event) {
+        }
+
+        @Override
+        public void fileStarted(AuditEvent event) {
+        }
+
+        @Override
+        public void fileFinished(AuditEvent event) {
+        }
+
+        @Override
+        public void addError(AuditEvent event) {
+            Map<String, Object> message = new LinkedHashMap<>();
+            message.put("line", event.getLine());
+            message.put("column", event.getColumn());
+            message.put("severity", event.getSeverityLevel().getName());
+            message.put("message", event.getMessage());
+            message.put("source", event.getSourceName());
+            events.add(message);
+        }
+
+        @Override
+        public void addException(AuditEvent event, Throwable throwable) {
+            // Matches the CLI's XML output, which reports these outside of <error> entries
+        }
+    }
+
+    @SuppressWarnings("unchecked")
+    public static void main(String[] args) throws Exception {
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err); // Keep tool chatter out of the response stream
+
+        CheckstyleServer server = new CheckstyleServer(args[0], args.length > 1 ? args[1] : null);
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.isBlank()) {
+                continue;
+            }
+            Object id = null;
+            Map<String, Object> response;
+            try {
+                Map<String, Object> request = (Map<String, Object>) Json.parse(line);
+                id = request.get("id");
+                response = server.handle(request);
+            } catch (Exception | LinkageError e) {
+                response = new LinkedHashMap<>();
+                response.put("error", e.toString());
+            }
+            response.put("id", id);
+            out.println(Json.write(response));
+        }
+        server.close();
+    }
+
+    /** Just enough JSON for the request/response protocol (no dependencies on the classpath). */
+    static final class Json {
+        private final String text;
+        private int pos;
+
+        private Json(String text) {
+            this.text = text;
+        }
+
+        static Object parse(String text) {
+            Json parser = new Json(text);
+            Object value = parser.value();
+            parser.skipWhitespace();
+            if (parser.pos != text.length()) {
+                throw parser.error("trailing characters");
+            }
+            return value;
+        }
+
+        static String write(Object value) {
+            StringBuilder builder = new StringBuilder();
+            write(value, builder);
+            return builder.toString();
+        }
+
+        private static void write(Object value, StringBuilder builder) {
+            if (value == null) {
+                builder.append("null");
+            } else if (value instanceof String) {
+                writeString((String) value, builder);
+            } else if (value instanceof Number || value instanceof Boolean) {
+                builder.append(value);
+            } else if (value instanceof Map) {
+                builder.append('{');
+                boolean first = true;
+                for (Map.Entry<?, ?> entry : ((Map<?, ?>) value).entrySet()) {
+                    if (!first) {
+                        builder.append(',');
+                    }
+                    first = false;
+                    writeString(String.valueOf(entry.getKey()), builder);
+                    builder.append(':');
+                    write(entry.getValue(), builder);
+                }
+                builder.append('}');
+            } else if (value instanceof List) {
+                builder.append('[');
+                boolean first = true;
+                for (Object item : (List<?>) value) {
+                    if (!first) {
+                        builder.append(',');
+                    }
+                    first = false;
+                    write(item, builder);
+                }
+                builder.append(']');
+            } else {
+                writeString(value.toString(), builder);
+            }
+        }
+
+        private static void writeString(String value, StringBuilder builder) {
+            builder.append('"');
+            for (int i = 0; i < value.length(); i++) {
+                char c = value.charAt(i);
+                switch (c) {
+                    case '"': builder.append("\\\""); break;
+                    case '\\': builder.append("\\\\"); break;
+                    case '\n': builder.append("\\n"); break;
+                    case '\r': builder.append("\\r"); break;
+                    case '\t': builder.append("\\t"); break;
+                    default:
+                        if (c < 0x20) {
+                            builder.append(String.format("\\u%04x", (int) c));
+                        } else {
+                            builder.append(c);
+                        }
+                }
+            }
+            builder.append('"');
+        }
+
+        private Object value() {
+            skipWhitespace();
+            if (pos >= text.length()) {
+                throw error("unexpected end of input");
+            }
+            char c = text.charAt(pos);
+            switch (c) {
+                case '{': return object();
+                case '[': return array();
+                case '"': return string();
+                case 't': return literal("true", Boolean.TRUE);
+                case 'f': return literal("false", Boolean.FALSE);
+                case 'n': return literal("null", null);
+                default: return number();
+            }
+        }
+
+        private Map<String, Object> object() {
+            Map<String, Object> map = new LinkedHashMap<>();
+            pos++; // {
+            skipWhitespace();
+            if (peek() == '}') {
+                pos++;
+                return map;
+            }
+            while (true) {
+                skipWhitespace();
+                String key = string();
+                skipWhitespace();
+                expect(':');
+                map.put(key, value());
+                skipWhitespace();
+                if (peek() == ',') {
+                    pos++;
+                } else {
+                    expect('}');
+                    return map;
+                }
+            }
+        }
+
+        private List<Object> array() {
+            List<Object> list = new ArrayList<>();
+            pos++; // [
+            skipWhitespace();
+            if (peek() == ']') {
+                pos++;
+                return list;
+            }
+            while (true) {
+                list.add(value());
+                skipWhitespace();
+                if (peek() == ',') {
+                    pos++;
+                } else {
+                    expect(']');
+                    return list;
+                }
+            }
+        }
+
+        private String string() {
+            expect('"');
+            StringBuilder builder = new StringBuilder();
+            while (true) {
+                if (pos >= text.length()) {
+                    throw error("unterminated string");
+                }
+                char c = text.charAt(pos++);
+                if (c == '"') {
+                    return builder.toString();
+                }
+                if (c != '\\') {
+                    builder.append(c);
+                    continue;
+                }
+                char escape = text.charAt(pos++);
+                switch (escape) {
+                    case 'b': builder.append('\b'); break;
+                    case 'f': builder.append('\f'); break;
+                    case 'n': builder.append('\n'); break;
+                    case 'r': builder.append('\r'); break;
+                    case 't': builder.append('\t'); break;
+                    case 'u':
+                        builder.append((char) Integer.parseInt(text.substring(pos, pos + 4), 16));
+                        pos += 4;
+                        break;
+                    default: builder.append(escape); // \" \\ \/
+                }
+            }
+        }
+
+        private Object number() {
+            int start = pos;
+            while (pos < text.length() && "+-0123456789.eE".indexOf(text.charAt(pos)) >= 0) {
+                pos++;
+            }
+            String token = text.substring(start, pos);
+            if (token.isEmpty()) {
+                throw error("unexpected character");
+            }
+            if (token.contains(".") || token.contains("e") || token.contains("E")) {
+                return Double.parseDouble(token);
+            }
+            return Long.parseLong(token);
+        }
+
+        private Object literal(String word, Object value) {
+            if (!text.startsWith(word, pos)) {
+                throw error("invalid literal");
+            }
+            pos += word.length();
+            return value;
+        }
+
+        private char peek() {
+            return pos < text.length() ? text.charAt(pos) : '\0';
+        }
+
+        private void expect(char c) {
+            if (peek() != c) {
+                throw error("expected '" + c + "'");
+            }
+            pos++;
+        }
+
+        private void skipWhitespace() {
+            while (pos < text.length() && Character.isWhitespace(text.charAt(pos))) {
+                pos++;
+            }
+        }
+
+        private IllegalArgumentException error(String message) {
+            return new IllegalArgumentException("invalid JSON at " + pos + ": " + message);
+        }
+    }
+}
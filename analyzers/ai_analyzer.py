@@ -1,127 +1,1041 @@
+import asyncio
+import bisect
 import json
-from typing import List, Dict, Any
-from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS, AI_PROMPT_TEMPLATES, SYSTEM_PROMPTS
+import random
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, AsyncIterator
+from config import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS, OPENAI_TIMEOUT,
+    OPENAI_HTTP_POOL, OPENAI_RATE_LIMITS, AI_CACHE_CONFIG, AI_CHUNKING_CONFIG, AI_PROMPT_CONFIG, AI_PROMPT_TEMPLATES,
+    AI_PROMPT_ADDENDA, SYSTEM_PROMPTS
+)
+from analyzers.ai_cache import compute_prompt_key, get_default_ai_cache, is_cacheable
+from analyzers.prompt_builder import compact_code, format_linter_findings
+from utils.code_segmenter import CodeUnit, split_lines, split_units
+from utils.json_stream import JSONArrayStream
 
-def get_ai_suggestions_sync(code: str, language: str) -> List[Dict[str, Any]]:
+# (context_start, start, end) 1-based line numbers; lines before start are overlap context
+Chunk = Tuple[int, int, int]
+# A top-level unit of the reviewed code and its key in the suggestion cache
+PlannedUnit = Tuple[CodeUnit, str]
+
+# Shared clients: one blocking client for all threads, one async client per event loop
+# (httpx async connections are bound to the loop that opened them)
+_client = None
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+class _TokenBucket:
+    """A bucket refilled continuously at `rate` units per second, holding at most `capacity`."""
+    
+    def __init__(self, per_minute: float, burst_seconds: float, now: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = now
+    
+    def reserve(self, amount: float, now: float) -> float:
+        """Deduct amount (the level may go negative) and return the seconds until it is covered."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= self.deducted(amount)
+        return max(0.0, -self.level / self.rate)
+    
+    def deducted(self, amount: float) -> float:
+        """What reserve actually takes for amount: oversized requests wait for a full bucket, not forever."""
+        return min(amount, self.capacity)
+    
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+class RateLimiter:
+    """
+    Client-side scheduler for the OpenAI requests-per-minute and tokens-per-minute budgets.
+    
+    Each caller reserves one request and its estimated tokens up front and is told
+    how long to wait. Reservations are made under one lock in arrival order, so
+    later callers queue behind earlier ones (first come, first served) and the
+    send rate stays at the quota instead of bursting into 429s. A 429 pauses
+    every caller, not just the one that got it.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 10.0):
+        now = time.monotonic()
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(requests_per_minute, burst_seconds, now) if requests_per_minute > 0 else None
+        self._tokens = _TokenBucket(tokens_per_minute, burst_seconds, now) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._stats = {"requests": 0, "throttled": 0, "wait_seconds": 0.0, "rate_limited": 0, "retries": 0}
+    
+    def reserve(self, tokens: int) -> float:
+        """Reserve capacity for one request and return how many seconds to wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self._stats["requests"] += 1
+            if wait > 0:
+                self._stats["throttled"] += 1
+                self._stats["wait_seconds"] += wait
+            return wait
+    
+    def settle(self, reserved_tokens: int, used_tokens: Optional[int]) -> None:
+        """Give back the part of a token reservation the response didn't use, up to what reserve deducted."""
+        if self._tokens is None or used_tokens is None:
+            return
+        refund = self._tokens.deducted(reserved_tokens) - used_tokens
+        if refund <= 0:
+            return
+        with self._lock:
+            self._tokens.refund(refund)
+    
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Record a 429 and pause all callers.
+        
+        Returns:
+            Seconds to wait before retrying: Retry-After if the server sent one,
+            else exponential backoff with full jitter
+        """
+        delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._stats["rate_limited"] += 1
+            self._stats["retries"] += 1
+        return delay
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+_rate_limiter = RateLimiter(
+    OPENAI_RATE_LIMITS["requests_per_minute"],
+    OPENAI_RATE_LIMITS["tokens_per_minute"],
+    OPENAI_RATE_LIMITS["burst_seconds"]
+)
+
+# Connection reuse counters, fed by the clients' response hooks
+_connection_stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+_seen_connections: "weakref.WeakSet" = weakref.WeakSet()
+_stats_lock = threading.Lock()
+# Estimated code tokens before and after compaction, summed over reviews
+_prompt_stats = {
+    "reviews": 0, "compacted": 0, "original_tokens": 0, "prompt_tokens": 0, "linter_findings": 0,
+    "units_reused": 0, "reused_tokens": 0 # Unchanged units answered from the per-unit cache
+}
+
+def get_ai_suggestions_sync(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     Get AI-powered code improvement suggestions.
     
     Args:
         code: Source code string
         language: Programming language
-        
+        linter_feedback: Linter findings to list in the prompt so the model doesn't repeat them
+    
     Returns:
         List of AI suggestions
     """
     try:
-        if not OPENAI_API_KEY:
-            return [{
-                "type": "info",
-                "severity": "low",
-                "line": None,
-                "message": "AI suggestions unavailable: OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable.",
-                "example": None,
-                "category": "configuration"
-            }]
-        
-        try:
-            import openai
-        except ImportError:
-            return [{
-                "type": "info",
-                "severity": "low",
-                "line": None,
-                "message": "AI suggestions unavailable: OpenAI package not installed. Please run `pip install openai`.",
-                "example": None,
-                "category": "configuration"
-            }]
-        
-        if len(code.strip()) > 8000: # Limit for GPT-4o-mini context window
-            return [{
-                "type": "warning",
-                "severity": "medium",
-                "line": None,
-                "message": "Code is too long for AI analysis (exceeds 8000 characters). AI suggestions might be incomplete or unavailable for very large files.",
-                "example": None,
-                "category": "limitations"
-            }]
+        unavailable = _check_ai_preconditions(code)
+        if unavailable:
+            return unavailable
         
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        code, compacted = _prepare_review_code(code, language, linter_feedback)
+        planned, cached = _lookup_units(code, language, linter_feedback, compacted)
+        if any(hit is not None for hit in cached):
+            return _get_incremental_suggestions(code, language, linter_feedback, compacted, planned, cached)
         
-        # Get the appropriate prompt template and system message
-        prompt_template = AI_PROMPT_TEMPLATES.get(language, AI_PROMPT_TEMPLATES["python"]) # Default to python if language not found
-        system_prompt = SYSTEM_PROMPTS.get(f"{language}_expert", SYSTEM_PROMPTS["code_reviewer"])
+        if _needs_chunking(code):
+            suggestions = _get_chunked_suggestions(code, language, linter_feedback, compacted)
+        else:
+            suggestions = _request_suggestions(code, language, linter_feedback, compacted)
+        _store_unit_suggestions(planned, range(len(planned)), suggestions)
+        return suggestions
+    
+    except Exception as e:
+        return _format_ai_exception(e)
+
+async def get_ai_suggestions_async(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Async twin of get_ai_suggestions_sync using openai.AsyncOpenAI.
+    
+    Args:
+        code: Source code string
+        language: Programming language
+        linter_feedback: Linter findings to list in the prompt so the model doesn't repeat them
+    
+    Returns:
+        List of AI suggestions
+    """
+    try:
+        unavailable = _check_ai_preconditions(code)
+        if unavailable:
+            return unavailable
         
-        prompt = prompt_template.format(code=code)
+        code, compacted = _prepare_review_code(code, language, linter_feedback)
+        planned, cached = _lookup_units(code, language, linter_feedback, compacted)
+        if any(hit is not None for hit in cached):
+            return await _get_incremental_suggestions_async(code, language, linter_feedback, compacted, planned, cached)
         
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=OPENAI_TEMPERATURE,
-            max_tokens=OPENAI_MAX_TOKENS
-        )
+        if _needs_chunking(code):
+            suggestions = await _get_chunked_suggestions_async(code, language, linter_feedback, compacted)
+        else:
+            suggestions = await _request_suggestions_async(code, language, linter_feedback, compacted)
+        _store_unit_suggestions(planned, range(len(planned)), suggestions)
+        return suggestions
+    
+    except Exception as e:
+        return _format_ai_exception(e)
+
+def stream_ai_suggestions(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Get AI suggestions one at a time, as the model writes them.
+    
+    Uses a streamed chat completion and yields each suggestion as soon as its
+    JSON object is complete, so the first one arrives long before the whole
+    response. Cached answers, chunked reviews of large files and errors are
+    yielded from their complete lists.
+    
+    Args:
+        code: Source code string
+        language: Programming language
+        linter_feedback: Linter findings to list in the prompt so the model doesn't repeat them
+    
+    Yields:
+        AI suggestions, in the same format as get_ai_suggestions_sync
+    """
+    try:
+        unavailable = _check_ai_preconditions(code)
+        if unavailable:
+            yield from unavailable
+            return
         
-        content = response.choices[0].message.content.strip()
+        code, compacted = _prepare_review_code(code, language, linter_feedback)
+        planned, cached = _lookup_units(code, language, linter_feedback, compacted)
+        if any(hit is not None for hit in cached):
+            # Only the changed units are requested, so there is little left to stream
+            yield from _get_incremental_suggestions(code, language, linter_feedback, compacted, planned, cached)
+            return
         
-        # Clean up response (remove markdown code blocks)
-        if content.startswith('```json'):
-            content = content[7:]
-        if content.startswith('```'):
-            content = content[3:]
-        if content.endswith('```'):
-            content = content[:-3]
+        if _needs_chunking(code):
+            suggestions = _get_chunked_suggestions(code, language, linter_feedback, compacted)
+            yield from suggestions
+        else:
+            suggestions = []
+            for suggestion in _stream_suggestions(code, language, linter_feedback, compacted):
+                suggestions.append(suggestion)
+                yield suggestion
+        _store_unit_suggestions(planned, range(len(planned)), suggestions)
+    
+    except Exception as e:
+        yield from _format_ai_exception(e)
+
+async def stream_ai_suggestions_async(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async twin of stream_ai_suggestions using openai.AsyncOpenAI.
+    
+    Args:
+        code: Source code string
+        language: Programming language
+        linter_feedback: Linter findings to list in the prompt so the model doesn't repeat them
+    
+    Yields:
+        AI suggestions, in the same format as get_ai_suggestions_sync
+    """
+    try:
+        unavailable = _check_ai_preconditions(code)
+        if unavailable:
+            for suggestion in unavailable:
+                yield suggestion
+            return
         
-        content = content.strip()
+        code, compacted = _prepare_review_code(code, language, linter_feedback)
+        planned, cached = _lookup_units(code, language, linter_feedback, compacted)
+        if any(hit is not None for hit in cached):
+            for suggestion in await _get_incremental_suggestions_async(code, language, linter_feedback, compacted, planned, cached):
+                yield suggestion
+            return
         
-        suggestions = []
+        if _needs_chunking(code):
+            suggestions = await _get_chunked_suggestions_async(code, language, linter_feedback, compacted)
+            for suggestion in suggestions:
+                yield suggestion
+        else:
+            suggestions = []
+            async for suggestion in _stream_suggestions_async(code, language, linter_feedback, compacted):
+                suggestions.append(suggestion)
+                yield suggestion
+        _store_unit_suggestions(planned, range(len(planned)), suggestions)
+    
+    except Exception as e:
+        for suggestion in _format_ai_exception(e):
+            yield suggestion
+
+def _request_suggestions(code: str, language: str,
+                         linter_feedback: Optional[List[Dict[str, Any]]] = None, compacted: bool = False) -> List[Dict[str, Any]]:
+    """Send one review request (or serve it from the suggestion cache)."""
+    request = _build_completion_request(code, language, linter_feedback, compacted)
+    cache, cache_key = get_default_ai_cache(), compute_prompt_key(request)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        return cached
+    
+    response = _create_completion(request)
+    
+    suggestions = _parse_ai_response(response.choices[0].message.content)
+    if cache is not None and is_cacheable(suggestions):
+        cache.set(cache_key, suggestions)
+    return suggestions
+
+async def _request_suggestions_async(code: str, language: str,
+                                     linter_feedback: Optional[List[Dict[str, Any]]] = None, compacted: bool = False) -> List[Dict[str, Any]]:
+    """Async twin of _request_suggestions."""
+    request = _build_completion_request(code, language, linter_feedback, compacted)
+    cache, cache_key = get_default_ai_cache(), compute_prompt_key(request)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        return cached
+    
+    response = await _create_completion_async(request)
+    
+    suggestions = _parse_ai_response(response.choices[0].message.content)
+    if cache is not None and is_cacheable(suggestions):
+        cache.set(cache_key, suggestions)
+    return suggestions
+
+def _stream_suggestions(code: str, language: str,
+                        linter_feedback: Optional[List[Dict[str, Any]]] = None, compacted: bool = False) -> Iterator[Dict[str, Any]]:
+    """Streamed twin of _request_suggestions: yield suggestions while the response is generated."""
+    request = _build_completion_request(code, language, linter_feedback, compacted)
+    cache, cache_key = get_default_ai_cache(), compute_prompt_key(request)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        yield from cached
+        return
+    
+    parser = JSONArrayStream()
+    content, suggestions, used_tokens = [], [], None
+    with _create_completion(_streaming_request(request)) as stream:
+        for chunk in stream:
+            used_tokens, delta = _stream_chunk_parts(chunk, used_tokens)
+            if not delta:
+                continue
+            content.append(delta)
+            for item in parser.feed(delta):
+                if isinstance(item, dict):
+                    suggestion = _format_suggestion(item)
+                    suggestions.append(suggestion)
+                    yield suggestion
+    _rate_limiter.settle(_estimate_request_tokens(request), used_tokens)
+    
+    if not suggestions:
+        # Not a JSON array of objects (or an empty one): report it the non-streaming way
+        suggestions = _parse_ai_response("".join(content))
+        yield from suggestions
+    if cache is not None and is_cacheable(suggestions):
+        cache.set(cache_key, suggestions)
+
+async def _stream_suggestions_async(code: str, language: str,
+                                    linter_feedback: Optional[List[Dict[str, Any]]] = None, compacted: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """Async twin of _stream_suggestions."""
+    request = _build_completion_request(code, language, linter_feedback, compacted)
+    cache, cache_key = get_default_ai_cache(), compute_prompt_key(request)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        for suggestion in cached:
+            yield suggestion
+        return
+    
+    parser = JSONArrayStream()
+    content, suggestions, used_tokens = [], [], None
+    async with await _create_completion_async(_streaming_request(request)) as stream:
+        async for chunk in stream:
+            used_tokens, delta = _stream_chunk_parts(chunk, used_tokens)
+            if not delta:
+                continue
+            content.append(delta)
+            for item in parser.feed(delta):
+                if isinstance(item, dict):
+                    suggestion = _format_suggestion(item)
+                    suggestions.append(suggestion)
+                    yield suggestion
+    _rate_limiter.settle(_estimate_request_tokens(request), used_tokens)
+    
+    if not suggestions:
+        suggestions = _parse_ai_response("".join(content))
+        for suggestion in suggestions:
+            yield suggestion
+    if cache is not None and is_cacheable(suggestions):
+        cache.set(cache_key, suggestions)
+
+def _streaming_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """The same completion request, streamed, with token usage reported in the final chunk."""
+    return dict(request, stream=True, stream_options={"include_usage": True})
+
+def _stream_chunk_parts(chunk, used_tokens: Optional[int]) -> Tuple[Optional[int], Optional[str]]:
+    """Extract (total tokens used so far, content delta) from a streamed completion chunk."""
+    if getattr(chunk, "usage", None) is not None:
+        used_tokens = chunk.usage.total_tokens
+    if not chunk.choices:
+        return used_tokens, None
+    return used_tokens, chunk.choices[0].delta.content
+
+def _create_completion(request: Dict[str, Any]):
+    """
+    Send a chat completion through the rate limiter, retrying 429s and transient errors with jittered backoff.
+    
+    Timeouts are raised at once rather than retried.
+    
+    With stream=True in the request this returns the openai.Stream; errors
+    are raised before the first chunk, so they are retried the same way.
+    """
+    import openai
+    
+    client = get_openai_client()
+    reserved = _estimate_request_tokens(request)
+    rate_limited = transient = 0 # Retries so far, counted separately for each error class
+    while True:
+        wait = _rate_limiter.reserve(reserved)
+        if wait:
+            time.sleep(wait)
         try:
-            suggestions = json.loads(content)
-            if not isinstance(suggestions, list):
-                suggestions = [suggestions] if isinstance(suggestions, dict) else []
-        except json.JSONDecodeError:
-            return [{
-                "type": "error",
-                "severity": "high",
-                "line": None,
-                "message": f"AI response was not valid JSON. Raw response: {content[:200]}...",
-                "example": None,
-                "category": "api_error"
-            }]
-        
-        formatted_suggestions = []
+            response = client.chat.completions.create(**request)
+        except openai.RateLimitError as e:
+            _rate_limiter.settle(reserved, 0) # A rejected request uses no tokens
+            if rate_limited >= OPENAI_RATE_LIMITS["max_retries"]:
+                raise
+            time.sleep(_rate_limiter.backoff(rate_limited, _retry_after(e)))
+            rate_limited += 1
+            continue
+        except openai.APITimeoutError:
+            # A subclass of APIConnectionError, but not retried: each attempt can take OPENAI_TIMEOUT
+            # seconds while holding a batch worker. The reservation stays spent since the server may
+            # have generated tokens before the client gave up.
+            raise
+        except (openai.APIConnectionError, openai.InternalServerError):
+            _rate_limiter.settle(reserved, 0)
+            if transient >= OPENAI_RATE_LIMITS["transient_retries"]:
+                raise
+            time.sleep(_backoff_delay(transient))
+            transient += 1
+            continue
+        if not request.get("stream"): # Streams report usage in their last chunk; the caller settles
+            _rate_limiter.settle(reserved, getattr(response.usage, "total_tokens", None))
+        return response
+
+async def _create_completion_async(request: Dict[str, Any]):
+    """Async twin of _create_completion."""
+    import openai
+    
+    client = get_async_openai_client()
+    reserved = _estimate_request_tokens(request)
+    rate_limited = transient = 0 # Retries so far, counted separately for each error class
+    while True:
+        wait = _rate_limiter.reserve(reserved)
+        if wait:
+            await asyncio.sleep(wait)
+        try:
+            response = await client.chat.completions.create(**request)
+        except openai.RateLimitError as e:
+            _rate_limiter.settle(reserved, 0) # A rejected request uses no tokens
+            if rate_limited >= OPENAI_RATE_LIMITS["max_retries"]:
+                raise
+            await asyncio.sleep(_rate_limiter.backoff(rate_limited, _retry_after(e)))
+            rate_limited += 1
+            continue
+        except openai.APITimeoutError:
+            # A subclass of APIConnectionError, but not retried: each attempt can take OPENAI_TIMEOUT
+            # seconds while holding a batch worker. The reservation stays spent since the server may
+            # have generated tokens before the client gave up.
+            raise
+        except (openai.APIConnectionError, openai.InternalServerError):
+            _rate_limiter.settle(reserved, 0)
+            if transient >= OPENAI_RATE_LIMITS["transient_retries"]:
+                raise
+            await asyncio.sleep(_backoff_delay(transient))
+            transient += 1
+            continue
+        if not request.get("stream"): # Streams report usage in their last chunk; the caller settles
+            _rate_limiter.settle(reserved, getattr(response.usage, "total_tokens", None))
+        return response
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    ceiling = min(OPENAI_RATE_LIMITS["backoff_max"], OPENAI_RATE_LIMITS["backoff_base"] * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+def _estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """Prompt tokens plus max_tokens, which OpenAI counts against the TPM budget up front."""
+    prompt_tokens = sum(estimate_tokens(message["content"]) + 4 for message in request["messages"])
+    return prompt_tokens + request.get("max_tokens", 0)
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header of a 429 response, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token for code)."""
+    return max(1, len(text) // 4)
+
+def _needs_chunking(code: str) -> bool:
+    return AI_CHUNKING_CONFIG["enabled"] and len(code.strip()) > AI_CHUNKING_CONFIG["single_request_chars"]
+
+def _plan_chunks(code: str, language: str) -> List[Chunk]:
+    """
+    Group top-level units into chunks that fit the token budget.
+    
+    Every chunk after the first also carries a few preceding lines as context.
+    """
+    budget_chars = AI_CHUNKING_CONFIG["chunk_tokens"] * 4
+    spans = []
+    start = end = None
+    size = 0
+    for unit in split_units(code, language, max_chars=budget_chars):
+        if start is not None and size + len(unit.text) > budget_chars:
+            spans.append((start, end))
+            start, size = None, 0
+        if start is None:
+            start = unit.start_line
+        end = unit.end_line
+        size += len(unit.text)
+    if start is not None:
+        spans.append((start, end))
+    
+    overlap = AI_CHUNKING_CONFIG["overlap_lines"]
+    return [(max(1, start - overlap) if index else start, start, end) for index, (start, end) in enumerate(spans)]
+
+def _chunk_text(lines: List[str], chunk: Chunk) -> str:
+    context_start, _, end = chunk
+    return "".join(lines[context_start - 1:end])
+
+def _get_chunked_suggestions(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None,
+                             compacted: bool = False) -> List[Dict[str, Any]]:
+    """Review a large file as concurrent per-chunk requests and merge the results."""
+    lines = split_lines(code)
+    chunks = _plan_chunks(code, language)
+    reviewed = chunks[:AI_CHUNKING_CONFIG["max_chunks"]]
+    
+    def review(chunk: Chunk) -> List[Dict[str, Any]]:
+        try:
+            return _request_suggestions(_chunk_text(lines, chunk), language, _chunk_findings(linter_feedback, chunk), compacted)
+        except Exception as e:
+            return _format_ai_exception(e)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(AI_CHUNKING_CONFIG["max_parallel"], len(reviewed)))) as executor:
+        results = list(executor.map(review, reviewed))
+    return _merge_chunk_suggestions(chunks, reviewed, results)
+
+async def _get_chunked_suggestions_async(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None,
+                                         compacted: bool = False) -> List[Dict[str, Any]]:
+    """Async twin of _get_chunked_suggestions."""
+    lines = split_lines(code)
+    chunks = _plan_chunks(code, language)
+    reviewed = chunks[:AI_CHUNKING_CONFIG["max_chunks"]]
+    slots = asyncio.Semaphore(max(1, AI_CHUNKING_CONFIG["max_parallel"]))
+    
+    async def review(chunk: Chunk) -> List[Dict[str, Any]]:
+        async with slots:
+            try:
+                return await _request_suggestions_async(_chunk_text(lines, chunk), language,
+                                                        _chunk_findings(linter_feedback, chunk), compacted)
+            except Exception as e:
+                return _format_ai_exception(e)
+    
+    results = await asyncio.gather(*(review(chunk) for chunk in reviewed))
+    return _merge_chunk_suggestions(chunks, reviewed, results)
+
+def _chunk_findings(linter_feedback: Optional[List[Dict[str, Any]]], chunk: Chunk) -> Optional[List[Dict[str, Any]]]:
+    """The findings on a chunk's lines, renumbered relative to the chunk text."""
+    if not linter_feedback:
+        return linter_feedback
+    context_start, _, end = chunk
+    return [
+        dict(finding, line=finding["line"] - context_start + 1)
+        for finding in linter_feedback
+        if isinstance(finding.get("line"), int) and context_start <= finding["line"] <= end
+    ]
+
+def _suggestion_line(suggestion: Dict[str, Any]) -> Optional[int]:
+    line = suggestion.get("line")
+    if isinstance(line, int) and not isinstance(line, bool):
+        return line
+    if isinstance(line, str) and line.strip().isdigit():
+        return int(line.strip())
+    return None
+
+def _merge_chunk_suggestions(chunks: List[Chunk], reviewed: List[Chunk],
+                             results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Map chunk-relative lines back to file lines and drop duplicates.
+    
+    Suggestions that land in a chunk's overlap context are dropped, since the
+    previous chunk owns those lines.
+    """
+    merged = []
+    seen = set()
+    no_suggestions = None
+    for (context_start, start, _), suggestions in zip(reviewed, results):
         for suggestion in suggestions:
-            if isinstance(suggestion, dict):
-                formatted_suggestions.append({
-                    "type": suggestion.get("type", "suggestion"),
-                    "severity": suggestion.get("severity", "medium"),
-                    "line": suggestion.get("line"),
-                    "message": suggestion.get("message", "No message provided"),
-                    "example": suggestion.get("example"),
-                    "category": suggestion.get("category", "general")
-                })
-        
-        return formatted_suggestions if formatted_suggestions else [{
+            if suggestion.get("category") == "no_suggestions":
+                no_suggestions = no_suggestions or suggestion
+                continue
+            suggestion = dict(suggestion)
+            line = _suggestion_line(suggestion)
+            if line is not None:
+                line += context_start - 1
+                if line < start:
+                    continue
+                suggestion["line"] = line
+            key = _dedup_key(suggestion)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(suggestion)
+    
+    # Keep the file's reading order; file-level notes (no line) go last
+    merged.sort(key=_line_order)
+    
+    if len(reviewed) < len(chunks):
+        merged.append({
+            "type": "warning",
+            "severity": "medium",
+            "line": None,
+            "message": f"Code is too long for a full AI review: only lines 1-{reviewed[-1][2]} were reviewed ({len(reviewed)} of {len(chunks)} chunks).",
+            "example": None,
+            "category": "limitations"
+        })
+    if not merged and no_suggestions:
+        merged.append(no_suggestions)
+    return merged
+
+def _prepare_review_code(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]]) -> Tuple[str, bool]:
+    """Compact the code for the prompt (if enabled) and record the token savings; returns (code, compacted)."""
+    review_code = compact_code(code, language) if AI_PROMPT_CONFIG["compact"] else code
+    compacted = review_code != code
+    with _stats_lock:
+        _prompt_stats["reviews"] += 1
+        _prompt_stats["compacted"] += int(compacted)
+        _prompt_stats["original_tokens"] += estimate_tokens(code)
+        _prompt_stats["prompt_tokens"] += estimate_tokens(review_code)
+        _prompt_stats["linter_findings"] += len(linter_feedback or [])
+    return review_code, compacted
+
+def _dedup_key(suggestion: Dict[str, Any]) -> Tuple[Any, str]:
+    return suggestion.get("line"), re.sub(r'\s+', ' ', str(suggestion.get("message", ""))).strip().lower()
+
+def _line_order(suggestion: Dict[str, Any]) -> Tuple[bool, int]:
+    """Sort key: the file's reading order, with file-level notes (no line) last."""
+    line = suggestion.get("line")
+    return (not isinstance(line, int), line if isinstance(line, int) else 0)
+
+def _lookup_units(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]],
+                  compacted: bool) -> Tuple[List[PlannedUnit], List[Optional[List[Dict[str, Any]]]]]:
+    """
+    Split the code into top-level units and look each one up in the per-unit cache.
+    
+    A unit's key is the prompt key it would have if reviewed alone, so it
+    changes with the unit's text and with the linter findings on its lines,
+    but not with edits elsewhere in the file or with where the unit sits.
+    
+    Returns:
+        Tuple of (units with their cache keys, cached unit-relative suggestions
+        or None per unit); both empty when per-unit caching doesn't apply
+    """
+    cache = get_default_ai_cache()
+    if cache is None or not AI_CACHE_CONFIG["per_unit"]:
+        return [], []
+    units = split_units(code, language, max_chars=AI_CHUNKING_CONFIG["chunk_tokens"] * 4)
+    if len(units) < 2:
+        return [], [] # The whole-prompt cache already covers this
+    
+    planned = []
+    for unit in units:
+        findings = _chunk_findings(linter_feedback, (unit.start_line, unit.start_line, unit.end_line))
+        request = _build_completion_request(unit.text, language, findings, compacted)
+        planned.append((unit, "unit:" + compute_prompt_key(request)))
+    return planned, [cache.get(key) for _, key in planned]
+
+def _store_unit_suggestions(planned: List[PlannedUnit], indexes: Iterable[int], suggestions: List[Dict[str, Any]]) -> None:
+    """
+    Cache file-line suggestions per unit, with lines relative to the unit.
+    
+    Notes without a line are kept with the first unit. Nothing is stored for
+    failed or truncated reviews.
+    """
+    cache = get_default_ai_cache()
+    indexes = list(indexes)
+    if cache is None or not planned or not indexes or not is_cacheable(suggestions):
+        return
+    
+    starts = [planned[index][0].start_line for index in indexes]
+    per_unit = {index: [] for index in indexes}
+    for suggestion in suggestions:
+        if suggestion.get("category") == "no_suggestions":
+            continue
+        line = _suggestion_line(suggestion)
+        if line is None or line < 1:
+            per_unit[indexes[0]].append(dict(suggestion, line=None))
+            continue
+        index = indexes[max(0, bisect.bisect_right(starts, line) - 1)]
+        per_unit[index].append(dict(suggestion, line=line - planned[index][0].start_line + 1))
+    for index, unit_suggestions in per_unit.items():
+        cache.set(planned[index][1], unit_suggestions)
+
+def _plan_missing_chunks(planned: List[PlannedUnit], cached: List[Optional[List[Dict[str, Any]]]]) -> List[Tuple[Chunk, List[int]]]:
+    """
+    Group runs of consecutive uncached units into chunks, each with its unit indexes.
+    
+    All changed units go in one request when they fit the single-request
+    size; otherwise each run is split at the chunk token budget.
+    """
+    missing = [index for index, hit in enumerate(cached) if hit is None]
+    missing_chars = sum(len(planned[index][0].text) for index in missing)
+    budget_chars = AI_CHUNKING_CONFIG["single_request_chars"] if missing_chars <= AI_CHUNKING_CONFIG["single_request_chars"] else AI_CHUNKING_CONFIG["chunk_tokens"] * 4
+    
+    runs, size = [], 0
+    for index in missing:
+        unit_size = len(planned[index][0].text)
+        if not runs or runs[-1][-1] != index - 1 or size + unit_size > budget_chars:
+            runs.append([])
+            size = 0
+        runs[-1].append(index)
+        size += unit_size
+    
+    overlap = AI_CHUNKING_CONFIG["overlap_lines"]
+    chunks = []
+    for indexes in runs:
+        start, end = planned[indexes[0]][0].start_line, planned[indexes[-1]][0].end_line
+        chunks.append(((max(1, start - overlap), start, end), indexes))
+    return chunks
+
+def _combine_incremental(planned: List[PlannedUnit], cached: List[Optional[List[Dict[str, Any]]]],
+                         planned_chunks: List[Tuple[Chunk, List[int]]], reviewed: List[Tuple[Chunk, List[int]]],
+                         results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Cache the fresh per-chunk results by unit and merge them with the reused units' suggestions."""
+    for (chunk, indexes), result in zip(reviewed, results):
+        _store_unit_suggestions(planned, indexes, _merge_chunk_suggestions([chunk], [chunk], [result]))
+    reviewed_chunks = [chunk for chunk, _ in reviewed]
+    fresh = _merge_chunk_suggestions(reviewed_chunks, reviewed_chunks, results) if reviewed else []
+    
+    suggestions = [suggestion for suggestion in fresh if suggestion.get("category") != "no_suggestions"]
+    skipped = [chunk for chunk, _ in planned_chunks[len(reviewed):]]
+    if skipped:
+        suggestions.append(_skipped_lines_note(skipped))
+    reused_tokens = 0
+    for (unit, _), hit in zip(planned, cached):
+        if hit is None:
+            continue
+        reused_tokens += estimate_tokens(unit.text)
+        for suggestion in hit:
+            line = _suggestion_line(suggestion)
+            suggestions.append(dict(suggestion, line=line + unit.start_line - 1) if line is not None else dict(suggestion))
+    with _stats_lock:
+        _prompt_stats["units_reused"] += sum(1 for hit in cached if hit is not None)
+        _prompt_stats["reused_tokens"] += reused_tokens
+    
+    unique, seen = [], set()
+    for suggestion in suggestions:
+        key = _dedup_key(suggestion)
+        if key not in seen:
+            seen.add(key)
+            unique.append(suggestion)
+    suggestions = sorted(unique, key=_line_order)
+    if suggestions:
+        return suggestions
+    return fresh or _parse_ai_response("[]") # Nothing anywhere: the usual "no suggestions" note
+
+def _skipped_lines_note(skipped: List[Chunk]) -> Dict[str, Any]:
+    """Limitations note naming the line ranges of chunks that were over max_chunks and not reviewed."""
+    ranges: List[List[int]] = []
+    for _, start, end in skipped:
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    described = ", ".join(f"{start}-{end}" if start != end else str(start) for start, end in ranges)
+    return {
+        "type": "warning",
+        "severity": "medium",
+        "line": None,
+        "message": f"Code is too long for a full AI review: lines {described} were not reviewed.",
+        "example": None,
+        "category": "limitations"
+    }
+
+def _get_incremental_suggestions(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]], compacted: bool,
+                                 planned: List[PlannedUnit], cached: List[Optional[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Review only the units missing from the per-unit cache and reuse the rest, shifted to their current lines."""
+    lines = split_lines(code)
+    planned_chunks = _plan_missing_chunks(planned, cached)
+    reviewed = planned_chunks[:AI_CHUNKING_CONFIG["max_chunks"]]
+    
+    def review(chunk: Chunk) -> List[Dict[str, Any]]:
+        try:
+            return _request_suggestions(_chunk_text(lines, chunk), language, _chunk_findings(linter_feedback, chunk), compacted)
+        except Exception as e:
+            return _format_ai_exception(e)
+    
+    if len(reviewed) == 1:
+        results = [review(reviewed[0][0])] # The usual edit-one-function case; no pool needed
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(AI_CHUNKING_CONFIG["max_parallel"], len(reviewed)))) as executor:
+            results = list(executor.map(review, [chunk for chunk, _ in reviewed]))
+    return _combine_incremental(planned, cached, planned_chunks, reviewed, results)
+
+async def _get_incremental_suggestions_async(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]], compacted: bool,
+                                             planned: List[PlannedUnit], cached: List[Optional[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Async twin of _get_incremental_suggestions."""
+    lines = split_lines(code)
+    planned_chunks = _plan_missing_chunks(planned, cached)
+    reviewed = planned_chunks[:AI_CHUNKING_CONFIG["max_chunks"]]
+    slots = asyncio.Semaphore(max(1, AI_CHUNKING_CONFIG["max_parallel"]))
+    
+    async def review(chunk: Chunk) -> List[Dict[str, Any]]:
+        async with slots:
+            try:
+                return await _request_suggestions_async(_chunk_text(lines, chunk), language,
+                                                        _chunk_findings(linter_feedback, chunk), compacted)
+            except Exception as e:
+                return _format_ai_exception(e)
+    
+    results = await asyncio.gather(*(review(chunk) for chunk, _ in reviewed))
+    return _combine_incremental(planned, cached, planned_chunks, reviewed, list(results))
+
+def get_openai_client():
+    """
+    Get the process-wide OpenAI client.
+    
+    The client is thread-safe and keeps HTTP connections alive between reviews,
+    bounded by OPENAI_HTTP_POOL, with OPENAI_TIMEOUT applied to every request.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            import openai
+            _client = openai.OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=0, # Retries go through _create_completion so they respect the rate limiter
+                http_client=openai.DefaultHttpxClient(
+                    limits=_http_limits(),
+                    event_hooks={"response": [_track_connection]}
+                )
+            )
+        return _client
+
+def get_async_openai_client():
+    """Get the shared AsyncOpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            import openai
+            client = openai.AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=0, # Retries go through _create_completion so they respect the rate limiter
+                http_client=openai.DefaultAsyncHttpxClient(
+                    limits=_http_limits(),
+                    event_hooks={"response": [_track_connection_async]}
+                )
+            )
+            _async_clients[loop] = client
+        return client
+
+def get_ai_cache_stats() -> Optional[Dict[str, Any]]:
+    """Get hit/miss/byte statistics of the AI suggestion cache (None if disabled)."""
+    cache = get_default_ai_cache()
+    return cache.stats() if cache is not None else None
+
+def get_prompt_stats() -> Dict[str, Any]:
+    """Estimated code tokens sent versus the raw code (after compaction and per-unit reuse), summed over reviews in this process."""
+    with _stats_lock:
+        stats = dict(_prompt_stats)
+    stats["saved_tokens"] = stats["original_tokens"] - stats["prompt_tokens"] + stats["reused_tokens"]
+    stats["saved_ratio"] = round(stats["saved_tokens"] / stats["original_tokens"], 3) if stats["original_tokens"] else 0.0
+    return stats
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    """Get request scheduling counters: requests, throttled, wait_seconds, rate_limited and retries."""
+    return _rate_limiter.stats()
+
+def get_connection_stats() -> Dict[str, int]:
+    """
+    Get HTTP connection counters for the shared OpenAI clients.
+    
+    Returns:
+        Dictionary with requests, connections_opened and connections_reused
+    """
+    with _stats_lock:
+        return dict(_connection_stats)
+
+def reset_connection_stats() -> None:
+    """Zero the connection counters (connections already open still count as reused)."""
+    with _stats_lock:
+        for key in _connection_stats:
+            _connection_stats[key] = 0
+
+def _http_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=OPENAI_HTTP_POOL["max_connections"],
+        max_keepalive_connections=OPENAI_HTTP_POOL["max_keepalive_connections"],
+        keepalive_expiry=OPENAI_HTTP_POOL["keepalive_expiry"]
+    )
+
+def _track_connection(response) -> None:
+    """Count whether a response travelled over a new or an already-open connection."""
+    stream = response.extensions.get("network_stream")
+    with _stats_lock:
+        _connection_stats["requests"] += 1
+        if stream is None:
+            return
+        if stream in _seen_connections:
+            _connection_stats["connections_reused"] += 1
+        else:
+            _seen_connections.add(stream)
+            _connection_stats["connections_opened"] += 1
+
+async def _track_connection_async(response) -> None:
+    _track_connection(response)
+
+def _check_ai_preconditions(code: str) -> Optional[List[Dict[str, Any]]]:
+    """Return an explanatory suggestion list if AI analysis cannot run, else None."""
+    if not OPENAI_API_KEY:
+        return [{
             "type": "info",
             "severity": "low",
             "line": None,
-            "message": "AI analysis completed - no specific suggestions found for this code. Great job!",
+            "message": "AI suggestions unavailable: OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable.",
             "example": None,
-            "category": "no_suggestions"
+            "category": "configuration"
         }]
-        
-    except openai.APIError as e:
+    
+    try:
+        import openai
+    except ImportError:
+        return [{
+            "type": "info",
+            "severity": "low",
+            "line": None,
+            "message": "AI suggestions unavailable: OpenAI package not installed. Please run `pip install openai`.",
+            "example": None,
+            "category": "configuration"
+        }]
+    
+    if len(code.strip()) > 8000 and not AI_CHUNKING_CONFIG["enabled"]: # Limit for GPT-4o-mini context window
+        return [{
+            "type": "warning",
+            "severity": "medium",
+            "line": None,
+            "message": "Code is too long for AI analysis (exceeds 8000 characters). AI suggestions might be incomplete or unavailable for very large files.",
+            "example": None,
+            "category": "limitations"
+        }]
+    
+    return None
+
+def _build_completion_request(code: str, language: str, linter_feedback: Optional[List[Dict[str, Any]]] = None,
+                              compacted: bool = False) -> Dict[str, Any]:
+    """Render the prompt for a language, plus any compaction note and linter findings, and build the chat completion arguments."""
+    # Get the appropriate prompt template and system message
+    prompt_template = AI_PROMPT_TEMPLATES.get(language, AI_PROMPT_TEMPLATES["python"]) # Default to python if language not found
+    system_prompt = SYSTEM_PROMPTS.get(f"{language}_expert", SYSTEM_PROMPTS["code_reviewer"])
+    
+    prompt = prompt_template.format(code=code)
+    if compacted:
+        prompt += AI_PROMPT_ADDENDA["compacted"]
+    findings = format_linter_findings(linter_feedback) if linter_feedback else ""
+    if findings:
+        prompt += AI_PROMPT_ADDENDA["linter_findings"].format(findings=findings)
+    
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": OPENAI_TEMPERATURE,
+        "max_tokens": OPENAI_MAX_TOKENS
+    }
+
+def _parse_ai_response(content: str) -> List[Dict[str, Any]]:
+    """Turn the raw model response into formatted suggestions."""
+    content = content.strip()
+    
+    # Clean up response (remove markdown code blocks)
+    if content.startswith('```json'):
+        content = content[7:]
+    if content.startswith('```'):
+        content = content[3:]
+    if content.endswith('```'):
+        content = content[:-3]
+    
+    content = content.strip()
+    
+    suggestions = []
+    try:
+        suggestions = json.loads(content)
+        if not isinstance(suggestions, list):
+            suggestions = [suggestions] if isinstance(suggestions, dict) else []
+    except json.JSONDecodeError:
         return [{
             "type": "error",
             "severity": "high",
             "line": None,
-            "message": f"OpenAI API Error: {e.status_code} - {e.response.json().get('error', {}).get('message', str(e))}",
+            "message": f"AI response was not valid JSON. Raw response: {content[:200]}...",
             "example": None,
             "category": "api_error"
         }]
-    except openai.APITimeoutError:
+    
+    formatted_suggestions = [_format_suggestion(s) for s in suggestions if isinstance(s, dict)]
+    
+    return formatted_suggestions if formatted_suggestions else [{
+        "type": "info",
+        "severity": "low",
+        "line": None,
+        "message": "AI analysis completed - no specific suggestions found for this code. Great job!",
+        "example": None,
+        "category": "no_suggestions"
+    }]
+
+def _format_suggestion(suggestion: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one suggestion object from the model, filling in defaults."""
+    return {
+        "type": suggestion.get("type", "suggestion"),
+        "severity": suggestion.get("severity", "medium"),
+        "line": suggestion.get("line"),
+        "message": suggestion.get("message", "No message provided"),
+        "example": suggestion.get("example"),
+        "category": suggestion.get("category", "general")
+    }
+
+def _format_ai_exception(e: Exception) -> List[Dict[str, Any]]:
+    """Convert an exception raised while talking to OpenAI into an error suggestion."""
+    try:
+        import openai
+    except ImportError:
+        openai = None
+    
+    # APITimeoutError is an APIError too, so it has to be checked first
+    if openai is not None and isinstance(e, openai.APITimeoutError):
         return [{
             "type": "error",
             "severity": "high",
@@ -130,12 +1044,24 @@ def get_ai_suggestions_sync(code: str, language: str) -> List[Dict[str, Any]]:
             "example": None,
             "category": "api_error"
         }]
-    except Exception as e:
+    if openai is not None and isinstance(e, openai.APIError):
+        # Connection errors carry no HTTP status or response body
+        status = getattr(e, "status_code", None)
+        body = e.body if isinstance(e.body, dict) else {}
+        detail = body.get("message") or body.get("error", {}).get("message") or e.message
         return [{
             "type": "error",
             "severity": "high",
             "line": None,
-            "message": f"An unexpected error occurred during AI analysis: {str(e)}",
+            "message": f"OpenAI API Error: {status} - {detail}" if status else f"OpenAI API Error: {detail}",
             "example": None,
-            "category": "internal_error"
+            "category": "api_error"
         }]
+    return [{
+        "type": "error",
+        "severity": "high",
+        "line": None,
+        "message": f"An unexpected error occurred during AI analysis: {str(e)}",
+        "example": None,
+        "category": "internal_error"
+    }]
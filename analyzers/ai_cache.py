@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from config import AI_CACHE_CONFIG, OPENAI_BASE_URL
+
+def compute_prompt_key(request: Dict[str, Any]) -> str:
+    """
+    Fingerprint a chat completion request.
+
+    Covers the system prompt, the rendered prompt, the model, temperature and
+    max tokens, plus the API endpoint, so any change to what would be sent
+    produces a new key.
+
+    Args:
+        request: Keyword arguments for chat.completions.create
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    fingerprint = {
+        "messages": request["messages"],
+        "model": request["model"],
+        "temperature": request["temperature"],
+        "max_tokens": request["max_tokens"],
+        "base_url": OPENAI_BASE_URL
+    }
+    payload = json.dumps(fingerprint, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_cacheable(suggestions: List[Dict[str, Any]]) -> bool:
+    """Only keep real model answers, never transient API or parsing failures."""
+    return not any(s.get("category") in ("api_error", "internal_error", "configuration", "limitations") for s in suggestions)
+
+class AISuggestionCache:
+    """SQLite-backed cache of AI suggestions with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 32 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "bytes_served": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Access is serialized by self._lock; WAL lets the CLI and the UI share the file
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS suggestions_accessed_at ON suggestions (accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached suggestions for a prompt key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute("SELECT value, created_at FROM suggestions WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                    self._stats["expired"] += 1
+                    row = None
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE suggestions SET accessed_at = ? WHERE key = ?", (now, key))
+                self._stats["hits"] += 1
+                self._stats["bytes_served"] += len(row[0])
+                return json.loads(row[0])
+            except (sqlite3.Error, json.JSONDecodeError):
+                self._stats["misses"] += 1
+                return None # The cache is best-effort
+
+    def set(self, key: str, suggestions: List[Dict[str, Any]]) -> None:
+        """Store suggestions for a prompt key, evicting old entries if over budget."""
+        value = json.dumps(suggestions)
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO suggestions (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self._evict(conn, now)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until the size budget fits."""
+        if self._total_bytes(conn) <= self.max_bytes:
+            return
+        self._stats["evictions"] += conn.execute(
+            "DELETE FROM suggestions WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = self._total_bytes(conn)
+        target = int(self.max_bytes * 0.9) # Leave headroom so we don't evict on every write
+        if total <= target:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM suggestions ORDER BY accessed_at"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM suggestions WHERE key = ?", doomed)
+        self._stats["evictions"] += len(doomed)
+
+    @staticmethod
+    def _total_bytes(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM suggestions").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, expired, evictions and bytes_served
+            (this process), plus entries and bytes stored on disk
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            try:
+                conn = self._connection()
+                stats["entries"], stats["bytes"] = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM suggestions"
+                ).fetchone()
+            except sqlite3.Error:
+                stats["entries"], stats["bytes"] = 0, 0
+            return stats
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            try:
+                self._connection().execute("DELETE FROM suggestions")
+            except sqlite3.Error:
+                pass
+            for key in self._stats:
+                self._stats[key] = 0
+
+_default_cache: Optional[AISuggestionCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_ai_cache() -> Optional[AISuggestionCache]:
+    """Get the process-wide AI suggestion cache configured by AI_CACHE_CONFIG (None if disabled)."""
+    global _default_cache
+    if not AI_CACHE_CONFIG["enabled"]:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AISuggestionCache(
+                AI_CACHE_CONFIG["path"],
+                ttl_seconds=AI_CACHE_CONFIG["ttl_seconds"],
+                max_bytes=AI_CACHE_CONFIG["max_bytes"]
+            )
+        return _default_cache
@@ -1,12 +1,23 @@
 import json
-import tempfile
 import subprocess
 from typing import Dict, List, Any
 import os
 import sys
 import re
+from utils.tool_probe import require_tool, tool_stamp
+from utils.tool_runner import ToolCall, ToolStep, WorkspaceCall, drive, drive_async
 import xml.etree.ElementTree as ET
 
+CPPCHECK_ARGS = [
+    "--enable=all", # Enable all checks
+    "--xml",        # Output format XML
+    "--xml-version=2" # Use XML version 2 for more details
+]
+
+def linter_fingerprint() -> Dict[str, Any]:
+    """Cppcheck settings and the installed Cppcheck and g++ that shape analyze_c_cpp_code's results, for the result cache key."""
+    return {"args": CPPCHECK_ARGS, "cppcheck": tool_stamp("cppcheck"), "g++": tool_stamp("g++")}
+
 def analyze_c_cpp_code(code: str) -> Dict[str, Any]:
     """
     Analyze C/C++ code using Cppcheck.
@@ -17,29 +28,26 @@ def analyze_c_cpp_code(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing analysis results
     """
+    return drive(_analyze_c_cpp_code(code))
+
+async def analyze_c_cpp_code_async(code: str) -> Dict[str, Any]:
+    """Async twin of analyze_c_cpp_code (runs Cppcheck via asyncio subprocess)."""
+    return await drive_async(_analyze_c_cpp_code(code))
+
+def _analyze_c_cpp_code(code: str) -> ToolStep:
     try:
-        # Create temporary file for analysis
-        # Cppcheck can auto-detect language from extension, so use .cpp
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        cppcheck = require_tool("cppcheck")
         
-        try:
+        # Cppcheck can't read stdin; it auto-detects the language from the extension, so use .cpp
+        with (yield WorkspaceCall()) as workspace:
+            temp_file_path = os.path.join(workspace, "snippet.cpp")
+            with open(temp_file_path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            
             # Run Cppcheck with XML output
-            cmd = [
-                "cppcheck",
-                "--enable=all", # Enable all checks
-                "--xml",        # Output format XML
-                "--xml-version=2", # Use XML version 2 for more details
-                temp_file_path
-            ]
+            cmd = [cppcheck, *CPPCHECK_ARGS, temp_file_path]
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
+            result = yield ToolCall(cmd, timeout=30)
             
             formatted_results = []
             if result.stderr.strip(): # Cppcheck outputs XML to stderr
@@ -76,11 +84,6 @@ def analyze_c_cpp_code(code: str) -> Dict[str, Any]:
                 "errors": result.stdout if result.stdout else None, # stdout might contain other messages
                 "return_code": result.returncode
             }
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
                 
     except subprocess.TimeoutExpired:
         return {
@@ -109,37 +112,31 @@ def validate_c_cpp_syntax(code: str) -> Dict[str, Any]:
     Basic C/C++ syntax validation by attempting to compile with g++.
     Requires g++ to be installed.
     """
+    return drive(_validate_c_cpp_syntax(code))
+
+async def validate_c_cpp_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_c_cpp_syntax."""
+    return await drive_async(_validate_c_cpp_syntax(code))
+
+def _validate_c_cpp_syntax(code: str) -> ToolStep:
     try:
-        # Create temporary file for compilation
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.cpp', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        gxx = require_tool("g++")
         
-        try:
-            # Attempt to compile the C++ code (without linking)
-            cmd = ["g++", "-fsyntax-only", temp_file_path]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                # g++ outputs errors to stderr
-                error_message = result.stderr.strip()
-                # Attempt to extract line number from g++ error output
-                match = re.search(r'(\w+\.cpp):(\d+):', error_message)
-                line_num = int(match.group(2)) if match else 1
-                return {
-                    "valid": False,
-                    "error": f"Syntax Error at line {line_num}: {error_message.splitlines()[0]}"
-                }
-            return {"valid": True, "error": None}
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        # Attempt to compile the C++ code read from stdin (without linking)
+        cmd = [gxx, "-fsyntax-only", "-x", "c++", "-"]
+        result = yield ToolCall(cmd, timeout=10, input=code)
+        
+        if result.returncode != 0:
+            # g++ outputs errors to stderr
+            error_message = result.stderr.strip()
+            # Attempt to extract line number from g++ error output
+            match = re.search(r'<stdin>:(\d+):', error_message)
+            line_num = int(match.group(1)) if match else 1
+            return {
+                "valid": False,
+                "error": f"Syntax Error at line {line_num}: {error_message.splitlines()[0]}"
+            }
+        return {"valid": True, "error": None}
     except FileNotFoundError:
         return {
             "valid": False,
@@ -0,0 +1,143 @@
+#!/usr/bin/env node
+/*
+ * Long-lived ESLint worker: node analyzers/eslint_server.js [scratch root]
+ *
+ * Keeps ESLint (and the @typescript-eslint parser/plugin) loaded and reuses one
+ * ESLint instance per configuration, so each request only pays for the lint.
+ *
+ * Request:  {"id": 1, "code": "...", "config": {<eslintrc object>}, "typescript": false}
+ * Response: {"id": 1, "messages": [<ESLint message>, ...], "error_count": 0, "warning_count": 1}
+ *
+ * One JSON object per line on stdin/stdout; stdout carries nothing else. The
+ * snippet files live in a directory under the scratch root (utils.scratch on the
+ * Python side, RAM-backed /dev/shm by default), or the system temp directory.
+ */
+'use strict';
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const readline = require('readline');
+const Module = require('module');
+
+// Anything ESLint or a plugin logs must not end up in the response stream
+console.log = console.error;
+console.info = console.error;
+
+// Project-local node_modules first, then NODE_PATH and the global npm prefix
+const SEARCH_PATHS = [
+  process.cwd(),
+  ...Module.globalPaths,
+  path.resolve(path.dirname(process.execPath), '..', 'lib', 'node_modules')
+];
+const MAX_INSTANCES = 8;
+
+const scratchDir = fs.mkdtempSync(path.join(process.argv[2] || os.tmpdir(), 'eslint-server-'));
+// Type-aware TypeScript rules need the linted file to be part of a tsconfig project
+fs.writeFileSync(path.join(scratchDir, 'tsconfig.json'), JSON.stringify({
+  compilerOptions: {
+    target: 'es2021',
+    module: 'commonjs',
+    strict: true,
+    esModuleInterop: true,
+    skipLibCheck: true,
+    forceConsistentCasingInFileNames: true,
+    jsx: 'react'
+  },
+  include: ['snippet.ts']
+}, null, 2));
+
+let eslintModule = null;
+const instances = new Map();
+
+function loadESLint() {
+  if (eslintModule) {
+    return eslintModule;
+  }
+  const entry = require.resolve('eslint', { paths: SEARCH_PATHS });
+  const marker = path.join('node_modules', 'eslint') + path.sep;
+  const packageRoot = entry.slice(0, entry.lastIndexOf(marker));
+
+  // Our configs are eslintrc-style; ESLint 9 only offers that through LegacyESLint
+  let ESLint = null;
+  try {
+    ESLint = require(require.resolve('eslint/use-at-your-own-risk', { paths: SEARCH_PATHS })).LegacyESLint;
+  } catch (e) {
+    ESLint = null;
+  }
+  if (!ESLint) {
+    ESLint = require(entry).ESLint;
+  }
+  eslintModule = { ESLint, packageRoot };
+  return eslintModule;
+}
+
+function getInstance(config) {
+  const key = JSON.stringify(config);
+  let eslint = instances.get(key);
+  if (eslint) {
+    instances.delete(key); // Re-insert to keep the map in LRU order
+  } else {
+    const { ESLint, packageRoot } = loadESLint();
+    if (config.parser) {
+      config.parser = require.resolve(config.parser, { paths: [packageRoot, ...SEARCH_PATHS] });
+    }
+    eslint = new ESLint({
+      cwd: scratchDir,
+      useEslintrc: false,
+      overrideConfig: config,
+      resolvePluginsRelativeTo: packageRoot
+    });
+    if (instances.size >= MAX_INSTANCES) {
+      instances.delete(instances.keys().next().value);
+    }
+  }
+  instances.set(key, eslint);
+  return eslint;
+}
+
+async function lint(request) {
+  const config = JSON.parse(JSON.stringify(request.config || {}));
+  const filePath = path.join(scratchDir, request.typescript ? 'snippet.ts' : 'snippet.js');
+  if (request.typescript) {
+    config.parserOptions = Object.assign({}, config.parserOptions, { tsconfigRootDir: scratchDir });
+    fs.writeFileSync(filePath, request.code);
+  }
+
+  const [result] = await getInstance(config).lintText(request.code, { filePath });
+  return {
+    messages: result ? result.messages : [],
+    error_count: result ? result.errorCount : 0,
+    warning_count: result ? result.warningCount : 0
+  };
+}
+
+function respond(response) {
+  process.stdout.write(JSON.stringify(response) + '\n');
+}
+
+// Requests are handled strictly one after another
+let pending = Promise.resolve();
+const input = readline.createInterface({ input: process.stdin, terminal: false });
+
+input.on('line', (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  pending = pending.then(async () => {
+    let request = {};
+    try {
+      request = JSON.parse(line);
+      respond(Object.assign(await lint(request), { id: request.id }));
+    } catch (e) {
+      respond({ id: request.id === undefined ? null : request.id, error: `${e.name}: ${e.message}` });
+    }
+  });
+});
+
+input.on('close', () => {
+  pending.then(() => {
+    fs.rmSync(scratchDir, { recursive: true, force: true });
+    process.exit(0);
+  });
+});
@@ -1,10 +1,15 @@
 import json
-import tempfile
 import subprocess
 from typing import Dict, List, Any
 import os
 import sys
 import re
+from utils.tool_probe import require_tool, tool_stamp
+from utils.tool_runner import ToolCall, ToolStep, WorkspaceCall, drive, drive_async
+
+def linter_fingerprint() -> Dict[str, Any]:
+    """The installed Go toolchain and staticcheck that shape analyze_go_code's results, for the result cache key."""
+    return {"go": tool_stamp("go"), "staticcheck": tool_stamp("staticcheck")}
 
 def analyze_go_code(code: str) -> Dict[str, Any]:
     """
@@ -16,79 +21,72 @@ def analyze_go_code(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing analysis results
     """
-    try:
-        # Create a temporary directory for the Go module
-        temp_dir = tempfile.mkdtemp()
-        module_name = "temp_module"
-        
-        # Create go.mod and main.go inside the temporary directory
-        with open(os.path.join(temp_dir, "go.mod"), "w") as f:
-            f.write(f"module {module_name}\n\ngo 1.18\n") # Use a recent Go version
+    return drive(_analyze_go_code(code))
 
-        with open(os.path.join(temp_dir, "main.go"), "w") as f:
-            f.write(code)
+async def analyze_go_code_async(code: str) -> Dict[str, Any]:
+    """Async twin of analyze_go_code (runs staticcheck via asyncio subprocess)."""
+    return await drive_async(_analyze_go_code(code))
+
+def _analyze_go_code(code: str) -> ToolStep:
+    try:
+        go = require_tool("go")
+        staticcheck = require_tool("staticcheck")
         
-        try:
+        # A private module directory from the workspace pool
+        with (yield WorkspaceCall()) as module_dir:
+            # Create go.mod and main.go inside the module directory
+            with open(os.path.join(module_dir, "go.mod"), "w") as f:
+                f.write("module temp_module\n\ngo 1.18\n") # Use a recent Go version
+            
+            with open(os.path.join(module_dir, "main.go"), "w") as f:
+                f.write(code)
+            
             # Run `go mod tidy` to ensure dependencies are resolved (important for staticcheck)
-            go_mod_cmd = ["go", "mod", "tidy"]
-            subprocess.run(go_mod_cmd, cwd=temp_dir, capture_output=True, text=True, timeout=10)
-
-            # Run staticcheck with JSON output
+            go_mod_cmd = [go, "mod", "tidy"]
+            yield ToolCall(go_mod_cmd, timeout=10, cwd=module_dir)
+            
+            # Run staticcheck with JSON output on the module's packages
             cmd = [
-                "staticcheck",
-                "-f", "json", # Output format JSON
-                f"./{module_name}/..." # Analyze the module
+                staticcheck,
+                "-f", "json", # One JSON object per issue, one per line
+                "./..."
             ]
-            
-            # staticcheck needs to be run from a directory where it can find the module
-            # We run it from the parent directory of temp_dir, and pass the module path
-            result = subprocess.run(
-                cmd, 
-                cwd=os.path.dirname(temp_dir), # Run from parent dir to reference module
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
-            
-            staticcheck_results = []
-            if result.stdout.strip():
+            result = yield ToolCall(cmd, timeout=30, cwd=module_dir)
+        
+        staticcheck_results = []
+        for line in result.stdout.splitlines():
+            if line.strip():
                 try:
-                    # staticcheck outputs a JSON array of issues
-                    staticcheck_results = json.loads(result.stdout)
+                    staticcheck_results.append(json.loads(line))
                 except json.JSONDecodeError:
-                    pass # Fallback to empty results if JSON parsing fails
-            
-            formatted_results = []
-            for issue in staticcheck_results:
-                severity_map = {
-                    'error': 'error',
-                    'warning': 'warning',
-                    'info': 'info'
-                }
-                formatted_results.append({
-                    "type": "linter",
-                    "tool": "staticcheck",
-                    "severity": severity_map.get(issue.get("severity", "warning"), "warning"),
-                    "line": issue.get("line", 1),
-                    "column": issue.get("column", 0),
-                    "message": issue.get("message", ""),
-                    "rule_id": issue.get("code", "")
-                })
-            
-            return {
-                "success": True,
-                "language": "go",
-                "linter_feedback": formatted_results,
-                "raw_output": result.stdout,
-                "errors": result.stderr if result.stderr else None,
-                "return_code": result.returncode
+                    pass # Skip lines that aren't issues
+        
+        formatted_results = []
+        for issue in staticcheck_results:
+            severity_map = {
+                'error': 'error',
+                'warning': 'warning',
+                'info': 'info'
             }
-            
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            location = issue.get("location", {})
+            formatted_results.append({
+                "type": "linter",
+                "tool": "staticcheck",
+                "severity": severity_map.get(issue.get("severity", "warning"), "warning"),
+                "line": location.get("line", 1),
+                "column": location.get("column", 0),
+                "message": issue.get("message", ""),
+                "rule_id": issue.get("code", "")
+            })
+        
+        return {
+            "success": True,
+            "language": "go",
+            "linter_feedback": formatted_results,
+            "raw_output": result.stdout,
+            "errors": result.stderr if result.stderr else None,
+            "return_code": result.returncode
+        }
                 
     except subprocess.TimeoutExpired:
         return {
@@ -117,49 +115,44 @@ def validate_go_syntax(code: str) -> Dict[str, Any]:
     Basic Go syntax validation using `go vet`.
     Requires Go to be installed.
     """
-    try:
-        # Create a temporary directory for the Go module
-        temp_dir = tempfile.mkdtemp()
-        module_name = "temp_module"
-        
-        # Create go.mod and main.go inside the temporary directory
-        with open(os.path.join(temp_dir, "go.mod"), "w") as f:
-            f.write(f"module {module_name}\n\ngo 1.18\n")
+    return drive(_validate_go_syntax(code))
 
-        with open(os.path.join(temp_dir, "main.go"), "w") as f:
-            f.write(code)
+async def validate_go_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_go_syntax."""
+    return await drive_async(_validate_go_syntax(code))
+
+def _validate_go_syntax(code: str) -> ToolStep:
+    try:
+        go = require_tool("go")
         
-        try:
+        # A private module directory from the workspace pool
+        with (yield WorkspaceCall()) as module_dir:
+            # Create go.mod and main.go inside the module directory
+            with open(os.path.join(module_dir, "go.mod"), "w") as f:
+                f.write("module temp_module\n\ngo 1.18\n")
+            
+            with open(os.path.join(module_dir, "main.go"), "w") as f:
+                f.write(code)
+            
             # Run `go mod tidy` to ensure dependencies are resolved
-            go_mod_cmd = ["go", "mod", "tidy"]
-            subprocess.run(go_mod_cmd, cwd=temp_dir, capture_output=True, text=True, timeout=10)
-
-            # Run `go vet` for syntax and basic semantic checks
-            cmd = ["go", "vet", "./..."]
-            result = subprocess.run(
-                cmd,
-                cwd=temp_dir,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            go_mod_cmd = [go, "mod", "tidy"]
+            yield ToolCall(go_mod_cmd, timeout=10, cwd=module_dir)
             
-            if result.returncode != 0:
-                # go vet outputs errors to stderr
-                error_message = result.stderr.strip()
-                # Attempt to extract line number from go vet error output
-                match = re.search(r'main\.go:(\d+):', error_message)
-                line_num = int(match.group(1)) if match else 1
-                return {
-                    "valid": False,
-                    "error": f"Syntax/Semantic Error at line {line_num}: {error_message.splitlines()[0]}"
-                }
-            return {"valid": True, "error": None}
-        finally:
-            # Clean up temporary directory
-            import shutil
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            # Run `go vet` for syntax and basic semantic checks
+            cmd = [go, "vet", "./..."]
+            result = yield ToolCall(cmd, timeout=10, cwd=module_dir)
+        
+        if result.returncode != 0:
+            # go vet outputs errors to stderr
+            error_message = result.stderr.strip()
+            # Attempt to extract line number from go vet error output
+            match = re.search(r'main\.go:(\d+):', error_message)
+            line_num = int(match.group(1)) if match else 1
+            return {
+                "valid": False,
+                "error": f"Syntax/Semantic Error at line {line_num}: {error_message.splitlines()[0]}"
+            }
+        return {"valid": True, "error": None}
     except FileNotFoundError:
         return {
             "valid": False,
@@ -1,10 +1,44 @@
 import json
-import tempfile
 import subprocess
 from typing import Dict, List, Any
 import os
 import sys
 import re
+from utils.config_store import config_file
+from utils.tool_probe import node_tool_cmd, tool_stamp
+from utils.tool_runner import ToolCall, ToolStep, drive, drive_async
+
+# Stylelint configuration of the lint, rendered once by the config store; the code goes on stdin
+STYLELINT_LINT_CONFIG = {
+    "extends": ["stylelint-config-standard"],
+    "rules": {
+        "indentation": 2,
+        "selector-list-comma-newline-after": "always",
+        "block-closing-brace-newline-after": "always",
+        "declaration-colon-space-after": "always",
+        "declaration-no-important": True,
+        "color-no-invalid-hex": True,
+        "unit-no-unknown": True,
+        "property-no-unknown": True,
+        "no-empty-source": True,
+        "no-duplicate-selectors": True,
+        "no-descending-specificity": True
+    }
+}
+# Added to STYLELINT_LINT_CONFIG for HTML input
+STYLELINT_HTML_PROCESSORS = ["stylelint-processor-html"]
+# Rules of the CSS syntax check
+STYLELINT_SYNTAX_CONFIG = {"rules": {"no-empty-source": True, "block-no-empty": True}}
+
+def linter_fingerprint() -> Dict[str, Any]:
+    """Stylelint settings and installation that shape analyze_html_css_code's results, for the result cache key."""
+    return {
+        "config": STYLELINT_LINT_CONFIG,
+        "html_processors": STYLELINT_HTML_PROCESSORS,
+        "syntax_config": STYLELINT_SYNTAX_CONFIG,
+        "node": tool_stamp("node"),
+        "stylelint": tool_stamp("stylelint")
+    }
 
 def analyze_html_css_code(code: str) -> Dict[str, Any]:
     """
@@ -16,100 +50,72 @@ def analyze_html_css_code(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing analysis results
     """
+    return drive(_analyze_html_css_code(code))
+
+async def analyze_html_css_code_async(code: str) -> Dict[str, Any]:
+    """Async twin of analyze_html_css_code (runs Stylelint via asyncio subprocess)."""
+    return await drive_async(_analyze_html_css_code(code))
+
+def _analyze_html_css_code(code: str) -> ToolStep:
     try:
+        stylelint_cmd = node_tool_cmd("stylelint")
+        
         # Determine if it's primarily HTML or CSS to set suffix and config
         is_css = re.search(r'{[^}]*}', code) and not re.search(r'<!DOCTYPE html>', code, re.IGNORECASE)
         suffix = '.css' if is_css else '.html' # Stylelint can lint CSS within HTML <style> tags
 
-        with tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
-        
-        # Create a temporary .stylelintrc.json for consistent configuration
-        stylelint_config = {
-            "extends": ["stylelint-config-standard"],
-            "rules": {
-                "indentation": 2,
-                "selector-list-comma-newline-after": "always",
-                "block-closing-brace-newline-after": "always",
-                "declaration-colon-space-after": "always",
-                "declaration-no-important": True,
-                "color-no-invalid-hex": True,
-                "unit-no-unknown": True,
-                "property-no-unknown": True,
-                "no-empty-source": True,
-                "no-duplicate-selectors": True,
-                "no-descending-specificity": True
-            }
-        }
         # If it's an HTML file, enable HTML processor
+        stylelint_config = STYLELINT_LINT_CONFIG
         if suffix == '.html':
-            stylelint_config["processors"] = ["stylelint-processor-html"]
+            stylelint_config = {**STYLELINT_LINT_CONFIG, "processors": STYLELINT_HTML_PROCESSORS}
 
-        stylelint_config_path = os.path.join(os.path.dirname(temp_file_path), ".stylelintrc.json")
-        with open(stylelint_config_path, 'w') as f:
-            json.dump(stylelint_config, f, indent=2)
-
-        try:
-            # Run Stylelint with JSON output
-            cmd = [
-                "npx", "stylelint",
-                "--formatter=json",
-                "--config", stylelint_config_path,
-                temp_file_path
-            ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
-            
-            stylelint_results = []
-            if result.stdout.strip():
-                try:
-                    # Stylelint outputs an array of results, one per file
-                    parsed_output = json.loads(result.stdout)
-                    if parsed_output and isinstance(parsed_output, list):
-                        # We only analyze one file, so take the first result's warnings
-                        if parsed_output[0] and 'warnings' in parsed_output[0]:
-                            stylelint_results = parsed_output[0]['warnings']
-                except json.JSONDecodeError:
-                    pass # Fallback to empty results if JSON parsing fails
-            
-            formatted_results = []
-            for issue in stylelint_results:
-                severity_map = {
-                    'warning': 'warning',
-                    'error': 'error'
-                }
-                formatted_results.append({
-                    "type": "linter",
-                    "tool": "stylelint",
-                    "severity": severity_map.get(issue.get("severity", "warning"), "warning"),
-                    "line": issue.get("line", 1),
-                    "column": issue.get("column", 0),
-                    "message": issue.get("text", ""),
-                    "rule_id": issue.get("rule", "")
-                })
-            
-            return {
-                "success": True,
-                "language": "html_css",
-                "linter_feedback": formatted_results,
-                "raw_output": result.stdout,
-                "errors": result.stderr if result.stderr else None,
-                "return_code": result.returncode
+        # Run Stylelint with JSON output
+        cmd = [
+            *stylelint_cmd,
+            "--formatter=json",
+            "--config", config_file(stylelint_config),
+            "--stdin-filename", f"snippet{suffix}"
+        ]
+        
+        result = yield ToolCall(cmd, timeout=30, input=code)
+        
+        stylelint_results = []
+        if result.stdout.strip():
+            try:
+                # Stylelint outputs an array of results, one per file
+                parsed_output = json.loads(result.stdout)
+                if parsed_output and isinstance(parsed_output, list):
+                    # We only analyze one file, so take the first result's warnings
+                    if parsed_output[0] and 'warnings' in parsed_output[0]:
+                        stylelint_results = parsed_output[0]['warnings']
+            except json.JSONDecodeError:
+                pass # Fallback to empty results if JSON parsing fails
+        
+        formatted_results = []
+        for issue in stylelint_results:
+            severity_map = {
+                'warning': 'warning',
+                'error': 'error'
             }
+            formatted_results.append({
+                "type": "linter",
+                "tool": "stylelint",
+                "severity": severity_map.get(issue.get("severity", "warning"), "warning"),
+                "line": issue.get("line", 1),
+                "column": issue.get("column", 0),
+                "message": issue.get("text", ""),
+                "rule_id": issue.get("rule", "")
+            })
+        
+        return {
+            "success": True,
+            "language": "html_css",
+            "linter_feedback": formatted_results,
+            "raw_output": result.stdout,
+            "errors": result.stderr if result.stderr else None,
+            "return_code": result.returncode
+        }
             
-        finally:
-            # Clean up temporary files
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-            if os.path.exists(stylelint_config_path):
-                os.unlink(stylelint_config_path)
-                
     except subprocess.TimeoutExpired:
         return {
             "success": False,
@@ -137,40 +143,30 @@ def validate_html_css_syntax(code: str) -> Dict[str, Any]:
     Basic HTML/CSS syntax validation using `html-validate` (for HTML) or `stylelint` (for CSS).
     This is a simplified approach. For full validation, dedicated parsers are needed.
     """
+    return drive(_validate_html_css_syntax(code))
+
+async def validate_html_css_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_html_css_syntax."""
+    return await drive_async(_validate_html_css_syntax(code))
+
+def _validate_html_css_syntax(code: str) -> ToolStep:
     try:
         # Heuristic to guess if it's primarily HTML or CSS
         is_css = re.search(r'{[^}]*}', code) and not re.search(r'<!DOCTYPE html>', code, re.IGNORECASE)
         
         if is_css:
-            # Use Stylelint for CSS syntax validation
-            temp_file_path = None
-            stylelint_config_path = None
-            try:
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.css', delete=False) as temp_file:
-                    temp_file.write(code)
-                    temp_file_path = temp_file.name
-                
-                stylelint_config = {"rules": {"no-empty-source": True, "block-no-empty": True}}
-                stylelint_config_path = os.path.join(os.path.dirname(temp_file_path), ".stylelintrc.json")
-                with open(stylelint_config_path, 'w') as f:
-                    json.dump(stylelint_config, f, indent=2)
-
-                cmd = ["npx", "stylelint", "--formatter=json", "--config", stylelint_config_path, temp_file_path]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                
-                parsed_output = json.loads(result.stdout)
-                if parsed_output and parsed_output[0] and parsed_output[0]['warnings']:
-                    first_warning = parsed_output[0]['warnings'][0]
-                    return {
-                        "valid": False,
-                        "error": f"CSS Syntax Error at line {first_warning.get('line', 1)}: {first_warning.get('text', 'Invalid CSS syntax')}"
-                    }
-                return {"valid": True, "error": None}
-            finally:
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                if stylelint_config_path and os.path.exists(stylelint_config_path):
-                    os.unlink(stylelint_config_path)
+            # Use Stylelint for CSS syntax validation, reading the code from stdin
+            cmd = [*node_tool_cmd("stylelint"), "--formatter=json", "--config", config_file(STYLELINT_SYNTAX_CONFIG), "--stdin-filename", "snippet.css"]
+            result = yield ToolCall(cmd, timeout=10, input=code)
+            
+            parsed_output = json.loads(result.stdout)
+            if parsed_output and parsed_output[0] and parsed_output[0]['warnings']:
+                first_warning = parsed_output[0]['warnings'][0]
+                return {
+                    "valid": False,
+                    "error": f"CSS Syntax Error at line {first_warning.get('line', 1)}: {first_warning.get('text', 'Invalid CSS syntax')}"
+                }
+            return {"valid": True, "error": None}
 
         else:
             # For HTML, a very basic check for root tags
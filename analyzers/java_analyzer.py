@@ -1,10 +1,19 @@
 import json
-import tempfile
 import subprocess
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import os
 import sys
 import re
+from config import LINTER_WORKER_CONFIG
+from utils.scratch import scratch_root
+from utils.tool_probe import require_tool, tool_info, tool_stamp
+from utils.tool_runner import ToolCall, WorkerCall, WorkspaceCall, ToolStep, drive, drive_async
+from utils.worker_pool import WorkerError
+
+# Long-lived JVM running Checkstyle and javac in-process (single-file source program, JDK 11+)
+CHECKSTYLE_SERVER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CheckstyleServer.java")
+
+_PUBLIC_TYPE = re.compile(r'^public\s+(?:(?:abstract|final|sealed|non-sealed|strictfp)\s+)*(?:class|interface|enum|record|@interface)\s+(\w+)', re.MULTILINE)
 
 def analyze_java_code(code: str) -> Dict[str, Any]:
     """
@@ -16,76 +25,113 @@ def analyze_java_code(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing analysis results
     """
-    try:
-        # Create temporary file for analysis
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.java', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+    return drive(_analyze_java_code(code))
+
+async def analyze_java_code_async(code: str) -> Dict[str, Any]:
+    """Async twin of analyze_java_code (runs Checkstyle via asyncio subprocess)."""
+    return await drive_async(_analyze_java_code(code))
+
+def check_java_code(code: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Validate Java syntax and run Checkstyle together.
+    
+    With the Checkstyle server both checks are answered by one request;
+    otherwise javac runs first and Checkstyle only if the code compiles.
+    
+    Args:
+        code: Java source code string
         
-        # Define paths for Checkstyle JAR and config file
-        # User needs to download checkstyle-X.Y-all.jar and a config file (e.g., google_checks.xml)
-        # and place them in a known location, or specify full paths.
-        # For simplicity, we assume they are in the same directory or accessible via PATH.
-        checkstyle_jar = os.getenv("CHECKSTYLE_JAR", "checkstyle-11.0.0-all.jar") # Example version
-        checkstyle_config = os.getenv("CHECKSTYLE_CONFIG", "google_checks.xml") # Example config
-
-        # Check if Checkstyle JAR and config exist
-        if not os.path.exists(checkstyle_jar):
+    Returns:
+        Tuple of (validate_java_syntax result, analyze_java_code result or None
+        if the syntax is invalid)
+    """
+    return drive(_check_java_code(code))
+
+async def check_java_code_async(code: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Async twin of check_java_code."""
+    return await drive_async(_check_java_code(code))
+
+def _check_java_code(code: str) -> ToolStep:
+    if _use_checkstyle_server():
+        try:
+            response = yield WorkerCall(_checkstyle_server_cmd(*_checkstyle_paths()), {"code": code, "checks": ["syntax", "style"]}, timeout=30)
+            syntax_check = _server_syntax_result(response["syntax"])
+            if not syntax_check["valid"]:
+                return syntax_check, None
+            return syntax_check, _server_style_result(response["style"]["messages"])
+        except Exception:
+            # A worker error, timeout or server crash may come from the Checkstyle half of the
+            # request, so it says nothing about the syntax: fall back to one-shot `javac` and
+            # `java -jar checkstyle` below
+            pass
+    
+    syntax_check = yield from _validate_java_syntax(code, use_server=False)
+    if not syntax_check["valid"]:
+        return syntax_check, None
+    return syntax_check, (yield from _analyze_java_code(code, use_server=False))
+
+def _analyze_java_code(code: str, use_server: bool = True) -> ToolStep:
+    try:
+        java = require_tool("java")
+        checkstyle_jar, checkstyle_config = _checkstyle_paths()
+
+        # Check if Checkstyle JAR and config exist (as found by the startup probe)
+        if not tool_info("checkstyle").available:
             return {
                 "success": False,
                 "language": "java",
                 "error": f"Checkstyle JAR not found at '{checkstyle_jar}'. Please download it (e.g., from Maven Central) and set CHECKSTYLE_JAR environment variable or place it in the working directory.",
                 "linter_feedback": []
             }
-        if not os.path.exists(checkstyle_config):
+        if not tool_info("checkstyle_config").available:
             return {
                 "success": False,
                 "language": "java",
                 "error": f"Checkstyle config file not found at '{checkstyle_config}'. Please download a config (e.g., google_checks.xml) and set CHECKSTYLE_CONFIG environment variable or place it in the working directory.",
                 "linter_feedback": []
             }
-
-        try:
+        
+        if use_server and LINTER_WORKER_CONFIG["checkstyle_mode"] == "server":
+            try:
+                response = yield WorkerCall(_checkstyle_server_cmd(checkstyle_jar, checkstyle_config), {"code": code, "checks": ["style"]}, timeout=30)
+                return _server_style_result(response["style"]["messages"])
+            except WorkerError:
+                pass # Fall back to a one-shot `java -jar checkstyle` below
+        
+        # Checkstyle only reads files
+        with (yield WorkspaceCall()) as workspace:
+            temp_file_path = os.path.join(workspace, _java_file_name(code))
+            with open(temp_file_path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            
             # Run Checkstyle with XML output
             cmd = [
-                "java", "-jar", checkstyle_jar,
+                java, "-jar", checkstyle_jar,
                 "-c", checkstyle_config,
                 "-f", "xml", # Output format XML
                 temp_file_path
             ]
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
+            result = yield ToolCall(cmd, timeout=30)
             
             # Parse Checkstyle XML output
             # Checkstyle outputs XML to stdout, even if there are errors.
             # We need to parse the XML to extract issues.
             import xml.etree.ElementTree as ET
             
-            formatted_results = []
+            messages = []
             if result.stdout.strip():
                 try:
                     root = ET.fromstring(result.stdout)
                     for file_elem in root.findall('file'):
                         if file_elem.get('name') == temp_file_path:
                             for error_elem in file_elem.findall('error'):
-                                severity_map = {
-                                    'error': 'error',
-                                    'warning': 'warning',
-                                    'info': 'info'
-                                }
-                                formatted_results.append({
-                                    "type": "linter",
-                                    "tool": "checkstyle",
-                                    "severity": severity_map.get(error_elem.get("severity", "warning"), "warning"),
+                                messages.append({
+                                    "severity": error_elem.get("severity", "warning"),
                                     "line": int(error_elem.get("line", 1)),
                                     "column": int(error_elem.get("column", 0)),
                                     "message": error_elem.get("message", ""),
-                                    "rule_id": error_elem.get("source", "").split('.')[-1] # Extract rule name
+                                    "source": error_elem.get("source", "")
                                 })
                 except ET.ParseError:
                     pass # Fallback to empty results if XML parsing fails
@@ -93,16 +139,11 @@ def analyze_java_code(code: str) -> Dict[str, Any]:
             return {
                 "success": True,
                 "language": "java",
-                "linter_feedback": formatted_results,
+                "linter_feedback": _format_checkstyle_messages(messages),
                 "raw_output": result.stdout,
                 "errors": result.stderr if result.stderr else None,
                 "return_code": result.returncode
             }
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
                 
     except subprocess.TimeoutExpired:
         return {
@@ -126,46 +167,112 @@ def analyze_java_code(code: str) -> Dict[str, Any]:
             "linter_feedback": []
         }
 
+def linter_fingerprint() -> Dict[str, Any]:
+    """Checkstyle rules and the installed JDK and Checkstyle that shape analyze_java_code's results, for the result cache key."""
+    return {name: tool_stamp(name) for name in ("java", "javac", "checkstyle", "checkstyle_config")}
+
+def _checkstyle_paths() -> Tuple[str, str]:
+    # Define paths for Checkstyle JAR and config file
+    # User needs to download checkstyle-X.Y-all.jar and a config file (e.g., google_checks.xml)
+    # and place them in a known location, or specify full paths.
+    # For simplicity, we assume they are in the same directory or accessible via PATH.
+    checkstyle_jar = os.getenv("CHECKSTYLE_JAR", "checkstyle-11.0.0-all.jar") # Example version
+    checkstyle_config = os.getenv("CHECKSTYLE_CONFIG", "google_checks.xml") # Example config
+    return checkstyle_jar, checkstyle_config
+
+def _java_file_name(code: str) -> str:
+    """File name javac accepts for the code: a public top-level type must be in <Name>.java."""
+    match = _PUBLIC_TYPE.search(code)
+    return f"{match.group(1) if match else 'Snippet'}.java"
+
+def _checkstyle_server_cmd(checkstyle_jar: str, checkstyle_config: str) -> List[str]:
+    return [require_tool("java"), "-cp", os.path.abspath(checkstyle_jar), CHECKSTYLE_SERVER_SOURCE, os.path.abspath(checkstyle_config), scratch_root()]
+
+def _use_checkstyle_server() -> bool:
+    return (LINTER_WORKER_CONFIG["checkstyle_mode"] == "server"
+            and tool_info("checkstyle").available and tool_info("checkstyle_config").available)
+
+def _server_syntax_result(syntax: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the server's syntax answer to the validate_java_syntax format."""
+    if syntax["valid"]:
+        return {"valid": True, "error": None}
+    return {
+        "valid": False,
+        "error": f"Syntax Error at line {syntax['line']}: {syntax['error']}"
+    }
+
+def _server_style_result(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert the server's Checkstyle audit events to the analyze_java_code format."""
+    formatted_results = _format_checkstyle_messages(messages)
+    return {
+        "success": True,
+        "language": "java",
+        "linter_feedback": formatted_results,
+        "raw_output": json.dumps(messages),
+        "errors": None,
+        "return_code": sum(1 for issue in formatted_results if issue["severity"] == "error")
+    }
+
+def _format_checkstyle_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform Checkstyle audit events to our linter feedback format."""
+    severity_map = {
+        'error': 'error',
+        'warning': 'warning',
+        'info': 'info'
+    }
+    return [{
+        "type": "linter",
+        "tool": "checkstyle",
+        "severity": severity_map.get(message.get("severity", "warning"), "warning"),
+        "line": message.get("line", 1),
+        "column": message.get("column", 0),
+        "message": message.get("message", ""),
+        "rule_id": message.get("source", "").split('.')[-1] # Extract rule name
+    } for message in messages]
+
 def validate_java_syntax(code: str) -> Dict[str, Any]:
     """
     Basic Java syntax validation by attempting to compile (without running).
     Requires a Java Development Kit (JDK) for `javac`.
     """
+    return drive(_validate_java_syntax(code))
+
+async def validate_java_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_java_syntax."""
+    return await drive_async(_validate_java_syntax(code))
+
+def _validate_java_syntax(code: str, use_server: bool = True) -> ToolStep:
     try:
-        # Create temporary file for compilation
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.java', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        if use_server and _use_checkstyle_server():
+            try:
+                response = yield WorkerCall(_checkstyle_server_cmd(*_checkstyle_paths()), {"code": code, "checks": ["syntax"]}, timeout=30)
+                return _server_syntax_result(response["syntax"])
+            except WorkerError:
+                pass # Fall back to a one-shot `javac` below
         
-        try:
-            # Attempt to compile the Java code
-            cmd = ["javac", "-Xlint:none", "-d", os.path.dirname(temp_file_path), temp_file_path]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+        javac = require_tool("javac")
+        
+        # javac only reads files; they and the class files are emptied with the workspace
+        with (yield WorkspaceCall()) as workspace:
+            temp_file_path = os.path.join(workspace, _java_file_name(code))
+            with open(temp_file_path, 'w', encoding='utf-8') as f:
+                f.write(code)
             
-            if result.returncode != 0:
-                # javac outputs errors to stderr
-                error_message = result.stderr.strip()
-                # Attempt to extract line number from javac error output
-                match = re.search(r'(\w+\.java):(\d+):', error_message)
-                line_num = int(match.group(2)) if match else 1
-                return {
-                    "valid": False,
-                    "error": f"Syntax Error at line {line_num}: {error_message.splitlines()[0]}"
-                }
-            return {"valid": True, "error": None}
-        finally:
-            # Clean up temporary files
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-            # Clean up .class files if compilation was successful
-            class_file = temp_file_path.replace('.java', '.class')
-            if os.path.exists(class_file):
-                os.unlink(class_file)
+            # Attempt to compile the Java code
+            cmd = [javac, "-Xlint:none", "-d", workspace, temp_file_path]
+            result = yield ToolCall(cmd, timeout=10)
+        
+        if result.returncode != 0:
+            # javac outputs errors to stderr
+            error_message = result.stderr.strip()
+            # Attempt to extract line number from javac error output
+            match = re.search(r'(\w+\.java):(\d+):', error_message)
+            line_num = int(match.group(2)) if match else 1
+            return {
+                "valid": False,
+                "error": f"Syntax Error at line {line_num}: {error_message.splitlines()[0]}"
+            }
+        return {"valid": True, "error": None}
     except FileNotFoundError:
         return {
             "valid": False,
@@ -1,9 +1,41 @@
 import json
-import tempfile
 import subprocess
 from typing import Dict, List, Any
 import os
+import re
 import sys
+from config import LINTER_WORKER_CONFIG
+from utils.config_store import config_file
+from utils.scratch import scratch_root
+from utils.tool_probe import node_tool_cmd, require_tool, tool_stamp
+from utils.tool_runner import ToolCall, WorkerCall, WorkspaceCall, ToolStep, drive, drive_async
+from utils.worker_pool import WorkerError
+
+# Long-lived Node worker keeping ESLint loaded (see analyzers/eslint_server.js)
+ESLINT_SERVER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eslint_server.js")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Shared compiler options of the one-shot TypeScript lint; each snippet's tsconfig extends them
+TSCONFIG = {
+    "compilerOptions": {
+        "target": "es2021",
+        "module": "commonjs",
+        "strict": True,
+        "esModuleInterop": True,
+        "skipLibCheck": True,
+        "forceConsistentCasingInFileNames": True,
+        "jsx": "react" # For .tsx files
+    }
+}
+
+def linter_fingerprint(is_typescript: bool = False) -> Dict[str, Any]:
+    """ESLint settings and installation that shape analyze_js_code's results, for the result cache key."""
+    return {
+        "eslint_config": _eslint_config(is_typescript),
+        "tsconfig": TSCONFIG if is_typescript else None,
+        "node": tool_stamp("node"),
+        "eslint": tool_stamp("eslint")
+    }
 
 def analyze_js_code(code: str, is_typescript: bool = False) -> Dict[str, Any]:
     """
@@ -12,141 +44,92 @@ def analyze_js_code(code: str, is_typescript: bool = False) -> Dict[str, Any]:
     Args:
         code: Source code string
         is_typescript: True if the code is TypeScript, False for JavaScript
-        
+    
     Returns:
         Dictionary containing analysis results
     """
+    return drive(_analyze_js_code(code, is_typescript))
+
+async def analyze_js_code_async(code: str, is_typescript: bool = False) -> Dict[str, Any]:
+    """Async twin of analyze_js_code (runs ESLint via asyncio subprocess)."""
+    return await drive_async(_analyze_js_code(code, is_typescript))
+
+def _analyze_js_code(code: str, is_typescript: bool) -> ToolStep:
     try:
-        # Create temporary file for analysis
-        suffix = '.ts' if is_typescript else '.js'
-        with tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        eslint_cmd = node_tool_cmd("eslint")
+        eslint_config = _eslint_config(is_typescript)
         
-        # Create a temporary .eslintrc.json for consistent configuration
-        eslint_config = {
-            "env": {
-                "browser": True,
-                "node": True,
-                "es2021": True
-            },
-            "extends": [
-                "eslint:recommended"
-            ],
-            "parserOptions": {
-                "ecmaVersion": 2021,
-                "sourceType": "module"
-            },
-            "rules": {
-                "no-unused-vars": "warn",
-                "no-console": "off",
-                "no-undef": "warn",
-                "semi": ["warn", "always"],
-                "quotes": ["warn", "single"],
-                "indent": ["warn", 2],
-                "no-trailing-spaces": "warn",
-                "eol-last": "warn",
-                "no-multiple-empty-lines": ["warn", {"max": 2}],
-                "brace-style": ["warn", "1tbs"],
-                "comma-dangle": ["warn", "never"],
-                "no-var": "warn",
-                "prefer-const": "warn",
-                "arrow-spacing": "warn"
-            }
-        }
-
+        if LINTER_WORKER_CONFIG["eslint_mode"] == "server":
+            try:
+                response = yield WorkerCall(
+                    _eslint_server_cmd(),
+                    {"code": code, "config": eslint_config, "typescript": is_typescript},
+                    timeout=30,
+                    cwd=PROJECT_ROOT
+                )
+                return {
+                    "success": True,
+                    "language": "typescript" if is_typescript else "javascript",
+                    "linter_feedback": _format_eslint_messages(response["messages"]),
+                    "raw_output": json.dumps(response["messages"]),
+                    "errors": None,
+                    "return_code": 1 if response["error_count"] else 0
+                }
+            except WorkerError:
+                pass # Fall back to a one-shot `eslint` below
+        
+        eslint_config_path = config_file(eslint_config)
         if is_typescript:
-            eslint_config["parser"] = "@typescript-eslint/parser"
-            eslint_config["plugins"] = ["@typescript-eslint"]
-            eslint_config["extends"].append("plugin:@typescript-eslint/recommended")
-            eslint_config["rules"]["@typescript-eslint/no-unused-vars"] = ["warn", { "argsIgnorePattern": "^_" }]
-            eslint_config["rules"]["@typescript-eslint/no-explicit-any"] = "warn"
-            eslint_config["parserOptions"]["project"] = "./tsconfig.json" # ESLint needs tsconfig for type-aware linting
-
-            # Create a dummy tsconfig.json if it doesn't exist for ESLint
-            tsconfig_path = os.path.join(os.path.dirname(temp_file_path), "tsconfig.json")
-            if not os.path.exists(tsconfig_path):
+            # Type-aware linting needs the file on disk, in a tsconfig project of its own
+            with (yield WorkspaceCall()) as project_dir:
+                snippet_path = os.path.join(project_dir, "snippet.ts")
+                with open(snippet_path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+                tsconfig_path = os.path.join(project_dir, "tsconfig.json")
                 with open(tsconfig_path, 'w') as f:
-                    json.dump({
-                        "compilerOptions": {
-                            "target": "es2021",
-                            "module": "commonjs",
-                            "strict": True,
-                            "esModuleInterop": True,
-                            "skipLibCheck": True,
-                            "forceConsistentCasingInFileNames": True,
-                            "jsx": "react" # For .tsx files
-                        },
-                        "include": [temp_file_path]
-                    }, f, indent=2)
-
-        eslint_config_path = os.path.join(os.path.dirname(temp_file_path), ".eslintrc.json")
-        with open(eslint_config_path, 'w') as f:
-            json.dump(eslint_config, f, indent=2)
-
-        try:
-            # Run ESLint with JSON output
+                    json.dump({"extends": config_file(TSCONFIG), "include": [snippet_path]}, f)
+                
+                cmd = [
+                    *eslint_cmd,
+                    "--format=json",
+                    "--no-eslintrc",
+                    "--config", eslint_config_path,
+                    "--parser-options", f"project:{tsconfig_path}",
+                    snippet_path
+                ]
+                result = yield ToolCall(cmd, timeout=30)
+        else:
+            # Run ESLint with JSON output, reading the code from stdin
             cmd = [
-                "npx", "eslint",
+                *eslint_cmd,
                 "--format=json",
                 "--no-eslintrc", # Prevent ESLint from looking for other config files
                 "--config", eslint_config_path,
-                temp_file_path
+                "--stdin", "--stdin-filename", "snippet.js"
             ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
-            
-            eslint_results = []
-            if result.stdout.strip():
-                try:
-                    # ESLint outputs an array of results, one per file
-                    parsed_output = json.loads(result.stdout)
-                    if parsed_output and isinstance(parsed_output, list):
-                        # We only analyze one file, so take the first result's messages
-                        if parsed_output[0] and 'messages' in parsed_output[0]:
-                            eslint_results = parsed_output[0]['messages']
-                except json.JSONDecodeError:
-                    pass # Fallback to empty results if JSON parsing fails
-            
-            formatted_results = []
-            for issue in eslint_results:
-                severity_map = {
-                    0: 'off', 1: 'warning', 2: 'error' # ESLint severity levels
-                }
-                formatted_results.append({
-                    "type": "linter",
-                    "tool": "eslint",
-                    "severity": severity_map.get(issue.get("severity", 1), "warning"),
-                    "line": issue.get("line", 1),
-                    "column": issue.get("column", 0),
-                    "message": issue.get("message", ""),
-                    "rule_id": issue.get("ruleId", "")
-                })
-            
-            return {
-                "success": True,
-                "language": "typescript" if is_typescript else "javascript",
-                "linter_feedback": formatted_results,
-                "raw_output": result.stdout,
-                "errors": result.stderr if result.stderr else None,
-                "return_code": result.returncode
-            }
-            
-        finally:
-            # Clean up temporary files
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-            if os.path.exists(eslint_config_path):
-                os.unlink(eslint_config_path)
-            tsconfig_path = os.path.join(os.path.dirname(temp_file_path), "tsconfig.json")
-            if is_typescript and os.path.exists(tsconfig_path):
-                os.unlink(tsconfig_path)
-                
+            result = yield ToolCall(cmd, timeout=30, input=code)
+        
+        eslint_results = []
+        if result.stdout.strip():
+            try:
+                # ESLint outputs an array of results, one per file
+                parsed_output = json.loads(result.stdout)
+                if parsed_output and isinstance(parsed_output, list):
+                    # We only analyze one file, so take the first result's messages
+                    if parsed_output[0] and 'messages' in parsed_output[0]:
+                        eslint_results = parsed_output[0]['messages']
+            except json.JSONDecodeError:
+                pass # Fallback to empty results if JSON parsing fails
+        
+        return {
+            "success": True,
+            "language": "typescript" if is_typescript else "javascript",
+            "linter_feedback": _format_eslint_messages(eslint_results),
+            "raw_output": result.stdout,
+            "errors": result.stderr if result.stderr else None,
+            "return_code": result.returncode
+        }
+    
     except subprocess.TimeoutExpired:
         return {
             "success": False,
@@ -169,20 +152,87 @@ def analyze_js_code(code: str, is_typescript: bool = False) -> Dict[str, Any]:
             "linter_feedback": []
         }
 
+def _eslint_config(is_typescript: bool) -> Dict[str, Any]:
+    """Build the eslintrc-style configuration used for every lint."""
+    eslint_config = {
+        "env": {
+            "browser": True,
+            "node": True,
+            "es2021": True
+        },
+        "extends": [
+            "eslint:recommended"
+        ],
+        "parserOptions": {
+            "ecmaVersion": 2021,
+            "sourceType": "module"
+        },
+        "rules": {
+            "no-unused-vars": "warn",
+            "no-console": "off",
+            "no-undef": "warn",
+            "semi": ["warn", "always"],
+            "quotes": ["warn", "single"],
+            "indent": ["warn", 2],
+            "no-trailing-spaces": "warn",
+            "eol-last": "warn",
+            "no-multiple-empty-lines": ["warn", {"max": 2}],
+            "brace-style": ["warn", "1tbs"],
+            "comma-dangle": ["warn", "never"],
+            "no-var": "warn",
+            "prefer-const": "warn",
+            "arrow-spacing": "warn"
+        }
+    }
+    
+    if is_typescript:
+        eslint_config["parser"] = "@typescript-eslint/parser"
+        eslint_config["plugins"] = ["@typescript-eslint"]
+        eslint_config["extends"].append("plugin:@typescript-eslint/recommended")
+        eslint_config["rules"]["@typescript-eslint/no-unused-vars"] = ["warn", { "argsIgnorePattern": "^_" }]
+        eslint_config["rules"]["@typescript-eslint/no-explicit-any"] = "warn"
+        eslint_config["parserOptions"]["project"] = "./tsconfig.json" # ESLint needs tsconfig for type-aware linting
+    return eslint_config
+
+def _eslint_server_cmd() -> List[str]:
+    return [require_tool("node"), ESLINT_SERVER_SOURCE, scratch_root()]
+
+def _format_eslint_messages(eslint_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform ESLint messages to our linter feedback format."""
+    formatted_results = []
+    for issue in eslint_results:
+        severity_map = {
+            0: 'off', 1: 'warning', 2: 'error' # ESLint severity levels
+        }
+        formatted_results.append({
+            "type": "linter",
+            "tool": "eslint",
+            "severity": severity_map.get(issue.get("severity", 1), "warning"),
+            "line": issue.get("line", 1),
+            "column": issue.get("column", 0),
+            "message": issue.get("message", ""),
+            "rule_id": issue.get("ruleId", "")
+        })
+    return formatted_results
+
 def validate_js_syntax(code: str) -> Dict[str, Any]:
     """
     Basic JavaScript/TypeScript syntax validation using Node.js.
     """
+    return drive(_validate_js_syntax(code))
+
+async def validate_js_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_js_syntax."""
+    return await drive_async(_validate_js_syntax(code))
+
+def _validate_js_syntax(code: str) -> ToolStep:
     try:
+        node = require_tool("node")
+        
         # Use Node.js to attempt parsing the code
         # This is a more robust syntax check than simple regex/brace counting
-        cmd = ["node", "-c", "-e", code] # -c checks syntax, -e executes string
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        cmd = [node, "-c", "-e", code] # -c checks syntax, -e executes string
+        result = yield ToolCall(cmd, timeout=10)
         
         if result.returncode != 0:
             # Node.js will output syntax errors to stderr
@@ -0,0 +1,183 @@
+import io
+import re
+import tokenize
+from typing import Any, Dict, List, Optional, Tuple
+from config import AI_PROMPT_CONFIG
+
+# Languages with // and /* */ comments and "..." / '...' / `...` literals
+C_STYLE_LANGUAGES = {"javascript", "typescript", "java", "c_cpp", "go"}
+
+_LICENSE_PATTERN = re.compile(r'licen[cs]e|copyright|\(c\)|spdx-license-identifier|all rights reserved', re.IGNORECASE)
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# (start offset, end offset, replacement) in the original text
+Edit = Tuple[int, int, str]
+
+def compact_code(code: str, language: str, comments: Optional[str] = None,
+                 max_literal_chars: Optional[int] = None) -> str:
+    """
+    Shrink code for the AI prompt without moving any line.
+    
+    Comments are removed (or, with comments="license", only a leading license
+    header), string literals longer than max_literal_chars are collapsed to a
+    short placeholder and trailing whitespace is trimmed. Removed text keeps
+    its newlines, so line N of the result is line N of the input and the
+    model's line numbers need no mapping.
+    
+    Args:
+        code: Source code string
+        language: Programming language
+        comments: "strip", "license" or "keep" (defaults to AI_PROMPT_CONFIG)
+        max_literal_chars: Longest literal kept verbatim (defaults to AI_PROMPT_CONFIG)
+    
+    Returns:
+        The compacted code, with the same number of lines
+    """
+    comments = comments or AI_PROMPT_CONFIG["comments"]
+    max_literal_chars = max_literal_chars or AI_PROMPT_CONFIG["max_literal_chars"]
+    
+    if language == "python":
+        edits = _python_edits(code, comments, max_literal_chars)
+    elif language in C_STYLE_LANGUAGES:
+        edits = _c_style_edits(code, comments, max_literal_chars)
+    elif language == "html_css" and comments == "strip":
+        edits = [(m.start(), m.end(), _blank(m.group())) for pattern in (_HTML_COMMENT, _CSS_COMMENT) for m in pattern.finditer(code)]
+        edits = _drop_overlapping(sorted(edits))
+    else:
+        edits = []
+    
+    compacted = _apply_edits(code, edits)
+    return "\n".join(line.rstrip() for line in compacted.split("\n"))
+
+def format_linter_findings(findings: List[Dict[str, Any]], limit: Optional[int] = None) -> str:
+    """
+    Render linter feedback as a compact bullet list for the AI prompt.
+    
+    Args:
+        findings: Linter feedback items (line, message, tool, rule_id/symbol)
+        limit: Maximum findings listed (defaults to AI_PROMPT_CONFIG)
+    
+    Returns:
+        One "- line N: message (tool rule)" line per finding, or "" if there are none
+    """
+    limit = limit if limit is not None else AI_PROMPT_CONFIG["max_linter_findings"]
+    ordered = sorted(findings, key=lambda f: f.get("line") if isinstance(f.get("line"), int) else 0)
+    
+    lines = []
+    for finding in ordered[:limit]:
+        line = finding.get("line")
+        location = f"line {line}" if isinstance(line, int) and line > 0 else "file"
+        rule = finding.get("symbol") or finding.get("rule_id") or finding.get("message_id") or ""
+        source = " ".join(part for part in (finding.get("tool", ""), rule) if part)
+        message = re.sub(r'\s+', ' ', str(finding.get("message", ""))).strip()
+        lines.append(f"- {location}: {message}" + (f" ({source})" if source else ""))
+    if len(ordered) > limit:
+        lines.append(f"- ... and {len(ordered) - limit} more")
+    return "\n".join(lines)
+
+def _blank(text: str) -> str:
+    """Replacement for removed text: just its newlines."""
+    return "\n" * text.count("\n")
+
+def _literal_placeholder(literal: str, prefix: str, quote: str) -> str:
+    """A short literal with the same quotes, prefix and number of newlines."""
+    return f"{prefix}{quote}...({len(literal)} chars){_blank(literal)}{quote}"
+
+def _python_edits(code: str, comments: str, max_literal_chars: int) -> List[Edit]:
+    # Split the way tokenize's readline does: str.splitlines() also breaks at
+    # \f, \x1c-\x1e, \x85 and \u2028, which would shift every later offset
+    line_offsets = [0]
+    for line in io.StringIO(code).readlines():
+        line_offsets.append(line_offsets[-1] + len(line))
+    
+    def offset(position: Tuple[int, int]) -> int:
+        return line_offsets[position[0] - 1] + position[1]
+    
+    edits, header = [], []
+    in_header = True
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.COMMENT:
+                edit = (offset(token.start), offset(token.end), "")
+                if in_header:
+                    header.append(edit)
+                elif comments == "strip":
+                    edits.append(edit)
+            elif token.type == tokenize.STRING and len(token.string) > max_literal_chars:
+                in_header = False
+                prefix = re.match(r'[A-Za-z]*', token.string).group()
+                body = token.string[len(prefix):]
+                quote = body[:3] if body[:3] in ('"""', "'''") else body[0]
+                edits.append((offset(token.start), offset(token.end), _literal_placeholder(token.string, prefix, quote)))
+            elif token.type not in (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING):
+                in_header = False
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return [] # Leave code the tokenizer can't read as it is
+    
+    header_text = "".join(code[start:end] for start, end, _ in header)
+    if comments == "strip" or (comments == "license" and _LICENSE_PATTERN.search(header_text)):
+        edits.extend(header)
+    return sorted(edits)
+
+def _c_style_edits(code: str, comments: str, max_literal_chars: int) -> List[Edit]:
+    """Scan for comments and string literals, skipping each other's delimiters."""
+    edits, header = [], []
+    in_header = True
+    i, length = 0, len(code)
+    while i < length:
+        char = code[i]
+        if code.startswith("//", i) or code.startswith("/*", i):
+            if code[i + 1] == "/":
+                end = code.find("\n", i)
+                end = length if end == -1 else end
+            else:
+                end = code.find("*/", i + 2)
+                end = length if end == -1 else end + 2
+            edit = (i, end, _blank(code[i:end]))
+            if in_header:
+                header.append(edit)
+            elif comments == "strip":
+                edits.append(edit)
+            i = end
+            continue
+        if char in "\"'`":
+            end = i + 1
+            while end < length and code[end] != char:
+                if code[end] == "\\":
+                    end += 1
+                elif code[end] == "\n" and char != "`":
+                    break # Unterminated literal; stop at the end of the line
+                end += 1
+            end = min(end + 1, length)
+            if end - i > max_literal_chars:
+                edits.append((i, end, _literal_placeholder(code[i:end], "", char)))
+            in_header = False
+            i = end
+            continue
+        if not char.isspace():
+            in_header = False
+        i += 1
+    
+    header_text = "".join(code[start:end] for start, end, _ in header)
+    if comments == "strip" or (comments == "license" and _LICENSE_PATTERN.search(header_text)):
+        edits.extend(header)
+    return sorted(edits)
+
+def _drop_overlapping(edits: List[Edit]) -> List[Edit]:
+    kept = []
+    for edit in edits:
+        if not kept or edit[0] >= kept[-1][1]:
+            kept.append(edit)
+    return kept
+
+def _apply_edits(code: str, edits: List[Edit]) -> str:
+    if not edits:
+        return code
+    parts, position = [], 0
+    for start, end, replacement in edits:
+        parts.append(code[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(code[position:])
+    return "".join(parts)
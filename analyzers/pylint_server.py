@@ -0,0 +1,53 @@
+"""
+Long-lived Pylint worker: python -m analyzers.pylint_server
+
+Runs Pylint through its programmatic API for each request so the interpreter,
+pylint/astroid imports and astroid's inference cache for the standard library
+and third-party modules stay warm between snippets.
+
+Request:  {"id": 1, "code": "...", "args": ["--disable=...", ...]}
+Response: {"id": 1, "messages": [<pylint JSON message>, ...], "return_code": 4}
+"""
+import os
+import tempfile
+from typing import Dict, Any
+import astroid
+from pylint.lint import Run
+from pylint.reporters import CollectingReporter
+from pylint.reporters.json_reporter import JSONReporter
+from utils.scratch import scratch_root
+from utils.worker_pool import serve
+
+# One scratch file per worker, rewritten for every request (stdin is the request pipe, so Pylint can't read it)
+_scratch_dir = tempfile.mkdtemp(prefix="pylint-server-", dir=scratch_root())
+_snippet_path = os.path.join(_scratch_dir, "snippet.py")
+
+def _forget_snippet() -> None:
+    """Drop the snippet module from astroid's cache; everything it imported stays cached."""
+    cache = astroid.MANAGER.astroid_cache
+    for modname in [name for name, module in cache.items() if module.file == _snippet_path]:
+        del cache[modname]
+
+def lint(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Lint one snippet and return Pylint's messages in its JSON output format."""
+    with open(_snippet_path, "w", encoding="utf-8") as f:
+        f.write(request["code"])
+
+    # --output-format would replace our reporter, so it is dropped here
+    args = [arg for arg in request.get("args", []) if not arg.startswith("--output-format")]
+    reporter = CollectingReporter()
+    try:
+        run = Run([*args, _snippet_path], reporter=reporter, exit=False)
+    finally:
+        _forget_snippet()
+
+    messages = [JSONReporter.serialize(message) for message in reporter.messages]
+    return {"messages": messages, "return_code": run.linter.msg_status}
+
+if __name__ == "__main__":
+    try:
+        serve(lint)
+    finally:
+        if os.path.exists(_snippet_path):
+            os.unlink(_snippet_path)
+        os.rmdir(_scratch_dir)
@@ -1,9 +1,27 @@
 import json
-import tempfile
 import subprocess
 from typing import Dict, List, Any
 import os
 import sys
+from config import LINTER_WORKER_CONFIG
+from utils.python_ast import parse_python
+from utils.tool_probe import require_tool, tool_stamp
+from utils.tool_runner import ToolCall, WorkerCall, ToolStep, drive, drive_async
+from utils.worker_pool import WorkerError
+
+PYLINT_ARGS = [
+    '--output-format=json',
+    '--disable=C0114,C0115,C0116,R0903,C0103',  # Disable common warnings
+    '--score=no'
+]
+
+# Long-lived worker running Pylint in-process (see analyzers/pylint_server.py)
+PYLINT_SERVER_CMD = [sys.executable, '-m', 'analyzers.pylint_server']
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def linter_fingerprint() -> Dict[str, Any]:
+    """Pylint settings and installation that shape analyze_python_code's results, for the result cache key."""
+    return {"args": PYLINT_ARGS, "pylint": tool_stamp("pylint")}
 
 def analyze_python_code(code: str) -> Dict[str, Any]:
     """
@@ -15,74 +33,52 @@ def analyze_python_code(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing analysis results
     """
+    return drive(_analyze_python_code(code))
+
+async def analyze_python_code_async(code: str) -> Dict[str, Any]:
+    """Async twin of analyze_python_code (runs Pylint via asyncio subprocess)."""
+    return await drive_async(_analyze_python_code(code))
+
+def _analyze_python_code(code: str) -> ToolStep:
     try:
-        # Create temporary file for analysis
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
+        require_tool("pylint")
         
-        try:
-            # Run Pylint with JSON output
-            cmd = [
-                sys.executable, '-m', 'pylint',
-                '--output-format=json',
-                '--disable=C0114,C0115,C0116,R0903,C0103',  # Disable common warnings
-                '--score=no',
-                temp_file_path
-            ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30
-            )
-            
-            # Parse Pylint JSON output
-            pylint_results = []
-            if result.stdout.strip():
-                try:
-                    pylint_results = json.loads(result.stdout)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract from stderr
-                    pass
-            
-            # Transform Pylint results to our format
-            formatted_results = []
-            for issue in pylint_results:
-                severity_map = {
-                    'error': 'error',
-                    'warning': 'warning', 
-                    'refactor': 'refactor',
-                    'convention': 'convention',
-                    'info': 'info'
+        if LINTER_WORKER_CONFIG["pylint_mode"] == "server":
+            try:
+                response = yield WorkerCall(PYLINT_SERVER_CMD, {"code": code, "args": PYLINT_ARGS}, timeout=30, cwd=PROJECT_ROOT)
+                return {
+                    "success": True,
+                    "language": "python",
+                    "linter_feedback": _format_pylint_results(response["messages"]),
+                    "raw_output": json.dumps(response["messages"]),
+                    "errors": None,
+                    "return_code": response["return_code"]
                 }
-                
-                formatted_results.append({
-                    "type": "linter",
-                    "tool": "pylint",
-                    "severity": severity_map.get(issue.get("type", "warning"), "warning"),
-                    "line": issue.get("line", 1),
-                    "column": issue.get("column", 0),
-                    "message": issue.get("message", ""),
-                    "symbol": issue.get("symbol", ""),
-                    "message_id": issue.get("message-id", ""),
-                    "category": issue.get("category", "")
-                })
-            
-            return {
-                "success": True,
-                "language": "python",
-                "linter_feedback": formatted_results,
-                "raw_output": result.stdout,
-                "errors": result.stderr if result.stderr else None,
-                "return_code": result.returncode
-            }
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            except WorkerError:
+                pass # Fall back to a one-shot Pylint process below
+        
+        # Run Pylint with JSON output, reading the code from stdin
+        cmd = [sys.executable, '-m', 'pylint', *PYLINT_ARGS, '--from-stdin', 'snippet.py']
+        
+        result = yield ToolCall(cmd, timeout=30, input=code)
+        
+        # Parse Pylint JSON output
+        pylint_results = []
+        if result.stdout.strip():
+            try:
+                pylint_results = json.loads(result.stdout)
+            except json.JSONDecodeError:
+                # If JSON parsing fails, try to extract from stderr
+                pass
+        
+        return {
+            "success": True,
+            "language": "python",
+            "linter_feedback": _format_pylint_results(pylint_results),
+            "raw_output": result.stdout,
+            "errors": result.stderr if result.stderr else None,
+            "return_code": result.returncode
+        }
                 
     except subprocess.TimeoutExpired:
         return {
@@ -106,10 +102,39 @@ def analyze_python_code(code: str) -> Dict[str, Any]:
             "linter_feedback": []
         }
 
+def _format_pylint_results(pylint_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform Pylint JSON messages to our linter feedback format."""
+    formatted_results = []
+    for issue in pylint_results:
+        severity_map = {
+            'error': 'error',
+            'warning': 'warning', 
+            'refactor': 'refactor',
+            'convention': 'convention',
+            'info': 'info'
+        }
+        
+        formatted_results.append({
+            "type": "linter",
+            "tool": "pylint",
+            "severity": severity_map.get(issue.get("type", "warning"), "warning"),
+            "line": issue.get("line", 1),
+            "column": issue.get("column", 0),
+            "message": issue.get("message", ""),
+            "symbol": issue.get("symbol", ""),
+            "message_id": issue.get("message-id", ""),
+            "category": issue.get("category", "")
+        })
+    return formatted_results
+
 def validate_python_syntax(code: str) -> Dict[str, Any]:
     """
     Validate Python syntax without running Pylint.
     
+    The code is parsed through utils.python_ast.parse_python, whose tree the
+    metrics reuse, and the tree is then compiled so errors only the compiler
+    reports (e.g. 'return' outside function) are still caught.
+    
     Args:
         code: Python source code string
         
@@ -117,7 +142,10 @@ def validate_python_syntax(code: str) -> Dict[str, Any]:
         Dictionary with syntax validation results
     """
     try:
-        compile(code, '<string>', 'exec')
+        tree, error = parse_python(code)
+        if error is not None:
+            raise error
+        compile(tree, '<string>', 'exec')
         return {"valid": True, "error": None}
     except SyntaxError as e:
         return {
@@ -129,3 +157,7 @@ def validate_python_syntax(code: str) -> Dict[str, Any]:
             "valid": False,
             "error": f"Compilation error: {str(e)}"
         }
+
+async def validate_python_syntax_async(code: str) -> Dict[str, Any]:
+    """Async twin of validate_python_syntax (compiling in-process needs no subprocess)."""
+    return validate_python_syntax(code)
@@ -511,14 +511,27 @@ def main():
                 lang_to_analyze = selected_language_key if selected_language_key else None
                 filename = uploaded_file.name if uploaded_file else None
                 
-                status_text.text("🛠️ Running linter analysis...")
+                status_text.text("🛠️ Running linter analysis and 🤖 getting AI suggestions...")
                 progress_bar.progress(50)
                 
-                results = analyzer.analyze_code(st.session_state.code_input, lang_to_analyze, filename)
-                
-                status_text.text("🤖 Getting AI suggestions...")
-                progress_bar.progress(80)
+                # Show AI suggestions as they stream in; the full report replaces them below
+                live_placeholder = st.empty()
+                live_container = live_placeholder.container()
+                live_count = 0
+                results = None
+                for event, payload in analyzer.analyze_code_stream(st.session_state.code_input, lang_to_analyze, filename):
+                    if event == "result":
+                        results = payload
+                    elif payload.get("type") != "error":
+                        if live_count == 0:
+                            live_container.markdown('<div class="section-header">🤖 AI Suggestions (arriving live)</div>', unsafe_allow_html=True)
+                            progress_bar.progress(80)
+                        live_count += 1
+                        status_text.text(f"🤖 Receiving AI suggestions... ({live_count} so far)")
+                        with live_container:
+                            display_feedback_item(payload, "ai")
                 
+                live_placeholder.empty()
                 progress_bar.progress(100)
                 status_text.text("✅ Analysis complete!")
             
@@ -0,0 +1,101 @@
+"""
+Time the code metrics on 10k-line inputs.
+
+    python -m benchmarks.bench_code_metrics [--lines 10000] [--runs 5]
+
+Compares analyze_code_metrics with the previous implementation, kept here
+as separate_passes: analyze_code_characteristics, detect_indentation_style
+and detect_code_complexity each splitting the code and running re.search
+per line. Checks that both give the same output.
+"""
+import argparse
+import re
+import statistics
+import time
+from typing import Any, Dict, Tuple
+from config import DEFAULT_CODE_EXAMPLES
+from utils.language_detector import analyze_code_metrics
+
+FUNCTION = r'(def\s+\w+|function\s+\w+|func\s+\w+\(|public\s+\w+\s+\w+\()'
+CLASS = r'(class\s+\w+|public\s+class\s+\w+|interface\s+\w+)'
+
+def make_input(language: str, lines: int) -> str:
+    sample = DEFAULT_CODE_EXAMPLES[language].split('\n')
+    return '\n'.join((sample * (lines // len(sample) + 1))[:lines])
+
+def separate_passes(code: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    indentation = code.split('\n') # detect_indentation_style's own pass
+    spaces = sum(1 for line in indentation if line.startswith('    ') or line.startswith('  '))
+    tabs = sum(1 for line in indentation if line.startswith('\t'))
+    style = "mixed" if spaces and tabs else "spaces" if spaces else "tabs" if tabs else "none"
+    
+    lines = code.split('\n')
+    characteristics = {
+        "total_lines": len(lines),
+        "non_empty_lines": len([line for line in lines if line.strip()]),
+        "comment_lines": 0,
+        "has_functions": False,
+        "has_classes": False,
+        "has_imports": False,
+        "indentation_style": style,
+        "average_line_length": 0,
+        "max_line_length": 0
+    }
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('#') or stripped.startswith('//') or stripped.startswith('/*'):
+            characteristics["comment_lines"] += 1
+        if re.search(FUNCTION, line):
+            characteristics["has_functions"] = True
+        if re.search(CLASS, line):
+            characteristics["has_classes"] = True
+        if re.search(r'(import\s+|from\s+\w+\s+import|require\s*\()', line):
+            characteristics["has_imports"] = True
+        characteristics["max_line_length"] = max(characteristics["max_line_length"], len(line))
+    if characteristics["non_empty_lines"] > 0:
+        total_length = sum(len(line) for line in lines if line.strip())
+        characteristics["average_line_length"] = total_length / characteristics["non_empty_lines"]
+    
+    lines = code.split('\n')
+    complexity = {"cyclomatic_complexity": 1, "nesting_depth": 0, "function_count": 0, "class_count": 0,
+                  "conditional_statements": 0, "loop_statements": 0}
+    for line in lines:
+        if line.strip() and re.search(r'(if|for|while|try|with|def|class|func|public class|private class|interface|enum)\s*[:({]', line):
+            complexity["nesting_depth"] = max(complexity["nesting_depth"], (len(line) - len(line.lstrip())) // 4)
+        if re.search(FUNCTION, line):
+            complexity["function_count"] += 1
+        if re.search(CLASS, line):
+            complexity["class_count"] += 1
+        if re.search(r'(if\s+|elif\s+|else\s*:|switch\s*\(|case\s+|default\s*:)', line):
+            complexity["conditional_statements"] += 1
+            complexity["cyclomatic_complexity"] += 1
+        if re.search(r'(for\s+|while\s+|do\s+while)', line):
+            complexity["loop_statements"] += 1
+            complexity["cyclomatic_complexity"] += 1
+    return characteristics, complexity
+
+def median_ms(func, code: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(code)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--languages", nargs="*", default=list(DEFAULT_CODE_EXAMPLES))
+    args = parser.parse_args()
+    
+    print(f"{'input':<24} {'separate (ms)':>14} {'fused (ms)':>11} {'speedup':>8}")
+    for language in args.languages:
+        code = make_input(language, args.lines)
+        assert separate_passes(code) == analyze_code_metrics(code)
+        before = median_ms(separate_passes, code, args.runs)
+        after = median_ms(analyze_code_metrics, code, args.runs)
+        print(f"{f'{language} {args.lines} lines':<24} {before:>14.1f} {after:>11.1f} {before / after:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
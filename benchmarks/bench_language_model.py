@@ -0,0 +1,127 @@
+"""
+Compare the naive Bayes language classifier with the pattern detector.
+
+    python -m benchmarks.bench_language_model CORPUS_DIR [CORPUS_DIR ...] [--files-per-language 300]
+
+Source files under the given directories are labeled by extension (as in
+FILE_EXTENSIONS) and split 80/20. A model is trained on the first part; the
+test files, whole and as random 5-200 line snippets, are then classified by
+both detectors. Reports accuracy per language, throughput, and the expected
+calibration error of the classifier's probabilities and of the pattern
+detector's get_language_confidence scores.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from config import CLI_CONFIG, FILE_EXTENSIONS
+from utils.language_detector import LanguageDetector
+from utils.language_model import train
+
+def load_corpus(roots: List[str], per_language: int, seed: int) -> Dict[str, List[str]]:
+    paths: Dict[str, List[str]] = {}
+    skip_dirs = set(CLI_CONFIG["skip_dirs"]) - {"node_modules"}
+    for root in roots:
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if d not in skip_dirs and not d.startswith('.'))
+            for name in sorted(files):
+                language = FILE_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+                if language:
+                    paths.setdefault(language, []).append(os.path.join(directory, name))
+    
+    rng = random.Random(seed)
+    corpus = {}
+    for language, files in sorted(paths.items()):
+        rng.shuffle(files)
+        texts = []
+        for path in files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            if text.strip():
+                texts.append(text)
+            if len(texts) == per_language:
+                break
+        corpus[language] = texts
+    return corpus
+
+def snippets(text: str, rng: random.Random, count: int = 3) -> List[str]:
+    lines = text.splitlines(keepends=True)
+    cut = []
+    for _ in range(count):
+        length = rng.randint(5, 200)
+        start = rng.randrange(max(1, len(lines) - length + 1))
+        cut.append("".join(lines[start:start + length]))
+    return [text] + [snippet for snippet in cut if snippet.strip()]
+
+def calibration_error(confidences: np.ndarray, correct: np.ndarray, bins: int = 10) -> float:
+    """Expected calibration error: |accuracy - confidence| averaged over confidence bins."""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    error = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidences > low) & (confidences <= high)
+        if in_bin.any():
+            error += in_bin.mean() * abs(correct[in_bin].mean() - confidences[in_bin].mean())
+    return error
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", nargs="+", help="Directories of labeled source files")
+    parser.add_argument("--files-per-language", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    corpus = load_corpus(args.corpus, args.files_per_language, args.seed)
+    rng = random.Random(args.seed)
+    training: List[Tuple[str, str]] = []
+    test: List[Tuple[str, str]] = []
+    for language, texts in corpus.items():
+        for index, text in enumerate(texts):
+            if index % 5 == 4:
+                test.extend((snippet, language) for snippet in snippets(text, rng))
+            else:
+                training.append((text, language))
+    print("files:", {language: len(texts) for language, texts in corpus.items()})
+    
+    started = time.perf_counter()
+    model = train(training)
+    print(f"trained on {len(training)} files in {time.perf_counter() - started:.1f}s: "
+          f"{len(model.vocabulary)} features, temperature {model.temperature:.3f}, length power {model.length_power:.1f}")
+    
+    codes = [code for code, _ in test]
+    labels = [language for _, language in test]
+    size_mb = sum(len(code[:model.max_chars]) for code in codes) / 1e6
+    
+    detector = LanguageDetector()
+    started = time.perf_counter()
+    pattern_predictions = [detector.detect_sample(code) for code in codes]
+    pattern_seconds = time.perf_counter() - started
+    pattern_confidences = np.array([detector.confidence(code, language) if language in corpus else 0.0
+                                    for code, language in zip(codes, pattern_predictions)])
+    
+    started = time.perf_counter()
+    probabilities = model.predict_proba(codes)
+    model_seconds = time.perf_counter() - started
+    model_predictions = [model.languages[index] for index in probabilities.argmax(axis=1)]
+    model_confidences = probabilities.max(axis=1)
+    
+    print(f"\n{'language':<12} {'inputs':>7} {'patterns':>9} {'model':>7}")
+    for language in corpus:
+        rows = [i for i, label in enumerate(labels) if label == language]
+        if rows:
+            pattern_accuracy = np.mean([pattern_predictions[i] == language for i in rows])
+            model_accuracy = np.mean([model_predictions[i] == language for i in rows])
+            print(f"{language:<12} {len(rows):>7} {pattern_accuracy:>9.1%} {model_accuracy:>7.1%}")
+    pattern_correct = np.array([p == label for p, label in zip(pattern_predictions, labels)])
+    model_correct = np.array([p == label for p, label in zip(model_predictions, labels)])
+    print(f"{'all':<12} {len(labels):>7} {pattern_correct.mean():>9.1%} {model_correct.mean():>7.1%}")
+    
+    print(f"\nthroughput ({len(codes)} inputs, {size_mb:.1f} MB): "
+          f"patterns {len(codes) / pattern_seconds:,.0f}/s ({size_mb / pattern_seconds:.1f} MB/s), "
+          f"model batch {len(codes) / model_seconds:,.0f}/s ({size_mb / model_seconds:.1f} MB/s)")
+    print(f"calibration error: patterns confidence {calibration_error(pattern_confidences, pattern_correct):.3f}, "
+          f"model probability {calibration_error(model_confidences, model_correct):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure connection reuse of the shared OpenAI client against a local mock server.
+
+    python -m benchmarks.bench_openai_pool [--requests 50] [--threads 8]
+
+Compares a fresh openai.OpenAI client per review (the old behaviour) with the
+pooled client from analyzers.ai_analyzer, and prints its connection counters.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_COMPLETION = {
+    "id": "chatcmpl-mock",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": "[]"}
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with MockOpenAIHandler.lock:
+            MockOpenAIHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(MOCK_COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_mock_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(label: str, review, requests: int, threads: int) -> None:
+    MockOpenAIHandler.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: review(f"def f{i}():\n    return {i}\n"), range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed * 1000:>9.1f}ms  {elapsed * 1000 / requests:>6.2f}ms/review  "
+          f"server saw {MockOpenAIHandler.connections} connections")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_mock_server()
+    # config reads these at import time, so set them before importing the analyzer
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-mock")
+
+    import openai
+    from analyzers import ai_analyzer
+
+    def fresh_client_review(code: str):
+        client = openai.OpenAI(api_key=ai_analyzer.OPENAI_API_KEY, base_url=ai_analyzer.OPENAI_BASE_URL)
+        response = client.chat.completions.create(**ai_analyzer._build_completion_request(code, "python"))
+        return ai_analyzer._parse_ai_response(response.choices[0].message.content)
+
+    run("fresh client per call", fresh_client_review, args.requests, args.threads)
+    run("shared pooled client", lambda code: ai_analyzer.get_ai_suggestions_sync(code, "python"), args.requests, args.threads)
+    print(f"pool counters: {ai_analyzer.get_connection_stats()}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
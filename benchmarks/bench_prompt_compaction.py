@@ -0,0 +1,74 @@
+"""
+Measure how much prompt compaction shrinks the code sent to the AI reviewer.
+    
+    python -m benchmarks.bench_prompt_compaction [paths ...]
+
+Compacts the built-in examples plus every source file under the given paths
+(default: this repository) and reports estimated tokens before and after,
+and the time spent compacting. Sources with line-break characters that
+str.splitlines() honours but tokenize does not are checked first.
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from config import DEFAULT_CODE_EXAMPLES, FILE_EXTENSIONS
+from analyzers.ai_analyzer import estimate_tokens
+from analyzers.prompt_builder import compact_code
+
+# (language, code, expected compaction) with \f and \u2028, which must not shift later edits
+LINE_BREAK_CASES = [
+    ("python",
+     "x = 1\x0c  # a comment\ndef f():\n    \"\"\"Doc.\"\"\"\n    # note\n    return 2  # trailing\n",
+     "x = 1\ndef f():\n    \"\"\"Doc.\"\"\"\n\n    return 2\n"),
+    ("python",
+     "s = \"a\u2028b\"\ny = 2  # c\n",
+     "s = \"a\u2028b\"\ny = 2\n")
+]
+
+def check_line_breaks() -> None:
+    for language, code, expected in LINE_BREAK_CASES:
+        compacted = compact_code(code, language, comments="strip")
+        assert compacted.count("\n") == code.count("\n"), "compaction must not move lines"
+        assert compacted == expected, f"compaction changed code: {compacted!r}"
+
+def iter_sources(paths):
+    for name, code in DEFAULT_CODE_EXAMPLES.items():
+        yield name, f"<example {name}>", code
+    for root_path in paths:
+        for root, dirs, files in os.walk(root_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d not in ("node_modules", "__pycache__")]
+            for filename in files:
+                language = FILE_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+                if language:
+                    path = os.path.join(root, filename)
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        yield language, path, f.read()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[os.path.dirname(os.path.dirname(os.path.abspath(__file__)))])
+    args = parser.parse_args()
+    
+    check_line_breaks()
+    totals = defaultdict(lambda: [0, 0, 0, 0.0]) # language -> [files, tokens before, tokens after, seconds]
+    for language, _, code in iter_sources(args.paths):
+        started = time.perf_counter()
+        compacted = compact_code(code, language)
+        elapsed = time.perf_counter() - started
+        assert compacted.count("\n") == code.count("\n"), "compaction must not move lines"
+        entry = totals[language]
+        entry[0] += 1
+        entry[1] += estimate_tokens(code)
+        entry[2] += estimate_tokens(compacted)
+        entry[3] += elapsed
+    
+    print(f"{'language':<12} {'files':>5} {'tokens':>9} {'compacted':>9} {'saved':>7} {'ms/file':>8}")
+    for language, (files, before, after, seconds) in sorted(totals.items()):
+        print(f"{language:<12} {files:>5} {before:>9} {after:>9} {1 - after / before:>6.1%} {seconds * 1000 / files:>8.2f}")
+    before = sum(entry[1] for entry in totals.values())
+    after = sum(entry[2] for entry in totals.values())
+    print(f"{'total':<12} {sum(e[0] for e in totals.values()):>5} {before:>9} {after:>9} {1 - after / before:>6.1%}")
+
+if __name__ == "__main__":
+    main()
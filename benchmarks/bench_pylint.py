@@ -0,0 +1,67 @@
+"""
+Compare per-snippet Pylint latency: one-shot subprocess vs. the warm worker.
+
+    python -m benchmarks.bench_pylint [--runs 10]
+
+Also checks that both modes report the same messages for every sample.
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, Any, List
+from config import LINTER_WORKER_CONFIG
+from analyzers.python_analyzer import analyze_python_code
+from utils.worker_pool import shutdown_worker_pools
+
+SAMPLES = {
+    "small": "import os\n\ndef f(x):\n    return os.path.join(x, missing)\n",
+    "stdlib-heavy": (
+        "import json\nimport collections\nimport typing\nimport dataclasses\nimport pathlib\n\n"
+        "@dataclasses.dataclass\nclass Item:\n    name: str\n    tags: typing.List[str]\n\n"
+        "def load(path: pathlib.Path) -> collections.Counter:\n"
+        "    items = [Item(**row) for row in json.loads(path.read_text())]\n"
+        "    unused = 1\n"
+        "    return collections.Counter(tag for item in items for tag in item.tags)\n"
+    ),
+    "class-200-lines": "\n".join(
+        f"class C{i}:\n    def m(self, a, b):\n        if a > b:\n            return a - b\n        return self.m(b, a)\n"
+        for i in range(40)
+    )
+}
+
+def _messages(result: Dict[str, Any]) -> List[tuple]:
+    return sorted((m["line"], m["column"], m["symbol"]) for m in result["linter_feedback"])
+
+def bench(mode: str, code: str, runs: int) -> Dict[str, Any]:
+    LINTER_WORKER_CONFIG["pylint_mode"] = mode
+    started = time.perf_counter()
+    first = analyze_python_code(code)
+    first_ms = (time.perf_counter() - started) * 1000
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        analyze_python_code(code)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"first_ms": first_ms, "median_ms": statistics.median(timings), "messages": _messages(first)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'sample':<16} {'subprocess':>12} {'server (first)':>15} {'server':>10} {'speedup':>8}  same")
+    try:
+        for name, code in SAMPLES.items():
+            subprocess_mode = bench("subprocess", code, args.runs)
+            server_mode = bench("server", code, args.runs)
+            print(
+                f"{name:<16} {subprocess_mode['median_ms']:>10.1f}ms {server_mode['first_ms']:>13.1f}ms "
+                f"{server_mode['median_ms']:>8.1f}ms {subprocess_mode['median_ms'] / server_mode['median_ms']:>7.1f}x  "
+                f"{subprocess_mode['messages'] == server_mode['messages']}"
+            )
+    finally:
+        shutdown_worker_pools()
+
+if __name__ == "__main__":
+    main()
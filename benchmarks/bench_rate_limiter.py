@@ -0,0 +1,106 @@
+"""
+Batch AI reviews against a mock OpenAI server that enforces a request quota.
+    
+    python -m benchmarks.bench_rate_limiter [--rps 10] [--requests 60] [--threads 16]
+
+Runs the same batch without client-side limiting (bursts, 429s, retries) and
+with the RateLimiter from analyzers.ai_analyzer set to the quota, and reports
+throughput, 429s seen by the server and failures surfaced to callers.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class QuotaHandler(BaseHTTPRequestHandler):
+    """Answers chat completions, or 429 once more than `rps` requests arrived in the last second."""
+    protocol_version = "HTTP/1.1"
+    rps = 10
+    latency = 0.05
+    arrivals: deque = deque()
+    rejected = 0
+    lock = threading.Lock()
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        now = time.monotonic()
+        with QuotaHandler.lock:
+            while QuotaHandler.arrivals and now - QuotaHandler.arrivals[0] > 1.0:
+                QuotaHandler.arrivals.popleft()
+            allowed = len(QuotaHandler.arrivals) < QuotaHandler.rps
+            if allowed:
+                QuotaHandler.arrivals.append(now)
+            else:
+                QuotaHandler.rejected += 1
+        
+        if allowed:
+            time.sleep(QuotaHandler.latency)
+            status, payload = 200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "[]"}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+            }
+        else:
+            status, payload = 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+def run(label: str, ai_analyzer, requests: int, threads: int) -> None:
+    QuotaHandler.rejected = 0
+    QuotaHandler.arrivals.clear()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda i: ai_analyzer._request_suggestions_safe(f"x = {i}\n"), range(requests)))
+    elapsed = time.perf_counter() - started
+    failures = sum(1 for suggestions in results if any(s.get("category") == "api_error" for s in suggestions))
+    print(f"{label:<18} {elapsed:>6.2f}s  {(requests - failures) / elapsed:>5.1f} ok/s  "
+          f"429s at server: {QuotaHandler.rejected:>3}  failures: {failures}  limiter: {ai_analyzer.get_rate_limiter_stats()}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rps", type=int, default=10, help="Quota enforced by the mock server (requests/second)")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+    
+    QuotaHandler.rps = args.rps
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuotaHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    # config reads these at import time, so set them before importing the analyzer
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-mock")
+    os.environ["AI_CACHE_ENABLED"] = "false"
+    os.environ["OPENAI_RATE_LIMIT_RETRIES"] = "3"
+    
+    from analyzers import ai_analyzer
+    
+    def review(code: str):
+        try:
+            return ai_analyzer._request_suggestions(code, "python")
+        except Exception as e:
+            return ai_analyzer._format_ai_exception(e)
+    ai_analyzer._request_suggestions_safe = review
+    
+    ai_analyzer._rate_limiter = ai_analyzer.RateLimiter(0, 0) # Unlimited: retries only
+    run("no client limit", ai_analyzer, args.requests, args.threads)
+    
+    ai_analyzer._rate_limiter = ai_analyzer.RateLimiter(args.rps * 60, 0, burst_seconds=1)
+    run("token bucket", ai_analyzer, args.requests, args.threads)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
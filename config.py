@@ -12,6 +12,25 @@ OPENAI_MODEL = "gpt-4o-mini"
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "2000"))
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
 OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") # Override the API endpoint (e.g. a local mock server)
+
+# Client-side OpenAI rate limiting (set to your account's limits; 0 disables a budget)
+OPENAI_RATE_LIMITS = {
+    "requests_per_minute": int(os.getenv("OPENAI_RPM", "500")),
+    "tokens_per_minute": int(os.getenv("OPENAI_TPM", "200000")),
+    "burst_seconds": float(os.getenv("OPENAI_BURST_SECONDS", "10")), # Budget that may be spent at once
+    "max_retries": int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "5")), # Retries of 429 responses
+    "backoff_base": 1.0, # Seconds; doubled per attempt, full jitter
+    "backoff_max": 30.0,
+    "transient_retries": 2 # Retries of connection errors and 5xx responses; timeouts (OPENAI_TIMEOUT) are not retried
+}
+
+# Shared HTTP connection pool for the OpenAI client (keep-alive avoids a TLS handshake per review)
+OPENAI_HTTP_POOL = {
+    "max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+    "max_keepalive_connections": int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    "keepalive_expiry": float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60")) # Seconds an idle connection is kept
+}
 
 # ================================
 # LINTER CONFIGURATION
@@ -394,6 +413,19 @@ LANGUAGE_INFO = {
     }
 }
 
+# Pattern detection on large inputs (see LanguageDetector.detect_sample)
+LANGUAGE_DETECTION_CONFIG = {
+    "sample_chars": int(os.getenv("LANGUAGE_DETECTION_SAMPLE_CHARS", str(32 * 1024))), # Longer code is detected from head/middle/tail slices
+    "min_margin": 50 # Lead over the runner-up score that ends sampling early
+}
+
+# Trained language classifier (python -m core.cli --train-language-model DIR ...); none ships by default,
+# and without a model file the patterns decide both the language and its confidence
+LANGUAGE_MODEL_CONFIG = {
+    "path": os.getenv("LANGUAGE_MODEL_PATH", os.path.join(os.path.expanduser("~"), ".cache", "ai-code-review", "language_model.npz")),
+    "min_probability": float(os.getenv("LANGUAGE_MODEL_MIN_PROBABILITY", "0.6")) # Less confident predictions fall back to the patterns
+}
+
 # ================================
 # AI PROMPT TEMPLATES
 # ================================
@@ -630,6 +662,17 @@ Focus on the most impactful and easy-to-understand improvements. Return only val
 """
 }
 
+# Appended to the rendered template (see analyzers/prompt_builder.py)
+AI_PROMPT_ADDENDA: Dict[str, str] = {
+    "compacted": """
+Note: comments and long string literals were removed or shortened to save space. Line numbers are unchanged. Do not comment on missing comments or on the shortened literals.
+""",
+    "linter_findings": """
+The linters already reported the issues below and the developer sees them separately. Do not repeat them or make other formatting-only remarks; focus on what a linter cannot catch.
+{findings}
+"""
+}
+
 # ================================
 # ANALYSIS CONFIGURATION
 # ================================
@@ -643,6 +686,95 @@ ANALYSIS_LIMITS = {
     "max_linter_issues": 100       # Maximum linter issues to process
 }
 
+# Result Cache (content-addressed cache in front of CodeAnalyzer.analyze_code)
+RESULT_CACHE_CONFIG = {
+    "enabled": os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "memory_entries": int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "128")), # In-memory LRU tier size
+    "disk_dir": os.getenv("RESULT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-code-review", "results")),
+    "disk_max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))) # On-disk tier size bound
+}
+
+# Persistent AI suggestion cache (SQLite), keyed by the exact prompt sent to OpenAI
+AI_CACHE_CONFIG = {
+    "enabled": os.getenv("AI_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "path": os.getenv("AI_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "ai-code-review", "ai_suggestions.sqlite3")),
+    "ttl_seconds": int(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    "max_bytes": int(os.getenv("AI_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    # Also cache suggestions per function/class so re-reviewing an edited file only sends the changed units
+    "per_unit": os.getenv("AI_CACHE_PER_UNIT", "true").lower() in ("1", "true", "yes")
+}
+
+# Chunked AI review for code over the single-request limit
+AI_CHUNKING_CONFIG = {
+    "enabled": os.getenv("AI_CHUNKING_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "single_request_chars": 8000, # Larger code is split at function/class boundaries
+    "chunk_tokens": int(os.getenv("AI_CHUNK_TOKENS", "1500")), # Estimated code tokens per chunk
+    "overlap_lines": int(os.getenv("AI_CHUNK_OVERLAP_LINES", "8")), # Context lines repeated from the previous chunk
+    "max_chunks": int(os.getenv("AI_MAX_CHUNKS", "12")),
+    "max_parallel": int(os.getenv("AI_CHUNK_PARALLELISM", "6")) # Chunk requests in flight per file
+}
+
+# AI prompt compaction (line-preserving) and linter findings in the prompt
+AI_PROMPT_CONFIG = {
+    "compact": os.getenv("AI_PROMPT_COMPACT", "true").lower() in ("1", "true", "yes"),
+    "comments": os.getenv("AI_PROMPT_COMMENTS", "strip"), # strip | license (leading license header only) | keep
+    "max_literal_chars": int(os.getenv("AI_PROMPT_MAX_LITERAL_CHARS", "120")), # Longer string literals are collapsed
+    # Off by default: the findings only exist once the linter has finished, so including them
+    # makes the AI request wait for the linter instead of running alongside it
+    "include_linter_findings": os.getenv("AI_PROMPT_LINTER_FINDINGS", "false").lower() in ("1", "true", "yes"),
+    "max_linter_findings": int(os.getenv("AI_PROMPT_MAX_LINTER_FINDINGS", "40"))
+}
+
+# Batch Analysis (CodeAnalyzer.analyze_many)
+BATCH_ANALYSIS_CONFIG = {
+    "max_workers": int(os.getenv("BATCH_MAX_WORKERS", "8")), # Snippets analyzed at once
+    # Maximum simultaneous runs per tool, shared by every analysis on the same CodeAnalyzer
+    "tool_concurrency": {
+        "pylint": int(os.getenv("PYLINT_CONCURRENCY", "4")),
+        "eslint": int(os.getenv("ESLINT_CONCURRENCY", "2")),
+        "checkstyle": int(os.getenv("CHECKSTYLE_CONCURRENCY", "2")),
+        "cppcheck": int(os.getenv("CPPCHECK_CONCURRENCY", "4")),
+        "stylelint": int(os.getenv("STYLELINT_CONCURRENCY", "2")),
+        "openai": int(os.getenv("OPENAI_CONCURRENCY", "8"))
+    }
+}
+
+# Long-lived linter workers (line-delimited JSON over pipes, see utils/worker_pool.py)
+LINTER_WORKER_CONFIG = {
+    # "server" lints in a warm worker process, "subprocess" spawns the linter per snippet
+    "pylint_mode": os.getenv("PYLINT_MODE", "server"),
+    "eslint_mode": os.getenv("ESLINT_MODE", "server"),
+    "checkstyle_mode": os.getenv("CHECKSTYLE_MODE", "server"),
+    "pool_size": int(os.getenv("LINTER_WORKER_POOL_SIZE", "2")),
+    # Workers are restarted after this many requests to bound cache growth
+    "max_requests": int(os.getenv("LINTER_WORKER_MAX_REQUESTS", "500"))
+}
+
+# Source is passed to the one-shot linters on stdin where they accept it (pylint, eslint, stylelint, g++);
+# files for the rest are written under this directory, or the system temp directory if it isn't writable
+TOOL_IO_CONFIG = {
+    "scratch_dir": os.getenv("TOOL_SCRATCH_DIR", "/dev/shm"), # RAM-backed on Linux
+    # Isolated scratch directories for those tools; an analysis that finds none free waits for one
+    "workspaces": int(os.getenv("TOOL_WORKSPACES", "16"))
+}
+
+# External tool discovery (utils/tool_probe.py); versions are cached by executable path, size and mtime
+TOOL_PROBE_CONFIG = {
+    "cache_path": os.getenv("TOOL_PROBE_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ai-code-review", "tool_probe.json")),
+    "timeout": float(os.getenv("TOOL_PROBE_TIMEOUT", "10")) # Seconds for one version command
+}
+
+# Headless CLI (python -m core.cli)
+CLI_CONFIG = {
+    # Budget for a no-op `python -m core.cli` run (empty stdin) on top of a bare interpreter start,
+    # checked by --check-startup
+    "startup_budget_ms": int(os.getenv("CLI_STARTUP_BUDGET_MS", "100")),
+    # Modules the CLI must never load (they belong to the Streamlit UI)
+    "forbidden_modules": ["streamlit", "plotly", "pandas"],
+    # Directories skipped when scanning a directory tree
+    "skip_dirs": [".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", "build", "dist"]
+}
+
 # Code Quality Thresholds
 QUALITY_THRESHOLDS = {
     "excellent": {"max_issues": 0, "max_high_severity": 0},
@@ -742,6 +874,9 @@ def validate_openai_config() -> Dict[str, Any]:
 
 def validate_environment() -> Dict[str, Any]:
     """Validate the environment setup."""
+    from utils.tool_probe import probe_tools # Imported here: it reads this module's settings
+    
+    tools = probe_tools()
     validation_results = {
         "openai": validate_openai_config(),
         "python_version": {
@@ -752,18 +887,22 @@ def validate_environment() -> Dict[str, Any]:
         "required_packages": {
             "streamlit": True,
             "openai": True,
-            "pylint": True
+            "pylint": tools["pylint"].available
         },
         "optional_tools": {
-            "nodejs": False,  # Will be checked at runtime
-            "eslint": False,   # Will be checked at runtime
-            "java": False,     # Will be checked at runtime
-            "checkstyle": False, # Will be checked at runtime
-            "cppcheck": False, # Will be checked at runtime
-            "go": False,       # Will be checked at runtime
-            "staticcheck": False, # Will be checked at runtime
-            "stylelint": False # Will be checked at runtime
-        }
+            "nodejs": tools["node"].available,
+            "eslint": tools["eslint"].available,
+            "java": tools["java"].available,
+            "javac": tools["javac"].available,
+            "checkstyle": tools["checkstyle"].available and tools["checkstyle_config"].available,
+            "cppcheck": tools["cppcheck"].available,
+            "g++": tools["g++"].available,
+            "go": tools["go"].available,
+            "staticcheck": tools["staticcheck"].available,
+            "stylelint": tools["stylelint"].available
+        },
+        # Where each tool was found and its version
+        "tools": {name: {"path": info.path, "version": info.version} for name, info in tools.items()}
     }
     
     return validation_results
@@ -1,13 +1,116 @@
-from typing import Dict, Any, Optional
+import asyncio
+import functools
+import importlib
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Tuple, Iterable, Iterator, List, Sequence, Union
+from config import AI_PROMPT_CONFIG, BATCH_ANALYSIS_CONFIG
 from utils.language_detector import get_language_info, get_supported_languages, is_language_supported
+from core.cache import ResultCache, compute_cache_key, get_default_cache, is_cacheable
+from utils.tool_probe import start_probe
+
+# language -> (analyzer module, syntax validator, linter function, linter keyword arguments)
+# Modules are imported on first use so only the analyzers for languages actually seen get loaded.
+ANALYZER_REGISTRY = {
+    'python': ('analyzers.python_analyzer', 'validate_python_syntax', 'analyze_python_code', {}),
+    'javascript': ('analyzers.javascript_analyzer', 'validate_js_syntax', 'analyze_js_code', {'is_typescript': False}),
+    'java': ('analyzers.java_analyzer', 'validate_java_syntax', 'analyze_java_code', {}),
+    'c_cpp': ('analyzers.c_cpp_analyzer', 'validate_c_cpp_syntax', 'analyze_c_cpp_code', {}),
+    'typescript': ('analyzers.javascript_analyzer', 'validate_js_syntax', 'analyze_js_code', {'is_typescript': True}), # Use JS validator for TS
+    # 'go': ('analyzers.go_analyzer', 'validate_go_syntax', 'analyze_go_code', {}),
+    'html_css': ('analyzers.html_css_analyzer', 'validate_html_css_syntax', 'analyze_html_css_code', {}),
+}
+
+# language -> (analyzer module, combined check) for analyzers whose tooling validates syntax and
+# lints in one run; the check returns (syntax check, linter results or None if the syntax is invalid)
+COMBINED_CHECK_REGISTRY = {
+    'java': ('analyzers.java_analyzer', 'check_java_code'),
+}
+
+def load_analyzer_functions(language: str, asynchronous: bool = False) -> Tuple[Optional[Any], Optional[Any]]:
+    """
+    Import the analyzer module for a language and return its (syntax validator, linter) functions.
+    
+    Args:
+        language: Resolved programming language
+        asynchronous: Return the *_async coroutine twins instead
+        
+    Returns:
+        Tuple of callables taking the code string, or (None, None) if the language has no analyzer
+    """
+    entry = ANALYZER_REGISTRY.get(language)
+    if entry is None:
+        return None, None
+    
+    module_name, validator_name, linter_name, linter_kwargs = entry
+    suffix = "_async" if asynchronous else ""
+    module = importlib.import_module(module_name)
+    syntax_check_func = getattr(module, validator_name + suffix)
+    linter_analysis_func = getattr(module, linter_name + suffix)
+    if linter_kwargs:
+        linter_analysis_func = functools.partial(linter_analysis_func, **linter_kwargs)
+    return syntax_check_func, linter_analysis_func
+
+def load_linter_fingerprint(language: str) -> Optional[Dict[str, Any]]:
+    """
+    Import the analyzer module for a language and return its linter_fingerprint.
+    
+    Args:
+        language: Resolved programming language
+        
+    Returns:
+        The effective linter configuration and tool identities, or None if the language has no analyzer
+    """
+    entry = ANALYZER_REGISTRY.get(language)
+    if entry is None:
+        return None
+    
+    module_name, _, _, linter_kwargs = entry
+    return importlib.import_module(module_name).linter_fingerprint(**linter_kwargs)
+
+def load_combined_check(language: str, asynchronous: bool = False) -> Optional[Any]:
+    """
+    Import the analyzer module for a language and return its combined syntax and linter check.
+    
+    Args:
+        language: Resolved programming language
+        asynchronous: Return the *_async coroutine twin instead
+        
+    Returns:
+        Callable taking the code string, or None if the language has no combined check
+    """
+    entry = COMBINED_CHECK_REGISTRY.get(language)
+    if entry is None:
+        return None
+    
+    module_name, check_name = entry
+    return getattr(importlib.import_module(module_name), check_name + ("_async" if asynchronous else ""))
+
+# (code, language, filename) - language and filename may be omitted or None
+BatchItem = Union[Tuple[str], Tuple[str, Optional[str]], Tuple[str, Optional[str], Optional[str]]]
 
 class CodeAnalyzer:
     """Main code analysis coordinator."""
     
-    def __init__(self):
+    def __init__(self, concurrent: bool = True, cache: Optional[ResultCache] = None, use_cache: bool = True):
         self.supported_languages = get_supported_languages()
+        self.concurrent = concurrent
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        # Per-tool caps so a batch cannot start more linters or OpenAI calls than configured
+        self._tool_slots = {
+            tool: threading.BoundedSemaphore(limit)
+            for tool, limit in BATCH_ANALYSIS_CONFIG["tool_concurrency"].items()
+        }
+        # asyncio semaphores are bound to an event loop, so keep one set per loop
+        self._async_tool_slots = weakref.WeakKeyDictionary()
+        # Find the external linters while the first request is being prepared
+        start_probe()
     
-    def analyze_code(self, code: str, language: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+    def analyze_code(self, code: str, language: Optional[str] = None, filename: Optional[str] = None,
+                     concurrent: Optional[bool] = None) -> Dict[str, Any]:
         """
         Analyze code using both linters and AI suggestions.
         
@@ -15,183 +118,522 @@ class CodeAnalyzer:
             code: Source code string
             language: Programming language (if None, will auto-detect)
             filename: Optional filename for language detection
+            concurrent: Run the AI request while the linter runs (defaults to the analyzer setting;
+                ignored when the prompt includes linter findings, see AI_PROMPT_CONFIG)
+        
+        Returns:
+            Unified analysis results, with per-stage wall times in metadata["timings"]
+        """
+        started = time.perf_counter()
+        try:
+            early_result, detected_language, cache_key = self._prepare(code, language, filename, started)
+            if early_result is not None:
+                return early_result
+            
+            run_concurrently = (self.concurrent if concurrent is None else concurrent) and not AI_PROMPT_CONFIG["include_linter_findings"]
+            timings = {}
             
+            if run_concurrently:
+                # The AI request only needs the raw code, so it can be in flight
+                # while the syntax checker and linter subprocesses run.
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    ai_future = executor.submit(self._timed, self._get_ai_suggestions, code, detected_language)
+                    linter_results, timings["syntax_check"], timings["linter"] = self._run_linter_stage(code, detected_language)
+                    code_characteristics, code_complexity, timings["metrics"] = self._compute_metrics(code, detected_language)
+                    ai_suggestions, timings["ai"] = ai_future.result()
+            else:
+                linter_results, timings["syntax_check"], timings["linter"] = self._run_linter_stage(code, detected_language)
+                ai_suggestions, timings["ai"] = self._timed(self._get_ai_suggestions, code, detected_language, self._prompt_findings(linter_results))
+                code_characteristics, code_complexity, timings["metrics"] = self._compute_metrics(code, detected_language)
+            
+            return self._finish(
+                code, detected_language, cache_key, linter_results, ai_suggestions,
+                code_characteristics, code_complexity, timings, started,
+                "concurrent" if run_concurrently else "sequential"
+            )
+        
+        except Exception as e:
+            return self._unexpected_error_result(code, e)
+    
+    async def analyze_code_async(self, code: str, language: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async twin of analyze_code built on asyncio subprocesses and openai.AsyncOpenAI.
+        
+        The linter stage and the AI request run concurrently on the event loop, unless the
+        prompt includes linter findings (see AI_PROMPT_CONFIG).
+        
+        Args:
+            code: Source code string
+            language: Programming language (if None, will auto-detect)
+            filename: Optional filename for language detection
+        
         Returns:
-            Unified analysis results
+            Unified analysis results with the same schema as analyze_code
         """
+        started = time.perf_counter()
         try:
-            if not code.strip():
-                return {
-                    "success": False,
-                    "error": "No code provided for analysis",
-                    "language": None,
-                    "linter_feedback": [],
-                    "ai_suggestions": [],
-                    "language_info": {}
-                }
+            early_result, detected_language, cache_key = self._prepare(code, language, filename, started)
+            if early_result is not None:
+                return early_result
             
-            # Import here to avoid circular imports and only load necessary analyzers
-            from utils.language_detector import detect_language, analyze_code_characteristics, detect_code_complexity
-            from analyzers.python_analyzer import analyze_python_code, validate_python_syntax
-            from analyzers.javascript_analyzer import analyze_js_code, validate_js_syntax
-            from analyzers.ai_analyzer import get_ai_suggestions_sync
+            timings = {}
+            linter_results = None
             
-            # Import new analyzers
-            from analyzers.java_analyzer import analyze_java_code, validate_java_syntax
-            from analyzers.c_cpp_analyzer import analyze_c_cpp_code, validate_c_cpp_syntax
-            from analyzers.typescript_analyzer import analyze_typescript_code, validate_typescript_syntax # Deprecated
-            from analyzers.html_css_analyzer import analyze_html_css_code, validate_html_css_syntax
+            async def timed_ai():
+                stage_started = time.perf_counter()
+                suggestions = await self._get_ai_suggestions_async(code, detected_language, self._prompt_findings(linter_results))
+                return suggestions, time.perf_counter() - stage_started
             
-            # Detect or validate language
-            detected_language = language or detect_language(code, filename)
+            if AI_PROMPT_CONFIG["include_linter_findings"]:
+                linter_results, timings["syntax_check"], timings["linter"] = await self._run_linter_stage_async(code, detected_language)
+            ai_task = asyncio.ensure_future(timed_ai())
+            try:
+                if linter_results is None:
+                    linter_results, timings["syntax_check"], timings["linter"] = await self._run_linter_stage_async(code, detected_language)
+                code_characteristics, code_complexity, timings["metrics"] = self._compute_metrics(code, detected_language)
+                ai_suggestions, timings["ai"] = await ai_task
+            finally:
+                if not ai_task.done():
+                    ai_task.cancel()
             
-            if not is_language_supported(detected_language):
-                return {
-                    "success": False,
-                    "error": f"Unsupported language: '{detected_language}'. Please select a supported language or provide a file with a known extension.",
-                    "language": detected_language,
-                    "linter_feedback": [],
-                    "ai_suggestions": [],
-                    "language_info": get_language_info(detected_language)
-                }
+            return self._finish(
+                code, detected_language, cache_key, linter_results, ai_suggestions,
+                code_characteristics, code_complexity, timings, started, "async"
+            )
+        
+        except Exception as e:
+            return self._unexpected_error_result(code, e)
+    
+    def analyze_code_stream(self, code: str, language: Optional[str] = None,
+                            filename: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Analyze code like analyze_code, yielding AI suggestions as the model writes them.
+        
+        The AI response is streamed on the calling thread, so a UI can render
+        each suggestion as soon as it is complete. The linter stage runs on a
+        worker thread alongside it, or first when the prompt includes linter
+        findings (see AI_PROMPT_CONFIG).
+        
+        Args:
+            code: Source code string
+            language: Programming language (if None, will auto-detect)
+            filename: Optional filename for language detection
+        
+        Yields:
+            ("ai_suggestion", suggestion) for each AI suggestion, then
+            ("result", results) with the same schema as analyze_code
+        """
+        started = time.perf_counter()
+        try:
+            early_result, detected_language, cache_key = self._prepare(code, language, filename, started)
+            if early_result is not None:
+                yield "result", early_result
+                return
             
-            # Get language information
-            lang_info = get_language_info(detected_language)
+            timings = {}
+            ai_suggestions = []
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                linter_future = executor.submit(self._run_linter_stage, code, detected_language)
+                linter_feedback = self._prompt_findings(linter_future.result()[0]) if AI_PROMPT_CONFIG["include_linter_findings"] else None
+                
+                stage_started = time.perf_counter()
+                for suggestion in self._stream_ai_suggestions(code, detected_language, linter_feedback):
+                    if not ai_suggestions:
+                        timings["ai_first_suggestion"] = time.perf_counter() - stage_started
+                    ai_suggestions.append(suggestion)
+                    yield "ai_suggestion", suggestion
+                timings["ai"] = time.perf_counter() - stage_started
+                
+                code_characteristics, code_complexity, timings["metrics"] = self._compute_metrics(code, detected_language)
+                linter_results, timings["syntax_check"], timings["linter"] = linter_future.result()
             
-            # Validate syntax
-            syntax_valid = True
-            syntax_error = None
+            yield "result", self._finish(
+                code, detected_language, cache_key, linter_results, ai_suggestions,
+                code_characteristics, code_complexity, timings, started, "streaming"
+            )
+        
+        except Exception as e:
+            yield "result", self._unexpected_error_result(code, e)
+    
+    def analyze_many(self, items: Iterable[BatchItem], max_workers: Optional[int] = None,
+                     stream: bool = False) -> Union[List[Dict[str, Any]], Iterator[Tuple[int, Dict[str, Any]]]]:
+        """
+        Analyze many snippets in one call using a bounded worker pool.
+        
+        Args:
+            items: Iterable of (code, language, filename) tuples
+            max_workers: Snippets analyzed at once (defaults to BATCH_ANALYSIS_CONFIG["max_workers"])
+            stream: If True, return an iterator of (index, result) in completion order
+        
+        Returns:
+            List of results in input order, or an iterator when streaming
+        """
+        batch = self._detect_batch_languages([self._normalize_batch_item(item) for item in items])
+        workers = max(1, min(max_workers or BATCH_ANALYSIS_CONFIG["max_workers"], len(batch) or 1))
+        
+        if stream:
+            return self._stream_batch(batch, workers)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        for index, result in self._stream_batch(batch, workers):
+            results[index] = result
+        return results
+    
+    def _stream_batch(self, batch: Sequence[Tuple[str, Optional[str], Optional[str]]], workers: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (index, result) for each batch item as soon as it finishes."""
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze") as executor:
+            futures = {
+                executor.submit(self.analyze_code, code, language, filename): index
+                for index, (code, language, filename) in enumerate(batch)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    @staticmethod
+    def _detect_batch_languages(batch: List[Tuple[str, Optional[str], Optional[str]]]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Fill in the missing languages with one detection call, so the classifier scores them as a batch."""
+        missing = [index for index, (code, language, _) in enumerate(batch) if not language and code.strip()]
+        if not missing:
+            return batch
+        
+        from utils.language_detector import detect_languages
+        
+        detected = detect_languages([batch[index][0] for index in missing], [batch[index][2] for index in missing])
+        for index, language in zip(missing, detected):
+            code, _, filename = batch[index]
+            batch[index] = (code, language, filename)
+        return batch
+    
+    @staticmethod
+    def _normalize_batch_item(item: BatchItem) -> Tuple[str, Optional[str], Optional[str]]:
+        if isinstance(item, str):
+            return item, None, None
+        padded = tuple(item) + (None,) * (3 - len(item))
+        return padded[0], padded[1], padded[2]
+    
+    def _prepare(self, code: str, language: Optional[str], filename: Optional[str],
+                 started: float) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+        """
+        Resolve the language and consult the result cache.
+        
+        Returns:
+            Tuple of (result to return immediately or None, detected language, cache key)
+        """
+        if not code.strip():
+            return {
+                "success": False,
+                "error": "No code provided for analysis",
+                "language": None,
+                "linter_feedback": [],
+                "ai_suggestions": [],
+                "language_info": {}
+            }, None, None
+        
+        # Import here to avoid circular imports and only load necessary analyzers
+        from utils.language_detector import detect_language
+        
+        # Detect or validate language
+        detected_language = language or detect_language(code, filename)
+        
+        if not is_language_supported(detected_language):
+            return {
+                "success": False,
+                "error": f"Unsupported language: '{detected_language}'. Please select a supported language or provide a file with a known extension.",
+                "language": detected_language,
+                "linter_feedback": [],
+                "ai_suggestions": [],
+                "language_info": get_language_info(detected_language)
+            }, detected_language, None
+        
+        # Serve repeated analyses without running any linter or AI request
+        cache_key = None
+        if self.cache is not None:
+            cache_key = compute_cache_key(code, detected_language, load_linter_fingerprint(detected_language))
+            cached_result, cache_tier = self.cache.get(cache_key)
+            if cached_result is not None:
+                lookup_time = round(time.perf_counter() - started, 4)
+                cached_result["metadata"]["cache_hit"] = True
+                cached_result["metadata"]["cache_tier"] = cache_tier
+                cached_result["metadata"]["timings"] = {"cache_lookup": lookup_time, "total": lookup_time, "mode": "cached"}
+                return cached_result, detected_language, cache_key
+        
+        return None, detected_language, cache_key
+    
+    def _finish(self, code: str, detected_language: str, cache_key: Optional[str], linter_results: Dict[str, Any],
+                ai_suggestions: list, code_characteristics: Dict[str, Any], code_complexity: Dict[str, Any],
+                timings: Dict[str, float], started: float, mode: str) -> Dict[str, Any]:
+        """Merge the stage outputs into the unified result and store it in the cache."""
+        # Get language information
+        lang_info = get_language_info(detected_language)
+        
+        # Calculate summary
+        linter_issues = linter_results.get("linter_feedback", [])
+        total_issues = len(linter_issues) + len(ai_suggestions)
+        
+        # Count by severity
+        severity_counts = {"error": 0, "high": 0, "warning": 0, "medium": 0, "info": 0, "low": 0, "suggestion": 0}
+        for issue in linter_issues + ai_suggestions:
+            severity = issue.get("severity", "info")
+            if severity in severity_counts:
+                severity_counts[severity] += 1
+        
+        timings["total"] = time.perf_counter() - started
+        sequential_time = timings["syntax_check"] + timings["linter"] + timings["ai"] + timings["metrics"]
+        timings["saved"] = max(0.0, sequential_time - timings["total"])
+        timings = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        timings["mode"] = mode
+        
+        result = {
+            "success": True,
+            "language": detected_language,
+            "language_info": lang_info,
+            "linter_feedback": linter_issues,
+            "ai_suggestions": ai_suggestions,
+            "summary": {
+                "total_issues": total_issues,
+                "linter_issues": len(linter_issues),
+                "ai_suggestions": len(ai_suggestions),
+                "severity_counts": severity_counts
+            },
+            "errors": linter_results.get("errors"),
+            "linter_raw_output": linter_results.get("raw_output"),
+            "metadata": {
+                "code_length": len(code),
+                "lines_of_code": len(code.splitlines()),
+                "characteristics": code_characteristics,
+                "complexity": code_complexity,
+                "timings": timings,
+                "cache_hit": False,
+                "cache_tier": None
+            }
+        }
+        
+        if cache_key is not None and is_cacheable(result, linter_results):
+            self.cache.set(cache_key, result)
+        
+        return result
+    
+    @staticmethod
+    def _unexpected_error_result(code: str, e: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"An unexpected error occurred during analysis: {str(e)}",
+            "language": "unknown",
+            "language_info": {},
+            "linter_feedback": [],
+            "ai_suggestions": [],
+            "summary": {"total_issues": 0, "linter_issues": 0, "ai_suggestions": 0},
+            "debug_info": {
+                "error_type": type(e).__name__,
+                "message": str(e),
+                "code_length": len(code),
+                "lines_of_code": len(code.splitlines())
+            }
+        }
+    
+    def _tool_slot(self, tool: Optional[str]):
+        """Context manager holding one concurrency slot for the given tool."""
+        slot = self._tool_slots.get(tool) if tool else None
+        return slot if slot is not None else nullcontext()
+    
+    def _async_tool_slot(self, tool: Optional[str]):
+        """Async context manager holding one concurrency slot for the given tool on the running loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._async_tool_slots.get(loop)
+        if slots is None:
+            slots = {
+                name: asyncio.Semaphore(limit)
+                for name, limit in BATCH_ANALYSIS_CONFIG["tool_concurrency"].items()
+            }
+            self._async_tool_slots[loop] = slots
+        slot = slots.get(tool) if tool else None
+        return slot if slot is not None else nullcontext()
+    
+    @staticmethod
+    def _linter_tool(detected_language: str) -> str:
+        return get_language_info(detected_language).get("linter", "").lower()
+    
+    def _timed(self, func, *args) -> Tuple[Any, float]:
+        """Call func and return its result together with the elapsed wall time in seconds."""
+        stage_started = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - stage_started
+    
+    def _run_linter_stage(self, code: str, detected_language: str) -> Tuple[Dict[str, Any], float, float]:
+        """
+        Validate syntax and, if valid, run the language linter.
+        
+        Returns:
+            Tuple of (linter results, syntax check seconds, linter seconds)
+        """
+        combined_check_func = load_combined_check(detected_language)
+        syntax_check_func, linter_analysis_func = load_analyzer_functions(detected_language)
+        
+        with self._tool_slot(self._linter_tool(detected_language)):
+            if combined_check_func is not None:
+                # Syntax and lint results come from one tool run, so it all counts as linter time
+                linter_started = time.perf_counter()
+                try:
+                    linter_results = self._combined_results(*combined_check_func(code))
+                except Exception as e:
+                    linter_results = self._linter_error_results(e)
+                return linter_results, 0.0, time.perf_counter() - linter_started
             
+            # Validate syntax
+            syntax_started = time.perf_counter()
             try:
-                syntax_check_func = {
-                    'python': validate_python_syntax,
-                    'javascript': validate_js_syntax,
-                    'java': validate_java_syntax,
-                    'c_cpp': validate_c_cpp_syntax,
-                    'typescript': validate_js_syntax, # Use JS validator for TS
-                    # 'go': validate_go_syntax,
-                    'html_css': validate_html_css_syntax,
-                }.get(detected_language)
-                
-                if syntax_check_func:
-                    syntax_check = syntax_check_func(code)
-                    syntax_valid = syntax_check.get("valid", True)
-                    syntax_error = syntax_check.get("error")
-                else:
-                    syntax_valid = True # Assume valid if no specific validator
+                syntax_check = syntax_check_func(code) if syntax_check_func else None
+                syntax_valid, syntax_error = self._syntax_outcome(syntax_check)
             except Exception as e:
-                syntax_valid = False
-                syntax_error = f"Internal syntax check error: {str(e)}"
+                syntax_valid, syntax_error = False, f"Internal syntax check error: {str(e)}"
+            syntax_time = time.perf_counter() - syntax_started
             
             # Run linter analysis
-            linter_results = {"success": True, "linter_feedback": [], "errors": None, "raw_output": None}
-            
+            linter_started = time.perf_counter()
             if not syntax_valid:
-                linter_results["success"] = False
-                linter_results["error"] = syntax_error
-                linter_results["linter_feedback"].append({
-                    "type": "linter",
-                    "tool": "syntax_checker",
-                    "severity": "error",
-                    "line": 1, # Default to line 1 if not specific
-                    "column": 0,
-                    "message": f"Syntax Error: {syntax_error}",
-                    "rule_id": "syntax-error"
-                })
+                linter_results = self._syntax_error_results(syntax_error)
             else:
                 try:
-                    linter_analysis_func = {
-                        'python': analyze_python_code,
-                        'javascript': lambda c: analyze_js_code(c, is_typescript=False), # Pass is_typescript=False
-                        'java': analyze_java_code,
-                        'c_cpp': analyze_c_cpp_code,
-                        'typescript': lambda c: analyze_js_code(c, is_typescript=True), # Pass is_typescript=True
-                        # 'go': analyze_go_code,
-                        'html_css': analyze_html_css_code,
-                    }.get(detected_language)
-                    
-                    if linter_analysis_func:
-                        linter_results = linter_analysis_func(code)
-                    else:
-                        linter_results["success"] = True
-                        linter_results["linter_feedback"] = []
-                        linter_results["raw_output"] = "No specific linter for this language."
+                    linter_results = linter_analysis_func(code) if linter_analysis_func else self._no_linter_results()
                 except Exception as e:
-                    linter_results = {
-                        "success": False,
-                        "error": f"Linter analysis failed: {str(e)}",
-                        "linter_feedback": [],
-                        "raw_output": None,
-                        "errors": str(e)
-                    }
+                    linter_results = self._linter_error_results(e)
             
-            # Get AI suggestions
-            ai_suggestions = []
+            return linter_results, syntax_time, time.perf_counter() - linter_started
+    
+    async def _run_linter_stage_async(self, code: str, detected_language: str) -> Tuple[Dict[str, Any], float, float]:
+        """Async twin of _run_linter_stage."""
+        combined_check_func = load_combined_check(detected_language, asynchronous=True)
+        syntax_check_func, linter_analysis_func = load_analyzer_functions(detected_language, asynchronous=True)
+        
+        async with self._async_tool_slot(self._linter_tool(detected_language)):
+            if combined_check_func is not None:
+                linter_started = time.perf_counter()
+                try:
+                    linter_results = self._combined_results(*(await combined_check_func(code)))
+                except Exception as e:
+                    linter_results = self._linter_error_results(e)
+                return linter_results, 0.0, time.perf_counter() - linter_started
+            
+            syntax_started = time.perf_counter()
             try:
-                ai_suggestions = get_ai_suggestions_sync(code, detected_language)
+                syntax_check = await syntax_check_func(code) if syntax_check_func else None
+                syntax_valid, syntax_error = self._syntax_outcome(syntax_check)
             except Exception as e:
-                ai_suggestions = [{
-                    "type": "info",
-                    "severity": "low",
-                    "line": None,
-                    "message": f"AI analysis unavailable due to an internal error: {str(e)}",
-                    "example": None,
-                    "category": "internal_error"
-                }]
-            
-            # Calculate summary
-            linter_issues = linter_results.get("linter_feedback", [])
-            total_issues = len(linter_issues) + len(ai_suggestions)
-            
-            # Count by severity
-            severity_counts = {"error": 0, "high": 0, "warning": 0, "medium": 0, "info": 0, "low": 0, "suggestion": 0}
-            for issue in linter_issues + ai_suggestions:
-                severity = issue.get("severity", "info")
-                if severity in severity_counts:
-                    severity_counts[severity] += 1
+                syntax_valid, syntax_error = False, f"Internal syntax check error: {str(e)}"
+            syntax_time = time.perf_counter() - syntax_started
             
-            # Get code characteristics and complexity
-            code_characteristics = analyze_code_characteristics(code)
-            code_complexity = detect_code_complexity(code)
-
-            return {
-                "success": True,
-                "language": detected_language,
-                "language_info": lang_info,
-                "linter_feedback": linter_issues,
-                "ai_suggestions": ai_suggestions,
-                "summary": {
-                    "total_issues": total_issues,
-                    "linter_issues": len(linter_issues),
-                    "ai_suggestions": len(ai_suggestions),
-                    "severity_counts": severity_counts
-                },
-                "errors": linter_results.get("errors"),
-                "linter_raw_output": linter_results.get("raw_output"),
-                "metadata": {
-                    "code_length": len(code),
-                    "lines_of_code": len(code.splitlines()),
-                    "characteristics": code_characteristics,
-                    "complexity": code_complexity
-                }
-            }
+            linter_started = time.perf_counter()
+            if not syntax_valid:
+                linter_results = self._syntax_error_results(syntax_error)
+            else:
+                try:
+                    linter_results = await linter_analysis_func(code) if linter_analysis_func else self._no_linter_results()
+                except Exception as e:
+                    linter_results = self._linter_error_results(e)
             
+            return linter_results, syntax_time, time.perf_counter() - linter_started
+    
+    @staticmethod
+    def _syntax_outcome(syntax_check: Optional[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+        if syntax_check is None:
+            return True, None # Assume valid if no specific validator
+        return syntax_check.get("valid", True), syntax_check.get("error")
+    
+    @classmethod
+    def _combined_results(cls, syntax_check: Optional[Dict[str, Any]], linter_results: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Linter results of a combined check, or the syntax error results if the code didn't parse."""
+        syntax_valid, syntax_error = cls._syntax_outcome(syntax_check)
+        if not syntax_valid:
+            return cls._syntax_error_results(syntax_error)
+        return linter_results
+    
+    @staticmethod
+    def _syntax_error_results(syntax_error: Optional[str]) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": syntax_error,
+            "errors": None,
+            "raw_output": None,
+            "linter_feedback": [{
+                "type": "linter",
+                "tool": "syntax_checker",
+                "severity": "error",
+                "line": 1, # Default to line 1 if not specific
+                "column": 0,
+                "message": f"Syntax Error: {syntax_error}",
+                "rule_id": "syntax-error"
+            }]
+        }
+    
+    @staticmethod
+    def _no_linter_results() -> Dict[str, Any]:
+        return {"success": True, "linter_feedback": [], "errors": None, "raw_output": "No specific linter for this language."}
+    
+    @staticmethod
+    def _linter_error_results(e: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"Linter analysis failed: {str(e)}",
+            "linter_feedback": [],
+            "raw_output": None,
+            "errors": str(e)
+        }
+    
+    @staticmethod
+    def _ai_error_suggestions(e: Exception) -> list:
+        return [{
+            "type": "info",
+            "severity": "low",
+            "line": None,
+            "message": f"AI analysis unavailable due to an internal error: {str(e)}",
+            "example": None,
+            "category": "internal_error"
+        }]
+    
+    @staticmethod
+    def _prompt_findings(linter_results: Optional[Dict[str, Any]]) -> Optional[list]:
+        """Linter findings to hand to the AI prompt, or None when they aren't used."""
+        if linter_results is None or not AI_PROMPT_CONFIG["include_linter_findings"]:
+            return None
+        return linter_results.get("linter_feedback", [])
+    
+    def _get_ai_suggestions(self, code: str, detected_language: str, linter_feedback: Optional[list] = None) -> list:
+        """Get AI suggestions, converting unexpected failures into an info suggestion."""
+        from analyzers.ai_analyzer import get_ai_suggestions_sync
+        
+        try:
+            with self._tool_slot("openai"):
+                return get_ai_suggestions_sync(code, detected_language, linter_feedback)
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"An unexpected error occurred during analysis: {str(e)}",
-                "language": "unknown",
-                "language_info": {},
-                "linter_feedback": [],
-                "ai_suggestions": [],
-                "summary": {"total_issues": 0, "linter_issues": 0, "ai_suggestions": 0},
-                "debug_info": {
-                    "error_type": type(e).__name__,
-                    "message": str(e),
-                    "code_length": len(code),
-                    "lines_of_code": len(code.splitlines())
-                }
-            }
+            return self._ai_error_suggestions(e)
+    
+    async def _get_ai_suggestions_async(self, code: str, detected_language: str, linter_feedback: Optional[list] = None) -> list:
+        """Async twin of _get_ai_suggestions."""
+        from analyzers.ai_analyzer import get_ai_suggestions_async
+        
+        try:
+            async with self._async_tool_slot("openai"):
+                return await get_ai_suggestions_async(code, detected_language, linter_feedback)
+        except Exception as e:
+            return self._ai_error_suggestions(e)
+    
+    def _stream_ai_suggestions(self, code: str, detected_language: str, linter_feedback: Optional[list] = None) -> Iterator[Dict[str, Any]]:
+        """Streamed twin of _get_ai_suggestions."""
+        from analyzers.ai_analyzer import stream_ai_suggestions
+        
+        try:
+            with self._tool_slot("openai"):
+                yield from stream_ai_suggestions(code, detected_language, linter_feedback)
+        except Exception as e:
+            yield from self._ai_error_suggestions(e)
+    
+    def _compute_metrics(self, code: str, detected_language: str) -> Tuple[Dict[str, Any], Dict[str, Any], float]:
+        """Get code characteristics and complexity, plus the elapsed seconds."""
+        from utils.language_detector import analyze_code_metrics
+        
+        metrics_started = time.perf_counter()
+        code_characteristics, code_complexity = analyze_code_metrics(code, detected_language)
+        return code_characteristics, code_complexity, time.perf_counter() - metrics_started
     
     def get_supported_languages(self) -> list:
         """Get list of supported programming languages."""
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from config import (
+    RESULT_CACHE_CONFIG, OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS, AI_PROMPT_TEMPLATES, SYSTEM_PROMPTS,
+    AI_PROMPT_CONFIG, AI_CHUNKING_CONFIG, AI_CACHE_CONFIG
+)
+
+# Bump when the shape of analysis results changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 2
+
+def compute_cache_key(code: str, language: str, linter: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a content-addressed key for an analysis result.
+
+    The key covers everything that can change the result: the code, the resolved
+    language, the linter configuration and installed tools, and the OpenAI model,
+    prompt and chunking settings.
+
+    Args:
+        code: Source code string
+        language: Resolved programming language
+        linter: The language analyzer's linter_fingerprint (effective linter
+            configuration and tool_stamp of each tool it runs)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    fingerprint = {
+        "version": CACHE_FORMAT_VERSION,
+        "code": code,
+        "language": language,
+        "linter": linter,
+        "openai": {
+            "api_key_set": bool(OPENAI_API_KEY),
+            "base_url": OPENAI_BASE_URL,
+            "model": OPENAI_MODEL,
+            "temperature": OPENAI_TEMPERATURE,
+            "max_tokens": OPENAI_MAX_TOKENS,
+            "prompt_template": AI_PROMPT_TEMPLATES.get(language, AI_PROMPT_TEMPLATES["python"]),
+            "system_prompt": SYSTEM_PROMPTS.get(f"{language}_expert", SYSTEM_PROMPTS["code_reviewer"]),
+            "prompt_config": AI_PROMPT_CONFIG,
+            "chunking": AI_CHUNKING_CONFIG,
+            "per_unit": AI_CACHE_CONFIG["per_unit"]
+        }
+    }
+    payload = json.dumps(fingerprint, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_cacheable(result: Dict[str, Any], linter_results: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Decide whether an analysis result may be stored.
+
+    Only successful results whose linter stage completed and whose AI stage did
+    not fail transiently are cached; the disk tier has no TTL, so a missing tool,
+    timeout or worker error would otherwise be served until the entry is evicted.
+
+    Args:
+        result: Unified analysis result
+        linter_results: Raw output of the linter stage, if one ran
+
+    Returns:
+        True if the result can be cached
+    """
+    if not result.get("success"):
+        return False
+    if linter_results is not None and (linter_results.get("success") is False or linter_results.get("error")):
+        return False
+    for suggestion in result.get("ai_suggestions", []):
+        if suggestion.get("category") in ("api_error", "internal_error"):
+            return False
+    return True
+
+class ResultCache:
+    """Two-tier (in-memory LRU + size-bounded on-disk) cache of analysis results."""
+
+    def __init__(self, memory_entries: int = 128, disk_dir: Optional[str] = None, disk_max_bytes: int = 64 * 1024 * 1024):
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Tuple of (result or None, tier name 'memory'/'disk' or None)
+        """
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                return json.loads(payload), "memory"
+
+        payload = self._read_disk(key)
+        if payload is None:
+            return None, None
+
+        # Promote to the memory tier
+        self._remember(key, payload)
+        try:
+            return json.loads(payload), "disk"
+        except json.JSONDecodeError:
+            return None, None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result in both tiers."""
+        try:
+            payload = json.dumps(result)
+        except (TypeError, ValueError):
+            return # Not JSON-serializable, skip caching
+
+        self._remember(key, payload)
+        self._write_disk(key, payload)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                for path, _, _ in self._disk_entries():
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+            self._disk_bytes = 0
+
+    def _remember(self, key: str, payload: str) -> None:
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = f.read()
+            os.utime(path) # Refresh mtime so eviction is least-recently-used
+            return payload
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, payload: str) -> None:
+        if not self.disk_dir or self.disk_max_bytes <= 0:
+            return
+        path = self._disk_path(key)
+        data = payload.encode("utf-8")
+        if len(data) > self.disk_max_bytes:
+            return
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+            with self._lock:
+                disk_bytes = self._current_disk_bytes()
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(temp_path, path)
+                temp_path = None
+                self._disk_bytes = disk_bytes - previous_size + len(data)
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+        except OSError:
+            pass # The disk tier is best-effort
+        finally:
+            if temp_path is not None:
+                # Not renamed into place: eviction only sees .json entries, so remove it here
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+    def _disk_entries(self):
+        """Yield (path, size, mtime) for every cached file on disk."""
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _current_disk_bytes(self) -> int:
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+        return self._disk_bytes
+
+    def _evict_disk(self) -> None:
+        """Remove least recently used files until the disk tier fits its budget."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_max_bytes * 0.9) # Leave headroom so we don't evict on every write
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+_default_cache: Optional[ResultCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> Optional[ResultCache]:
+    """Get the process-wide result cache configured by RESULT_CACHE_CONFIG (None if disabled)."""
+    global _default_cache
+    if not RESULT_CACHE_CONFIG["enabled"]:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache(
+                memory_entries=RESULT_CACHE_CONFIG["memory_entries"],
+                disk_dir=RESULT_CACHE_CONFIG["disk_dir"],
+                disk_max_bytes=RESULT_CACHE_CONFIG["disk_max_bytes"]
+            )
+        return _default_cache
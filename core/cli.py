@@ -0,0 +1,350 @@
+"""
+Headless command line entry point.
+    
+    python -m core.cli src/ app.py            # analyze files and directories
+    cat snippet.py | python -m core.cli -      # analyze stdin
+    python -m core.cli --format sarif src/ > review.sarif
+    python -m core.cli --check-startup        # verify the cold-start budget
+    python -m core.cli --check-tools          # show which linters were found, and their versions
+    python -m core.cli --train-language-model corpus/  # train the language classifier
+
+Only the analyzer modules for the languages actually found are imported;
+Streamlit, Plotly and pandas are never loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+from config import APP_METADATA, CLI_CONFIG, FILE_EXTENSIONS, LANGUAGE_MODEL_CONFIG, SEVERITY_PRIORITY
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# AI suggestion categories that report on the review itself rather than on the code
+AI_NOTICE_CATEGORIES = ("configuration", "api_error", "internal_error", "limitations", "no_suggestions")
+# Linters reporting 0-based columns (SARIF columns are 1-based)
+ZERO_BASED_COLUMN_TOOLS = ("pylint",)
+
+# Minimum severity priority for each --fail-on threshold
+FAIL_ON_THRESHOLDS = {
+    "never": None,
+    "error": SEVERITY_PRIORITY["error"],
+    "warning": SEVERITY_PRIORITY["warning"]
+}
+
+def collect_inputs(paths: List[str], stdin_filename: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Expand CLI paths into (path, code) pairs.
+    
+    Args:
+        paths: Files, directories, or '-' for stdin
+        stdin_filename: Filename used for language detection of stdin input
+    
+    Returns:
+        List of (display path, source code) tuples
+    """
+    inputs = []
+    for path in paths:
+        if path == "-":
+            inputs.append((stdin_filename or "<stdin>", sys.stdin.read()))
+        elif os.path.isdir(path):
+            for file_path in _walk_source_files(path):
+                inputs.append((file_path, _read_source(file_path)))
+        else:
+            inputs.append((path, _read_source(path)))
+    return inputs
+
+def _walk_source_files(directory: str) -> List[str]:
+    skip_dirs = set(CLI_CONFIG["skip_dirs"])
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d not in skip_dirs and not d.startswith('.'))
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in FILE_EXTENSIONS:
+                found.append(os.path.join(root, name))
+    return found
+
+def _read_source(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def _severity_level(severity: str) -> str:
+    """Map our severities onto SARIF result levels."""
+    priority = SEVERITY_PRIORITY.get((severity or "").lower(), 0)
+    if priority >= SEVERITY_PRIORITY["error"]:
+        return "error"
+    if priority >= SEVERITY_PRIORITY["warning"]:
+        return "warning"
+    return "note"
+
+def _is_ai_notice(issue: Dict[str, Any]) -> bool:
+    """An AI entry reporting on the review itself (missing key, API error, ...) rather than on the code."""
+    return issue.get("type") != "linter" and issue.get("category") in AI_NOTICE_CATEGORIES
+
+def _issue_rule_id(issue: Dict[str, Any]) -> str:
+    if issue.get("type") == "linter":
+        rule = issue.get("rule_id") or issue.get("symbol") or issue.get("message_id") or "issue"
+        return f"{issue.get('tool', 'linter')}/{rule}"
+    return f"ai/{issue.get('category') or 'general'}"
+
+def to_sarif(reports: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Convert analysis results into a SARIF 2.1.0 log.
+    
+    Args:
+        reports: List of (path, analyze_code result) tuples
+    
+    Returns:
+        SARIF log as a JSON-serializable dict
+    """
+    rules = {}
+    results = []
+    notifications = []
+    
+    for path, result in reports:
+        artifact = {"uri": path.replace(os.sep, "/")}
+        if not result.get("success"):
+            notifications.append({
+                "level": "error",
+                "message": {"text": result.get("error") or "Analysis failed"},
+                "locations": [{"physicalLocation": {"artifactLocation": artifact}}]
+            })
+        
+        for issue in result.get("linter_feedback", []) + result.get("ai_suggestions", []):
+            rule_id = _issue_rule_id(issue)
+            if _is_ai_notice(issue):
+                notifications.append({
+                    "level": _severity_level(issue.get("severity")),
+                    "descriptor": {"id": rule_id},
+                    "message": {"text": issue.get("message") or ""},
+                    "locations": [{"physicalLocation": {"artifactLocation": artifact}}]
+                })
+                continue
+            rules.setdefault(rule_id, {"id": rule_id})
+            
+            physical_location = {"artifactLocation": artifact}
+            line = issue.get("line")
+            if isinstance(line, int) and line > 0:
+                region = {"startLine": line}
+                column = issue.get("column")
+                if isinstance(column, int) and issue.get("tool") in ZERO_BASED_COLUMN_TOOLS:
+                    column += 1
+                if isinstance(column, int) and column > 0:
+                    region["startColumn"] = column
+                physical_location["region"] = region
+            
+            sarif_result = {
+                "ruleId": rule_id,
+                "level": _severity_level(issue.get("severity")),
+                "message": {"text": issue.get("message") or ""},
+                "locations": [{"physicalLocation": physical_location}]
+            }
+            if issue.get("example"):
+                sarif_result["properties"] = {"example": issue["example"]}
+            results.append(sarif_result)
+    
+    return {
+        "version": "2.1.0",
+        "$schema": SARIF_SCHEMA,
+        "runs": [{
+            "tool": {
+                "driver": {
+                    "name": APP_METADATA["name"],
+                    "version": APP_METADATA["version"],
+                    "rules": list(rules.values())
+                }
+            },
+            "invocations": [{
+                "executionSuccessful": not any(notification["level"] == "error" for notification in notifications),
+                "toolExecutionNotifications": notifications
+            }],
+            "results": results
+        }]
+    }
+
+def to_json(reports: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Wrap analysis results with their paths in a JSON report."""
+    return {
+        "tool": APP_METADATA["name"],
+        "version": APP_METADATA["version"],
+        "results": [dict(result, path=path) for path, result in reports]
+    }
+
+def should_fail(reports: List[Tuple[str, Dict[str, Any]]], fail_on: str) -> bool:
+    """
+    Check whether any issue reaches the --fail-on severity threshold.
+    
+    AI notices are not findings, so an OpenAI outage or a missing API key
+    doesn't fail the run.
+    """
+    threshold = FAIL_ON_THRESHOLDS[fail_on]
+    if threshold is None:
+        return False
+    for _, result in reports:
+        for issue in result.get("linter_feedback", []) + result.get("ai_suggestions", []):
+            if _is_ai_notice(issue):
+                continue
+            if SEVERITY_PRIORITY.get((issue.get("severity") or "").lower(), 0) >= threshold:
+                return True
+    return False
+
+def measure_startup(runs: int = 5) -> Dict[str, Any]:
+    """
+    Measure the cold-start cost of a no-op CLI run in fresh interpreters.
+    
+    Each run calls main() on empty stdin, so it loads what every real run
+    loads (the analyzer, language detector, result cache and tool probe)
+    but analyzes nothing.
+    
+    Returns:
+        Dictionary with median timings, the budget, and any forbidden modules that got imported
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = (
+        "import io, json, sys, time\n"
+        "t = time.perf_counter()\n"
+        "sys.stdin, sys.stdout = io.StringIO(''), io.StringIO()\n"
+        "from core.cli import main\n"
+        "main(['-'])\n"
+        "sys.stdout = sys.__stdout__\n"
+        "print(json.dumps({'run_ms': (time.perf_counter() - t) * 1000, 'modules': sorted(sys.modules)}))\n"
+    )
+    
+    def run(code: str) -> Tuple[float, str]:
+        import time
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True)
+        return (time.perf_counter() - started) * 1000, completed.stdout
+    
+    baseline_ms = statistics.median(run("pass")[0] for _ in range(runs))
+    samples = [run(probe) for _ in range(runs)]
+    total_ms = statistics.median(elapsed for elapsed, _ in samples)
+    probe_output = json.loads(samples[-1][1])
+    loaded = {name.split('.')[0] for name in probe_output["modules"]}
+    forbidden = sorted(loaded & set(CLI_CONFIG["forbidden_modules"]))
+    overhead_ms = max(0.0, total_ms - baseline_ms)
+    
+    return {
+        "interpreter_ms": round(baseline_ms, 1),
+        "cold_start_ms": round(total_ms, 1),
+        "overhead_ms": round(overhead_ms, 1),
+        "run_ms": round(probe_output["run_ms"], 1),
+        "budget_ms": CLI_CONFIG["startup_budget_ms"],
+        "within_budget": overhead_ms <= CLI_CONFIG["startup_budget_ms"] and not forbidden,
+        "forbidden_modules_loaded": forbidden
+    }
+
+def train_language_model(paths: List[str]) -> Dict[str, Any]:
+    """
+    Train the language classifier on source files labeled by their extension.
+    
+    The model is saved to LANGUAGE_MODEL_CONFIG["path"], where detection
+    picks it up.
+    
+    Args:
+        paths: Files and directories of training code
+    
+    Returns:
+        Dictionary with the model path, files per language and vocabulary size
+    """
+    from utils.language_model import train
+    
+    documents = []
+    for path, code in collect_inputs(paths):
+        language = FILE_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if language and code.strip():
+            documents.append((code, language))
+    model = train(documents)
+    
+    path = LANGUAGE_MODEL_CONFIG["path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    model.save(path)
+    
+    files = {}
+    for _, language in documents:
+        files[language] = files.get(language, 0) + 1
+    return {
+        "path": path,
+        "files": files,
+        "vocabulary": len(model.vocabulary),
+        "temperature": round(model.temperature, 3),
+        "length_power": round(model.length_power, 2)
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="Run the code review pipeline without the Streamlit UI and print JSON or SARIF."
+    )
+    parser.add_argument("paths", nargs="*", help="Files or directories to analyze, or '-' for stdin")
+    parser.add_argument("-l", "--language", help="Force a language instead of auto-detecting it")
+    parser.add_argument("-f", "--format", choices=["json", "sarif"], default="json", help="Output format (default: json)")
+    parser.add_argument("-o", "--output", help="Write the report to a file instead of stdout")
+    parser.add_argument("--stdin-filename", help="Filename used to detect the language of stdin input")
+    parser.add_argument("--workers", type=int, help="Files analyzed at once")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the result cache")
+    parser.add_argument("--fail-on", choices=list(FAIL_ON_THRESHOLDS), default="never",
+                        help="Exit with status 1 if an issue of this severity or higher is found")
+    parser.add_argument("--check-startup", action="store_true",
+                        help="Measure cold-start time against the configured budget and exit")
+    parser.add_argument("--check-tools", action="store_true",
+                        help="Probe for the external linters and compilers, print their paths and versions, and exit")
+    parser.add_argument("--train-language-model", action="store_true",
+                        help="Train the language classifier on the given paths (labeled by file extension) and exit")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.check_startup:
+        report = measure_startup()
+        print(json.dumps(report, indent=2))
+        return 0 if report["within_budget"] else 1
+    
+    if args.check_tools:
+        from config import validate_environment
+        print(json.dumps(validate_environment()["tools"], indent=2))
+        return 0
+    
+    if args.train_language_model:
+        if not args.paths:
+            parser.error("--train-language-model needs files or directories of training code")
+        try:
+            print(json.dumps(train_language_model(args.paths), indent=2))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        return 0
+    
+    paths = args.paths or (["-"] if not sys.stdin.isatty() else [])
+    if not paths:
+        parser.error("no input: pass files, directories, or '-' for stdin")
+    
+    try:
+        inputs = collect_inputs(paths, args.stdin_filename)
+    except OSError as e:
+        parser.error(str(e))
+    
+    from core.analyzer import CodeAnalyzer
+    
+    analyzer = CodeAnalyzer(use_cache=not args.no_cache)
+    results = analyzer.analyze_many(
+        [(code, args.language, path) for path, code in inputs],
+        max_workers=args.workers
+    )
+    reports = [(path, result) for (path, _), result in zip(inputs, results)]
+    
+    document = to_sarif(reports) if args.format == "sarif" else to_json(reports)
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    
+    return 1 if should_fail(reports, args.fail_on) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import ast
+import io
+import re
+from typing import List, NamedTuple, Optional
+from utils.python_ast import parse_python
+
+# Languages whose top-level units are delimited by braces
+BRACE_LANGUAGES = {"javascript", "typescript", "java", "c_cpp", "go", "html_css"}
+
+class CodeUnit(NamedTuple):
+    """A contiguous run of source lines (1-based, inclusive) forming one top-level unit."""
+    start_line: int
+    end_line: int
+    text: str
+    name: Optional[str] = None
+
+def split_lines(code: str) -> List[str]:
+    """
+    Split code into lines at \n only, keeping the line endings.
+    
+    Line numbers from ast, tokenize and the AI model count \n-terminated
+    lines; str.splitlines() also breaks at \f, \x0b, \x1c-\x1e, \x85 and
+    \u2028 and would shift every line after one of them.
+    """
+    return io.StringIO(code).readlines()
+
+def split_units(code: str, language: str, max_chars: Optional[int] = None) -> List[CodeUnit]:
+    """
+    Split source code into top-level units such as functions, classes and blocks.
+    
+    The units cover every line of the input exactly once, in order. Comments
+    and blank lines between units belong to the unit that follows them.
+    
+    Args:
+        code: Source code string
+        language: Programming language
+        max_chars: If set, units larger than this are split further (class
+            bodies, nested blocks, and finally plain line ranges)
+    
+    Returns:
+        List of CodeUnit
+    """
+    lines = split_lines(code)
+    if not lines:
+        return []
+    
+    if language == "python":
+        ranges = _python_ranges(code, lines, max_chars)
+    elif language in BRACE_LANGUAGES:
+        ranges = _brace_ranges(lines, 0, len(lines), 0, max_chars)
+    else:
+        ranges = [(1, len(lines), None)]
+    
+    units = []
+    for start, end, name in ranges:
+        text = "".join(lines[start - 1:end])
+        if max_chars and len(text) > max_chars:
+            units.extend(_line_ranges(lines, start, end, max_chars, name))
+        else:
+            units.append(CodeUnit(start, end, text, name))
+    return units
+
+def _python_ranges(code: str, lines: List[str], max_chars: Optional[int]):
+    tree = parse_python(code).tree # Usually the parse syntax validation already did
+    if tree is None:
+        return _python_fallback_ranges(lines)
+    if not tree.body:
+        return [(1, len(lines), None)]
+    return _python_body_ranges(tree.body, lines, 1, len(lines), max_chars)
+
+def _python_body_ranges(body: List[ast.stmt], lines: List[str], first_line: int, last_line: int, max_chars: Optional[int]):
+    """Ranges for a statement list: one per def/class, consecutive other statements grouped."""
+    ranges = []
+    start = first_line
+    pending_simple = None # (start, end) of a run of plain statements
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    
+    for node in body:
+        node_end = node.end_lineno
+        if not isinstance(node, definitions):
+            pending_simple = (pending_simple[0] if pending_simple else start, node_end)
+            start = node_end + 1
+            continue
+        if pending_simple:
+            ranges.append((pending_simple[0], pending_simple[1], None))
+            start = pending_simple[1] + 1
+            pending_simple = None
+        
+        text_len = sum(len(line) for line in lines[start - 1:node_end])
+        if max_chars and text_len > max_chars and isinstance(node, ast.ClassDef) and len(node.body) > 1:
+            # Split a large class at its methods; the header goes with the first one
+            inner = _python_body_ranges(node.body, lines, start, node_end, max_chars)
+            ranges.extend((s, e, f"{node.name}.{n}" if n else node.name) for s, e, n in inner)
+        else:
+            ranges.append((start, node_end, node.name))
+        start = node_end + 1
+    
+    if pending_simple:
+        ranges.append((pending_simple[0], max(pending_simple[1], last_line), None))
+    elif ranges:
+        # Trailing comments/blank lines belong to the last unit
+        s, _, n = ranges[-1]
+        ranges[-1] = (s, last_line, n)
+    return ranges
+
+_PYTHON_UNIT_START = re.compile(r'^(?:async\s+def|def|class)\s+(\w+)|^@')
+
+def _python_fallback_ranges(lines: List[str]):
+    """Boundaries at column-0 def/class/decorator lines for code that doesn't parse."""
+    ranges = []
+    start, name = 1, None
+    in_decorator = False
+    for index, line in enumerate(lines, 1):
+        match = _PYTHON_UNIT_START.match(line)
+        if not match:
+            in_decorator = False
+            continue
+        if index > start and not in_decorator:
+            ranges.append((start, index - 1, name))
+            start = index
+        name = match.group(1) or name
+        in_decorator = match.group(1) is None
+    ranges.append((start, len(lines), name))
+    return ranges
+
+def _brace_ranges(lines: List[str], first: int, last: int, level: int, max_chars: Optional[int], depth: int = 0):
+    """
+    Ranges that end wherever brace depth returns to `level` at the end of a line.
+    
+    first/last are 0-based line indexes (last exclusive) and depth is the brace
+    depth at `first`. Strings and comments are skipped so braces inside them
+    don't count.
+    """
+    ranges = []
+    start = first
+    closed_block = False
+    in_block_comment = False
+    
+    for index in range(first, last):
+        line = lines[index]
+        i = 0
+        quote = None
+        while i < len(line):
+            char = line[i]
+            if in_block_comment:
+                if line.startswith("*/", i):
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if char == "\\":
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif line.startswith("//", i):
+                break
+            elif line.startswith("/*", i):
+                in_block_comment = True
+                i += 1
+            elif char in "\"'`":
+                quote = char
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == level:
+                    closed_block = True
+            i += 1
+        
+        if closed_block and depth <= level:
+            ranges.append((start + 1, index + 1))
+            start = index + 1
+            closed_block = False
+    
+    if start < last:
+        if ranges:
+            s, _ = ranges[-1]
+            ranges[-1] = (s, last) # Trailing lines belong to the last unit
+        else:
+            ranges.append((first + 1, last))
+    
+    result = []
+    for s, e in ranges:
+        text_len = sum(len(line) for line in lines[s - 1:e])
+        if max_chars and text_len > max_chars and level < 3:
+            inner = _brace_ranges(lines, s - 1, e, level + 1, max_chars, depth=level)
+            if len(inner) > 1:
+                result.extend(inner)
+                continue
+        result.append((s, e, _brace_unit_name(lines, s, e)))
+    return result
+
+_BRACE_NAME = re.compile(r'(?:class|interface|struct|enum|function|func)\s+(\w+)|(\w+)\s*\([^;{]*\)\s*(?:const\s*)?(?:throws [\w., ]+)?\{')
+
+def _brace_unit_name(lines: List[str], start: int, end: int) -> Optional[str]:
+    for line in lines[start - 1:end]:
+        match = _BRACE_NAME.search(line)
+        if match:
+            return match.group(1) or match.group(2)
+    return None
+
+def _line_ranges(lines: List[str], start: int, end: int, max_chars: int, name: Optional[str]) -> List[CodeUnit]:
+    """Last resort: cut a range into consecutive line runs of at most max_chars."""
+    units = []
+    chunk_start, size = start, 0
+    for line_no in range(start, end + 1):
+        length = len(lines[line_no - 1])
+        if size and size + length > max_chars:
+            units.append(CodeUnit(chunk_start, line_no - 1, "".join(lines[chunk_start - 1:line_no - 1]), name))
+            chunk_start, size = line_no, 0
+        size += length
+    units.append(CodeUnit(chunk_start, end, "".join(lines[chunk_start - 1:end]), name))
+    return units
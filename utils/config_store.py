@@ -0,0 +1,52 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+from utils.scratch import scratch_root
+
+# Path of each rendered config, by content hash
+_paths: Dict[str, str] = {}
+_lock = threading.Lock()
+_directory: Optional[str] = None
+
+def config_file(config: Dict[str, Any], suffix: str = ".json") -> str:
+    """
+    Path of a read-only file holding config as JSON.
+    
+    Each distinct config is written once per process, into a private
+    directory under the scratch root, and named by the hash of its content;
+    later calls with equal content return the same path without touching the
+    disk. Concurrent analyses can share the files since nothing rewrites them.
+    
+    Args:
+        config: JSON-serializable linter configuration
+        suffix: File name suffix (tools pick the config format from it)
+    
+    Returns:
+        Absolute path of the file
+    """
+    text = json.dumps(config, sort_keys=True, indent=2)
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16] + suffix
+    path = _paths.get(key)
+    if path is None:
+        with _lock:
+            path = _paths.get(key)
+            if path is None:
+                path = os.path.join(_store_directory(), key)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.chmod(path, 0o444)
+                _paths[key] = path
+    return path
+
+def _store_directory() -> str:
+    """Create the store's directory on first use (owner-only, removed at exit)."""
+    global _directory
+    if _directory is None:
+        _directory = tempfile.mkdtemp(prefix="linter-configs-", dir=scratch_root())
+        atexit.register(shutil.rmtree, _directory, True)
+    return _directory
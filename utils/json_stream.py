@@ -0,0 +1,84 @@
+import json
+from typing import Any, List, Optional
+
+class JSONArrayStream:
+    """
+    Incremental parser for a JSON array whose text arrives in pieces.
+    
+    Each top-level element that is an object or array is decoded as soon as
+    its closing bracket has been fed, without waiting for the rest of the
+    array. Text before the opening bracket (e.g. a markdown code fence) is
+    skipped, and an element that fails to decode is dropped.
+    
+    Usage:
+        parser = JSONArrayStream()
+        for piece in pieces:
+            for item in parser.feed(piece):
+                ...
+    """
+    
+    def __init__(self):
+        self._text = ""
+        self._pos = 0 # Next index of _text to scan
+        self._depth = 0 # Bracket depth; 1 means directly inside the outer array
+        self._element_start: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.done = False
+    
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add the next piece of text.
+        
+        Args:
+            text: Text following everything fed so far
+        
+        Returns:
+            The elements completed by this piece, in order
+        """
+        if self.done:
+            return []
+        
+        self._text += text
+        text = self._text
+        completed = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            char = text[i]
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if self._depth == 1:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                elif self._depth == 1 and self._element_start is not None:
+                    try:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._element_start = None
+            i += 1
+        
+        # Only the element in progress needs to be kept
+        keep = self._element_start if self._element_start is not None else i
+        self._text = text[keep:]
+        self._pos = i - keep
+        if self._element_start is not None:
+            self._element_start = 0
+        return completed
@@ -1,6 +1,7 @@
+import os
 import re
-from typing import Optional, Dict, Any, List
-from config import LANGUAGE_PATTERNS, FILE_EXTENSIONS, LANGUAGE_INFO 
+from typing import Optional, Dict, Any, List, NamedTuple, Pattern, Sequence, Tuple
+from config import LANGUAGE_PATTERNS, FILE_EXTENSIONS, LANGUAGE_INFO, LANGUAGE_DETECTION_CONFIG, LANGUAGE_MODEL_CONFIG
 
 def detect_language(code: str, filename: Optional[str] = None) -> str:
     """
@@ -13,21 +14,45 @@ def detect_language(code: str, filename: Optional[str] = None) -> str:
     Returns:
         Detected language name ('python', 'javascript', etc., or 'unknown')
     """
-    if not code.strip():
-        return "unknown"
-    
-    if filename:
-        lang_from_extension = detect_language_from_filename(filename)
-        if lang_from_extension != "unknown":
-            return lang_from_extension
+    return detect_languages([code], [filename])[0]
+
+def detect_languages(codes: Sequence[str], filenames: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+    """
+    Detect the languages of many code strings at once.
     
-    # Then try shebang detection (if patterns are defined in LANGUAGE_INFO)
-    lang_from_shebang = detect_language_from_shebang(code)
-    if lang_from_shebang != "unknown":
-        return lang_from_shebang
+    Same steps as detect_language, but the strings left after the extension
+    and shebang checks go through the trained classifier as one vectorized
+    batch.
     
-    # Finally, use pattern matching
-    return detect_language_from_patterns(code)
+    Args:
+        codes: Source code strings
+        filenames: Optional filename for each code string
+        
+    Returns:
+        Detected language name for each code string
+    """
+    filenames = filenames or [None] * len(codes)
+    languages: List[Optional[str]] = []
+    for code, filename in zip(codes, filenames):
+        if not code or code.isspace():
+            languages.append("unknown")
+            continue
+        language = detect_language_from_filename(filename) if filename else "unknown"
+        if language == "unknown":
+            # Then try shebang detection (if patterns are defined in LANGUAGE_INFO)
+            language = detect_language_from_shebang(code)
+        languages.append(None if language == "unknown" else language)
+    
+    # Then the trained classifier, if there is one and it is confident enough
+    pending = [index for index, language in enumerate(languages) if language is None]
+    model = _language_model() if pending else None
+    if model:
+        for index, (language, probability) in zip(pending, model.classify([codes[i] for i in pending])):
+            if probability >= LANGUAGE_MODEL_CONFIG["min_probability"]:
+                languages[index] = language
+    
+    # Finally, use pattern matching (on a bounded sample of large inputs)
+    return [language or _detector.detect_sample(code) for code, language in zip(codes, languages)]
 
 def detect_language_from_filename(filename: str) -> str:
     """
@@ -59,21 +84,7 @@ def detect_language_from_shebang(code: str) -> str:
     Returns:
         Language name or 'unknown'
     """
-    lines = code.split('\n')
-    if not lines:
-        return "unknown"
-    
-    first_line = lines[0].strip()
-    if not first_line.startswith('#!'):
-        return "unknown"
-    
-    # Check against known shebang patterns
-    for language, info in LANGUAGE_INFO.items():
-        for pattern in info.get('shebang_patterns', []):
-            if re.search(pattern, first_line, re.IGNORECASE):
-                return language
-    
-    return "unknown"
+    return _detector.detect_shebang(code)
 
 def detect_language_from_patterns(code: str) -> str:
     """
@@ -85,12 +96,52 @@ def detect_language_from_patterns(code: str) -> str:
     Returns:
         Language name or 'unknown'
     """
-    language_scores = {}
+    return _detector.detect(code)
+
+def get_language_confidence(code: str, language: str) -> float:
+    """
+    Get confidence score for a specific language detection.
     
-    # First, check for very distinctive patterns that should take priority
+    With a trained classifier this is its calibrated probability that the
+    code is in the language; without one, the fraction of the language's
+    patterns found in the code. No classifier ships with the tool, so the
+    pattern score is what is returned until one is trained (see
+    LANGUAGE_MODEL_CONFIG).
     
-    # HTML/CSS - Check first as it's most distinctive
-    html_css_distinctive = [
+    Args:
+        code: Source code string
+        language: Language to check confidence for
+        
+    Returns:
+        Confidence score between 0.0 and 1.0
+    """
+    model = _language_model()
+    if model:
+        if language not in model.languages:
+            return 0.0
+        return float(model.predict_proba([code])[0, model.languages.index(language)])
+    return _detector.confidence(code, language)
+
+_model = None # None until first use, then the LanguageModel or False
+
+def _language_model():
+    """The trained classifier, loaded on first use; None without a model file (NumPy isn't imported then)."""
+    global _model
+    if _model is None:
+        path = LANGUAGE_MODEL_CONFIG["path"]
+        _model = False
+        if path and os.path.exists(path):
+            try:
+                from utils.language_model import LanguageModel
+                _model = LanguageModel.load(path)
+            except Exception:
+                pass # An unreadable model just leaves detection to the patterns
+    return _model or None
+
+# Very distinctive patterns, scored DISTINCTIVE_WEIGHT per match (case-insensitive, multiline).
+# HTML/CSS comes first as it's most distinctive; the order also breaks score ties.
+DISTINCTIVE_PATTERNS: Dict[str, List[str]] = {
+    'html_css': [
         r'<!DOCTYPE\s+html>',
         r'<html[^>]*>',
         r'<head\s*>',
@@ -101,10 +152,8 @@ def detect_language_from_patterns(code: str) -> str:
         r'</\w+>',
         r'\.[\w-]+\s*\{[^}]*\}',  # CSS class with rules
         r'#[\w-]+\s*\{[^}]*\}'   # CSS ID with rules
-    ]
-    
-    # Python - very distinctive patterns
-    python_distinctive = [
+    ],
+    'python': [
         r'def\s+\w+\s*$$[^)]*$$\s*:',
         r'class\s+\w+\s*$$[^)]*$$\s*:',
         r'if\s+__name__\s*==\s*[\'"]__main__[\'"]',
@@ -118,10 +167,8 @@ def detect_language_from_patterns(code: str) -> str:
         r'try\s*:\s*$',
         r'except\s+.*:\s*$',
         r'print\s*\('
-    ]
-    
-    # Java - very distinctive patterns
-    java_distinctive = [
+    ],
+    'java': [
         r'public\s+class\s+\w+',
         r'public\s+static\s+void\s+main\s*\(',
         r'System\.out\.println',
@@ -131,10 +178,8 @@ def detect_language_from_patterns(code: str) -> str:
         r'implements\s+\w+',
         r'private\s+\w+\s+\w+\s*[;=]',
         r'public\s+\w+\s+\w+\s*[;=]'
-    ]
-    
-    # C/C++ - very distinctive patterns  
-    cpp_distinctive = [
+    ],
+    'c_cpp': [
         r'#include\s*<[^>]+>',
         r'std::\w+',
         r'cout\s*<<',
@@ -146,10 +191,8 @@ def detect_language_from_patterns(code: str) -> str:
         r'int\s+main\s*\(',
         r'printf\s*\(',
         r'scanf\s*\('
-    ]
-    
-    # TypeScript - very distinctive patterns
-    ts_distinctive = [
+    ],
+    'typescript': [
         r':\s*\w+\s*[=;]',  # Type annotations
         r'interface\s+\w+\s*\{',
         r'type\s+\w+\s*=',
@@ -160,10 +203,8 @@ def detect_language_from_patterns(code: str) -> str:
         r'as\s+\w+',
         r'<\w+>',  # Generic types
         r'function\s+\w+\s*$$[^)]*$$\s*:\s*\w+'
-    ]
-    
-    # Go - very distinctive patterns
-    go_distinctive = [
+    ],
+    'go': [
         r'package\s+\w+',
         r'func\s+main\s*$$\s*$$',
         r'fmt\.Print',
@@ -173,10 +214,9 @@ def detect_language_from_patterns(code: str) -> str:
         r'defer\s+',
         r'range\s+',
         r'import\s*\(\s*$'
-    ]
-    
+    ],
     # JavaScript - be more specific to avoid false positives
-    javascript_distinctive = [
+    'javascript': [
         r'function\s+\w+\s*$$[^)]*$$\s*\{',  # Function without type annotations
         r'const\s+\w+\s*=\s*function',
         r'let\s+\w+\s*=\s*function',
@@ -195,120 +235,378 @@ def detect_language_from_patterns(code: str) -> str:
         r'\.then\s*\(',
         r'\.catch\s*\('
     ]
-    
-    # Check distinctive patterns first with high scores
-    distinctive_patterns = {
-        'html_css': html_css_distinctive,
-        'python': python_distinctive,
-        'java': java_distinctive,
-        'c_cpp': cpp_distinctive, 
-        'typescript': ts_distinctive,
-        'go': go_distinctive,
-        'javascript': javascript_distinctive
-    }
-    
-    # Score distinctive patterns with high weight
-    for language, patterns in distinctive_patterns.items():
-        score = 0
-        for pattern in patterns:
-            matches = len(re.findall(pattern, code, re.MULTILINE | re.IGNORECASE))
-            if matches > 0:
-                score += matches * 10  # High weight for distinctive patterns
-        language_scores[language] = score
-    
-    # Additional negative scoring to prevent false positives
-    
+}
+DISTINCTIVE_WEIGHT = 10
+
+# Applied in order to prevent false positives: if any trigger matches (case-sensitive),
+# boost the language and lower the others (never below zero)
+SCORE_ADJUSTMENTS: List[Tuple[List[str], str, int, Dict[str, int]]] = [
     # If HTML tags are present, it's definitely HTML/CSS, not TypeScript
-    if re.search(r'</?[a-zA-Z][^>]*>', code):
-        language_scores['html_css'] = language_scores.get('html_css', 0) + 50
-        language_scores['typescript'] = max(0, language_scores.get('typescript', 0) - 30)
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 20)
-    
+    ([r'</?[a-zA-Z][^>]*>'], 'html_css', 50, {'typescript': 30, 'javascript': 20}),
     # If Python-specific syntax is present, it's definitely Python
-    if (re.search(r'def\s+\w+\s*$$[^)]*$$\s*:', code) or 
-        re.search(r'elif\s+', code) or
-        re.search(r'if\s+__name__\s*==', code)):
-        language_scores['python'] = language_scores.get('python', 0) + 50
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 30)
-        language_scores['typescript'] = max(0, language_scores.get('typescript', 0) - 30)
-    
+    ([r'def\s+\w+\s*$$[^)]*$$\s*:', r'elif\s+', r'if\s+__name__\s*=='], 'python', 50, {'javascript': 30, 'typescript': 30}),
     # If Java-specific syntax is present, it's definitely Java
-    if (re.search(r'public\s+class\s+\w+', code) or 
-        re.search(r'System\.out\.println', code) or
-        re.search(r'public\s+static\s+void\s+main', code)):
-        language_scores['java'] = language_scores.get('java', 0) + 50
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 30)
-        language_scores['typescript'] = max(0, language_scores.get('typescript', 0) - 30)
-    
+    ([r'public\s+class\s+\w+', r'System\.out\.println', r'public\s+static\s+void\s+main'], 'java', 50, {'javascript': 30, 'typescript': 30}),
     # If C/C++-specific syntax is present, it's definitely C/C++
-    if (re.search(r'#include\s*<', code) or 
-        re.search(r'std::', code) or
-        re.search(r'cout\s*<<', code)):
-        language_scores['c_cpp'] = language_scores.get('c_cpp', 0) + 50
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 30)
-        language_scores['typescript'] = max(0, language_scores.get('typescript', 0) - 30)
-    
+    ([r'#include\s*<', r'std::', r'cout\s*<<'], 'c_cpp', 50, {'javascript': 30, 'typescript': 30}),
     # If TypeScript-specific syntax is present, it's TypeScript not JavaScript
-    if (re.search(r':\s*\w+\s*[=;]', code) or 
-        re.search(r'interface\s+\w+', code) or
-        re.search(r'type\s+\w+\s*=', code)):
-        language_scores['typescript'] = language_scores.get('typescript', 0) + 50
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 30)
-    
+    ([r':\s*\w+\s*[=;]', r'interface\s+\w+', r'type\s+\w+\s*='], 'typescript', 50, {'javascript': 30}),
     # If Go-specific syntax is present, it's definitely Go
-    if (re.search(r'package\s+\w+', code) or 
-        re.search(r'func\s+main\s*$$\s*$$', code) or
-        re.search(r'fmt\.', code)):
-        language_scores['go'] = language_scores.get('go', 0) + 50
-        language_scores['javascript'] = max(0, language_scores.get('javascript', 0) - 30)
-        language_scores['typescript'] = max(0, language_scores.get('typescript', 0) - 30)
-    
-    # If no distinctive patterns matched strongly, fall back to general patterns
-    if not any(score >= 10 for score in language_scores.values()):
-        for language, patterns in LANGUAGE_PATTERNS.items():
-            if language not in language_scores:
-                language_scores[language] = 0
-                
-            for pattern in patterns:
-                matches = len(re.findall(pattern, code, re.MULTILINE | re.IGNORECASE))
-                # Give JavaScript lower weight to prevent false positives
-                weight = 1 if language == 'javascript' else 2
-                language_scores[language] += matches * weight
-    
-    # Return the language with the highest score
-    if language_scores:
-        best_language = max(language_scores, key=language_scores.get)
-        best_score = language_scores[best_language]
+    ([r'package\s+\w+', r'func\s+main\s*$$\s*$$', r'fmt\.'], 'go', 50, {'javascript': 30, 'typescript': 30})
+]
+
+class LanguageDetector:
+    """
+    Pattern-based language detector with every regex compiled once.
+    
+    Scoring: each match of a distinctive pattern counts DISTINCTIVE_WEIGHT,
+    then SCORE_ADJUSTMENTS are applied in order. Only if no language reached
+    DISTINCTIVE_WEIGHT are the general LANGUAGE_PATTERNS counted (JavaScript
+    at half weight). The best score wins if it is at least min_score.
+    
+    Matching goes through a _TextScan of the code: the literals the patterns
+    start with are located once each with str.find and shared by every
+    pattern that starts with them, and a pattern's regex is then only tried
+    at those positions. The counts are the ones finditer would give.
+    """
+    
+    def __init__(self, distinctive: Dict[str, List[str]] = DISTINCTIVE_PATTERNS,
+                 adjustments: List[Tuple[List[str], str, int, Dict[str, int]]] = SCORE_ADJUSTMENTS,
+                 general: Dict[str, List[str]] = LANGUAGE_PATTERNS,
+                 language_info: Dict[str, Dict[str, Any]] = LANGUAGE_INFO, min_score: int = 5,
+                 sample_chars: int = LANGUAGE_DETECTION_CONFIG["sample_chars"],
+                 min_margin: int = LANGUAGE_DETECTION_CONFIG["min_margin"]):
+        self.min_score = min_score
+        self.sample_chars = sample_chars
+        self.min_margin = min_margin
+        self._distinctive = [(language, [_ScanPattern.compile(p, True) for p in patterns]) for language, patterns in distinctive.items()]
+        self._adjustments = [
+            ([_ScanPattern.compile(p, False) for p in triggers], language, boost, penalties)
+            for triggers, language, boost, penalties in adjustments
+        ]
+        self._general = {language: [_ScanPattern.compile(p, True) for p in patterns] for language, patterns in general.items()}
+        self._shebangs = [
+            (language, [re.compile(p, re.IGNORECASE) for p in info.get('shebang_patterns', [])])
+            for language, info in language_info.items()
+        ]
+    
+    def score(self, code: str) -> Dict[str, int]:
+        """Score every language for the given code (higher is more likely)."""
+        scan = _TextScan(code)
+        scores = {
+            language: DISTINCTIVE_WEIGHT * sum(scan.count(pattern) for pattern in patterns)
+            for language, patterns in self._distinctive
+        }
+        
+        for triggers, language, boost, penalties in self._adjustments:
+            if any(scan.search(trigger) for trigger in triggers):
+                scores[language] = scores.get(language, 0) + boost
+                for other, penalty in penalties.items():
+                    scores[other] = max(0, scores.get(other, 0) - penalty)
+        
+        # If no distinctive patterns matched strongly, fall back to general patterns
+        if not any(score >= DISTINCTIVE_WEIGHT for score in scores.values()):
+            for language, patterns in self._general.items():
+                weight = 1 if language == 'javascript' else 2 # Lower weight prevents JavaScript false positives
+                scores[language] = scores.get(language, 0) + weight * sum(scan.count(pattern) for pattern in patterns)
+        return scores
+    
+    def detect(self, code: str) -> str:
+        """Return the best-scoring language, or 'unknown' below min_score."""
+        return self._best(self.score(code))
+    
+    def detect_sample(self, code: str) -> str:
+        """
+        Like detect, but reading at most sample_chars of the code.
         
-        # Only return if we have a reasonable confidence
-        if best_score >= 5:  # Lowered threshold slightly
-            return best_language
+        Longer code is scored on its head first, then with a middle slice and
+        finally the tail added, stopping as soon as the best language leads the
+        runner-up by min_margin. Slices are trimmed to whole lines where the
+        slice contains a line break, so the cost doesn't depend on the size
+        of the input, even for a minified file on one line.
+        """
+        if len(code) <= self.sample_chars:
+            return self.detect(code)
+        
+        part = self.sample_chars // 3
+        middle = (len(code) - part) // 2
+        sample = ""
+        for start, end in ((0, part), (middle, middle + part), (len(code) - part, len(code))):
+            sample += ("\n" if sample else "") + _whole_lines(code, start, end)
+            scores = self.score(sample)
+            top = sorted(scores.values(), reverse=True) + [0, 0]
+            if top[0] - top[1] >= self.min_margin:
+                break
+        return self._best(scores)
+    
+    def _best(self, scores: Dict[str, int]) -> str:
+        if scores:
+            best_language = max(scores, key=scores.get)
+            if scores[best_language] >= self.min_score:
+                return best_language
+        return "unknown"
     
-    return "unknown"
+    def detect_shebang(self, code: str) -> str:
+        """Match the first line against the shebang patterns of LANGUAGE_INFO."""
+        match = _SHEBANG_LINE.match(code) # Reads only the first line, however long the code
+        if not match:
+            return "unknown"
+        first_line = match.group(1).strip()
+        for language, patterns in self._shebangs:
+            if any(pattern.search(first_line) for pattern in patterns):
+                return language
+        return "unknown"
+    
+    def confidence(self, code: str, language: str) -> float:
+        """Fraction of the language's general patterns that occur in the code."""
+        patterns = self._general.get(language)
+        if not patterns:
+            return 0.0
+        scan = _TextScan(code)
+        return sum(1 for pattern in patterns if scan.search(pattern)) / len(patterns)
 
-def get_language_confidence(code: str, language: str) -> float:
+_SHEBANG_LINE = re.compile(r'[^\S\n]*(#![^\n]*)')
+
+def _whole_lines(code: str, start: int, end: int) -> str:
+    """code[start:end] without the partial lines at either end (unless that would leave nothing)."""
+    if start > 0:
+        newline = code.find("\n", start - 1, end)
+        if newline != -1:
+            start = newline + 1
+    if end < len(code):
+        newline = code.rfind("\n", start, end)
+        if newline != -1:
+            end = newline
+    return code[start:end]
+
+class _ScanPattern(NamedTuple):
+    regex: Pattern[str]
+    ignore_case: bool
+    prefix: Optional[str] # Literal every match starts with (lower-cased if ignore_case)
+    literal: Optional[str] # Longest literal every match contains, for patterns without a prefix
+    
+    @classmethod
+    def compile(cls, pattern: str, ignore_case: bool) -> "_ScanPattern":
+        runs = _literal_runs(pattern) or [""]
+        prefix, literal = runs[0], max(runs, key=len)
+        if ignore_case:
+            return cls(re.compile(pattern, re.MULTILINE | re.IGNORECASE), True, prefix.lower() or None, literal.lower() or None)
+        return cls(re.compile(pattern), False, prefix or None, literal or None)
+
+class _TextScan:
     """
-    Get confidence score for a specific language detection.
+    One text being scored, with the positions of each literal found at most once.
+    
+    re.IGNORECASE also folds a few non-ASCII letters (e.g. U+017F to "s"), so
+    case-insensitive patterns only use the lower-cased text if it is ASCII
+    and otherwise scan the whole text.
+    """
+    
+    def __init__(self, code: str):
+        self.code = code
+        self.lowered = code.lower() if code.isascii() else None
+        self._positions: Dict[Tuple[str, bool], List[int]] = {}
+    
+    def count(self, pattern: _ScanPattern) -> int:
+        """Number of non-overlapping matches, as len(pattern.regex.findall(code)) would count."""
+        starts = self._starts(pattern)
+        if starts is None:
+            return sum(1 for _ in pattern.regex.finditer(self.code)) # Doesn't build the list findall would
+        count, end = 0, 0
+        for start in starts:
+            if start >= end:
+                match = pattern.regex.match(self.code, start)
+                if match:
+                    count += 1
+                    end = match.end()
+        return count
+    
+    def search(self, pattern: _ScanPattern) -> bool:
+        starts = self._starts(pattern)
+        if starts is None:
+            return pattern.regex.search(self.code) is not None
+        return any(pattern.regex.match(self.code, start) for start in starts)
+    
+    def _starts(self, pattern: _ScanPattern) -> Optional[List[int]]:
+        """Positions where a match can start, or None if every position must be tried."""
+        text = self.lowered if pattern.ignore_case else self.code
+        if text is None:
+            return None
+        if pattern.prefix:
+            return self._find_all(pattern.prefix, pattern.ignore_case, text)
+        if pattern.literal and pattern.literal not in text:
+            return []
+        return None
+    
+    def _find_all(self, literal: str, ignore_case: bool, text: str) -> List[int]:
+        key = (literal, ignore_case)
+        positions = self._positions.get(key)
+        if positions is None:
+            positions = []
+            position = text.find(literal)
+            while position != -1:
+                positions.append(position)
+                position = text.find(literal, position + 1)
+            self._positions[key] = positions
+        return positions
+
+def _literal_runs(pattern: str) -> Optional[List[str]]:
+    """
+    Runs of plain characters that every match of the pattern contains, in order.
+    
+    The first run is the literal a match starts with ("" if the pattern starts
+    with anything else). Conservative: groups, classes, escapes like \\s,
+    anchors and optional characters end a run, and a top-level alternation
+    yields None.
+    """
+    runs, run = [], ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped.isalnum():
+                runs.append(run) # A class (\\w, \\s, ...), anchor or back-reference
+                run = ""
+            else:
+                run += escaped
+            i += 2
+        elif char == "[":
+            i += 2 if pattern.startswith("[^", i) else 1
+            i += 2 if pattern[i] == "\\" else 1 # The first member may be a literal "]"
+            while pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            runs.append(run)
+            run = ""
+        elif char == "(":
+            depth = 1
+            i += 1
+            while depth:
+                if pattern[i] == "\\":
+                    i += 1
+                elif pattern[i] == "(":
+                    depth += 1
+                elif pattern[i] == ")":
+                    depth -= 1
+                i += 1
+            runs.append(run)
+            run = ""
+        elif char == "|":
+            return None
+        elif char in "*?{+":
+            if char != "+":
+                run = run[:-1] # The quantified character may be absent
+            runs.append(run)
+            run = ""
+            i = pattern.index("}", i) + 1 if char == "{" else i + 1
+        elif char in ".^$":
+            runs.append(run)
+            run = ""
+            i += 1
+        else:
+            run += char
+            i += 1
+    runs.append(run)
+    return runs
+
+_detector = LanguageDetector()
+
+# Per-line patterns shared by the code metrics
+_FUNCTION_LINE = re.compile(r'(def\s+\w+|function\s+\w+|func\s+\w+\(|public\s+\w+\s+\w+\()')
+_CLASS_LINE = re.compile(r'(class\s+\w+|public\s+class\s+\w+|interface\s+\w+)')
+_IMPORT_LINE = re.compile(r'(import\s+|from\s+\w+\s+import|require\s*\()')
+_CONDITIONAL_LINE = re.compile(r'(if\s+|elif\s+|else\s*:|switch\s*\(|case\s+|default\s*:)')
+_LOOP_LINE = re.compile(r'(for\s+|while\s+|do\s+while)')
+# Heuristic for block start (Python-like)
+_BLOCK_LINE = re.compile(r'(if|for|while|try|with|def|class|func|public class|private class|interface|enum)\s*[:({]')
+
+def analyze_code_metrics(code: str, language: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Compute the code characteristics and complexity metrics in one pass over the lines.
+    
+    For Python code that parses, when mccabe is installed, the structural
+    metrics come from the syntax tree instead of per-line patterns: McCabe
+    complexity per function (see utils.python_ast.python_complexity), block
+    nesting depth and function/class/import counts. The line pass then only
+    measures lines.
     
     Args:
         code: Source code string
-        language: Language to check confidence for
+        language: Language of the code, if known
         
     Returns:
-        Confidence score between 0.0 and 1.0
+        Tuple of (analyze_code_characteristics result, detect_code_complexity result)
     """
-    if language not in LANGUAGE_PATTERNS:
-        return 0.0
+    complexity = None
+    if language == "python":
+        from utils.python_ast import parse_python, python_complexity
+        tree = parse_python(code).tree
+        if tree is not None:
+            complexity = python_complexity(tree) # None without mccabe, then the line patterns are used
     
-    patterns = LANGUAGE_PATTERNS[language]
-    total_patterns = len(patterns)
-    matched_patterns = 0
+    lines = code.split('\n')
+    non_empty_lines = comment_lines = 0
+    function_count = class_count = conditionals = loops = 0
+    has_imports = space_indented = tab_indented = False
+    non_empty_length = max_line_length = max_depth = 0
     
-    for pattern in patterns:
-        if re.search(pattern, code, re.MULTILINE | re.IGNORECASE):
-            matched_patterns += 1
+    for line in lines:
+        line_length = len(line)
+        max_line_length = max(max_line_length, line_length)
+        if line.startswith('  '): # 2 or 4 spaces
+            space_indented = True
+        elif line.startswith('\t'):
+            tab_indented = True
+        
+        stripped = line.lstrip()
+        if not stripped:
+            continue # None of the patterns can match a blank line
+        non_empty_lines += 1
+        non_empty_length += line_length
+        
+        if stripped.startswith(('#', '//', '/*')):
+            comment_lines += 1
+        if complexity is not None:
+            continue
+        if _FUNCTION_LINE.search(line):
+            function_count += 1
+        if _CLASS_LINE.search(line):
+            class_count += 1
+        if not has_imports and _IMPORT_LINE.search(line):
+            has_imports = True
+        if _CONDITIONAL_LINE.search(line):
+            conditionals += 1
+        if _LOOP_LINE.search(line):
+            loops += 1
+        if _BLOCK_LINE.search(line):
+            max_depth = max(max_depth, (line_length - len(stripped)) // 4) # Assuming 4-space indentation
+    
+    if complexity is not None:
+        function_count, class_count = complexity["function_count"], complexity["class_count"]
+        has_imports = complexity.pop("import_count") > 0
+    else:
+        complexity = {
+            "cyclomatic_complexity": 1 + conditionals + loops, # Base complexity plus one per branch or loop
+            "nesting_depth": max_depth,
+            "function_count": function_count,
+            "class_count": class_count,
+            "conditional_statements": conditionals,
+            "loop_statements": loops
+        }
     
-    return matched_patterns / total_patterns if total_patterns > 0 else 0.0
+    characteristics = {
+        "total_lines": len(lines),
+        "non_empty_lines": non_empty_lines,
+        "comment_lines": comment_lines,
+        "has_functions": function_count > 0,
+        "has_classes": class_count > 0,
+        "has_imports": has_imports,
+        "indentation_style": _indentation_style(space_indented, tab_indented),
+        "average_line_length": non_empty_length / non_empty_lines if non_empty_lines else 0,
+        "max_line_length": max_line_length
+    }
+    return characteristics, complexity
 
 def analyze_code_characteristics(code: str) -> Dict[str, Any]:
     """
@@ -320,50 +618,7 @@ def analyze_code_characteristics(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary with code characteristics
     """
-    lines = code.split('\n')
-    
-    characteristics = {
-        "total_lines": len(lines),
-        "non_empty_lines": len([line for line in lines if line.strip()]),
-        "comment_lines": 0,
-        "has_functions": False,
-        "has_classes": False,
-        "has_imports": False,
-        "indentation_style": detect_indentation_style(code),
-        "average_line_length": 0,
-        "max_line_length": 0
-    }
-    
-    # Count comment lines and analyze content
-    for line in lines:
-        stripped = line.strip()
-        
-        # Comment detection
-        if stripped.startswith('#') or stripped.startswith('//') or stripped.startswith('/*'):
-            characteristics["comment_lines"] += 1
-        
-        # Function detection
-        if re.search(r'(def\s+\w+|function\s+\w+|func\s+\w+\(|public\s+\w+\s+\w+\()', line):
-            characteristics["has_functions"] = True
-        
-        # Class detection
-        if re.search(r'(class\s+\w+|public\s+class\s+\w+|interface\s+\w+)', line):
-            characteristics["has_classes"] = True
-        
-        # Import detection
-        if re.search(r'(import\s+|from\s+\w+\s+import|require\s*\()', line):
-            characteristics["has_imports"] = True
-        
-        # Line length analysis
-        line_length = len(line)
-        characteristics["max_line_length"] = max(characteristics["max_line_length"], line_length)
-    
-    # Calculate average line length
-    if characteristics["non_empty_lines"] > 0:
-        total_length = sum(len(line) for line in lines if line.strip())
-        characteristics["average_line_length"] = total_length / characteristics["non_empty_lines"]
-    
-    return characteristics
+    return analyze_code_metrics(code)[0]
 
 def detect_indentation_style(code: str) -> str:
     """
@@ -375,23 +630,17 @@ def detect_indentation_style(code: str) -> str:
     Returns:
         Indentation style ('spaces', 'tabs', 'mixed', or 'none')
     """
-    lines = code.split('\n')
-    space_indented = 0
-    tab_indented = 0
-    
-    for line in lines:
-        if line.startswith('    '):  # 4 spaces
-            space_indented += 1
-        elif line.startswith('  '):   # 2 spaces
-            space_indented += 1
-        elif line.startswith('\t'):   # tab
-            tab_indented += 1
-    
-    if space_indented > 0 and tab_indented > 0:
+    # A line indented with 2 or 4 spaces, or with a tab
+    space_indented = code.startswith('  ') or '\n  ' in code
+    tab_indented = code.startswith('\t') or '\n\t' in code
+    return _indentation_style(space_indented, tab_indented)
+
+def _indentation_style(space_indented: bool, tab_indented: bool) -> str:
+    if space_indented and tab_indented:
         return "mixed"
-    elif space_indented > 0:
+    elif space_indented:
         return "spaces"
-    elif tab_indented > 0:
+    elif tab_indented:
         return "tabs"
     else:
         return "none"
@@ -444,46 +693,4 @@ def detect_code_complexity(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary with complexity metrics
     """
-    lines = code.split('\n')
-    
-    complexity = {
-        "cyclomatic_complexity": 1,  # Base complexity
-        "nesting_depth": 0,
-        "function_count": 0,
-        "class_count": 0,
-        "conditional_statements": 0,
-        "loop_statements": 0
-    }
-    
-    current_depth = 0
-    max_depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # Count leading whitespace for nesting depth (simplified)
-        if stripped:
-            leading_spaces = len(line) - len(line.lstrip())
-            # Heuristic for block start (Python-like)
-            if re.search(r'(if|for|while|try|with|def|class|func|public class|private class|interface|enum)\s*[:({]', line):
-                current_depth = leading_spaces // 4  # Assuming 4-space indentation
-                max_depth = max(max_depth, current_depth)
-        
-        # Count various constructs
-        if re.search(r'(def\s+\w+|function\s+\w+|func\s+\w+\(|public\s+\w+\s+\w+\()', line):
-            complexity["function_count"] += 1
-        
-        if re.search(r'(class\s+\w+|public\s+class\s+\w+|interface\s+\w+)', line):
-            complexity["class_count"] += 1
-        
-        if re.search(r'(if\s+|elif\s+|else\s*:|switch\s*\(|case\s+|default\s*:)', line):
-            complexity["conditional_statements"] += 1
-            complexity["cyclomatic_complexity"] += 1
-        
-        if re.search(r'(for\s+|while\s+|do\s+while)', line):
-            complexity["loop_statements"] += 1
-            complexity["cyclomatic_complexity"] += 1
-    
-    complexity["nesting_depth"] = max_depth
-    
-    return complexity
+    return analyze_code_metrics(code)[1]
@@ -0,0 +1,165 @@
+import random
+import re
+from collections import Counter
+from itertools import repeat
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+# Identifiers, numbers, preprocessor words, and the operators that tell languages apart
+_TOKEN = re.compile(r"[A-Za-z_$][\w$]*|\d[\w.]*|#\s*[a-z]+|<!--|-->|</|/>|::|:=|=>|->|<<|>>|&&|\|\||[=!<>]=|\+\+|//|/\*|\*/|[^\w\s]")
+
+# Temperature and length exponent grids searched when calibrating
+_TEMPERATURES = np.geomspace(0.02, 5.0, 40)
+_LENGTH_POWERS = np.linspace(0.0, 1.0, 11)
+
+def code_features(code: str) -> List[str]:
+    """Token unigrams and bigrams of the code."""
+    tokens = _TOKEN.findall(code)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+class LanguageModel:
+    """
+    Multinomial naive Bayes over token unigrams and bigrams.
+    
+    The model is a vocabulary index and a (vocabulary x language) float32
+    matrix of log-likelihoods; a batch of files is scored with one gather and
+    one reduceat over the matrix. Raw naive Bayes scores grow with the length
+    of the input and are far too confident, so the summed log-likelihoods are
+    divided by n ** (1 - length_power) and multiplied by a temperature, both
+    fitted on held-out snippets, before the softmax.
+    """
+    
+    def __init__(self, languages: Sequence[str], vocabulary: Sequence[str], log_likelihood: np.ndarray,
+                 temperature: float = 1.0, length_power: float = 1.0, max_chars: int = 32 * 1024):
+        self.languages = list(languages)
+        self.vocabulary = {token: index for index, token in enumerate(vocabulary)}
+        # An extra zero row that every document gets, so none is empty in reduceat
+        self._weights = np.vstack([log_likelihood.astype(np.float32), np.zeros((1, len(self.languages)), np.float32)])
+        self.temperature = float(temperature)
+        self.length_power = float(length_power)
+        self.max_chars = max_chars
+    
+    def predict_proba(self, codes: Sequence[str]) -> np.ndarray:
+        """
+        Probability of each language for each code string.
+        
+        Args:
+            codes: Source code strings (only the first max_chars of each are read)
+        
+        Returns:
+            Array of shape (len(codes), len(languages)); rows sum to 1
+        """
+        if not codes:
+            return np.zeros((0, len(self.languages)))
+        sums, counts = self._log_likelihoods(codes)
+        return _softmax(self._scaled(sums, counts, self.temperature, self.length_power))
+    
+    def classify(self, codes: Sequence[str]) -> List[Tuple[str, float]]:
+        """Most likely language and its probability for each code string."""
+        probabilities = self.predict_proba(codes)
+        best = probabilities.argmax(axis=1)
+        return [(self.languages[index], float(probabilities[row, index])) for row, index in enumerate(best)]
+    
+    def save(self, path: str) -> None:
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, languages=np.array(self.languages), vocabulary=np.array(vocabulary),
+                log_likelihood=self._weights[:-1],
+                calibration=np.array([self.temperature, self.length_power]), max_chars=np.array(self.max_chars)
+            )
+    
+    @classmethod
+    def load(cls, path: str) -> "LanguageModel":
+        with np.load(path, allow_pickle=False) as data:
+            temperature, length_power = data["calibration"].tolist()
+            return cls(data["languages"].tolist(), data["vocabulary"].tolist(), data["log_likelihood"],
+                       temperature, length_power, int(data["max_chars"]))
+    
+    def _log_likelihoods(self, codes: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Summed log-likelihoods per language and number of known features, per code string."""
+        sentinel = len(self._weights) - 1
+        lookup = self.vocabulary.get
+        ids, starts = [], []
+        for code in codes:
+            starts.append(len(ids))
+            ids.append(sentinel)
+            ids.extend(map(lookup, code_features(code[:self.max_chars]), repeat(sentinel)))
+        ids = np.array(ids, dtype=np.int64)
+        starts = np.array(starts, dtype=np.int64)
+        sums = np.add.reduceat(self._weights[ids], starts, axis=0)
+        counts = np.add.reduceat((ids != sentinel).astype(np.int64), starts)
+        return sums, counts
+    
+    @staticmethod
+    def _scaled(sums: np.ndarray, counts: np.ndarray, temperature: float, length_power: float) -> np.ndarray:
+        return sums * (temperature / np.maximum(counts, 1) ** (1.0 - length_power))[:, None]
+
+def train(documents: Iterable[Tuple[str, str]], features_per_language: int = 4000, alpha: float = 0.1,
+          max_chars: int = 32 * 1024, seed: int = 0) -> LanguageModel:
+    """
+    Train a LanguageModel on labeled source files.
+    
+    Every fifth file of each language is held out: snippets cut from those
+    (random runs of 5 to 200 lines, plus the whole file) calibrate the
+    probabilities instead of training the counts.
+    
+    Args:
+        documents: (code, language) pairs
+        features_per_language: Most frequent features kept per language
+        alpha: Additive smoothing of the feature counts
+        max_chars: Characters of each file read, in training and when classifying
+        seed: Seed for cutting the calibration snippets
+    
+    Returns:
+        The trained LanguageModel
+    """
+    counts: Dict[str, Counter] = {}
+    held_out: List[Tuple[str, str]] = []
+    seen: Counter = Counter()
+    for code, language in documents:
+        seen[language] += 1
+        if seen[language] % 5 == 0:
+            held_out.append((code, language))
+        else:
+            counts.setdefault(language, Counter()).update(code_features(code[:max_chars]))
+    if len(counts) < 2:
+        raise ValueError("training needs files of at least two languages")
+    
+    languages = sorted(counts)
+    vocabulary = sorted({token for language in languages for token, _ in counts[language].most_common(features_per_language)})
+    matrix = np.array([[counts[language][token] for language in languages] for token in vocabulary], dtype=np.float64)
+    log_likelihood = np.log(matrix + alpha) - np.log(matrix.sum(axis=0) + alpha * len(vocabulary))
+    model = LanguageModel(languages, vocabulary, log_likelihood, max_chars=max_chars)
+    
+    snippets = [(snippet, language) for code, language in held_out if language in counts
+                for snippet in _snippets(code, random.Random(f"{seed}:{len(code)}"))]
+    if snippets:
+        model.temperature, model.length_power = _calibrate(model, snippets)
+    return model
+
+def _snippets(code: str, rng: random.Random, count: int = 4) -> List[str]:
+    lines = code.splitlines(keepends=True)
+    snippets = [code]
+    for _ in range(count):
+        length = rng.randint(5, 200)
+        start = rng.randrange(max(1, len(lines) - length + 1))
+        snippets.append("".join(lines[start:start + length]))
+    return [snippet for snippet in snippets if snippet.strip()]
+
+def _calibrate(model: LanguageModel, snippets: List[Tuple[str, str]]) -> Tuple[float, float]:
+    """Temperature and length power that minimize the log loss on the snippets."""
+    sums, counts = model._log_likelihoods([code for code, _ in snippets])
+    labels = np.array([model.languages.index(language) for _, language in snippets])
+    best = (float("inf"), 1.0, 1.0)
+    for length_power in _LENGTH_POWERS:
+        for temperature in _TEMPERATURES:
+            probabilities = _softmax(LanguageModel._scaled(sums, counts, temperature, length_power))
+            loss = -np.log(np.maximum(probabilities[np.arange(len(labels)), labels], 1e-12)).mean()
+            if loss < best[0]:
+                best = (loss, float(temperature), float(length_power))
+    return best[1], best[2]
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
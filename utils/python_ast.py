@@ -0,0 +1,105 @@
+import ast
+import functools
+from typing import Any, Dict, NamedTuple, Optional
+
+# Statements that open a block (nesting depth counts these)
+_COMPOUND = tuple(getattr(ast, name) for name in (
+    "If", "For", "AsyncFor", "While", "Try", "TryStar", "With", "AsyncWith",
+    "FunctionDef", "AsyncFunctionDef", "ClassDef", "Match"
+) if hasattr(ast, name))
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+# Fields holding statements, or except handlers and match cases that hold them
+_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+class PythonParse(NamedTuple):
+    """The result of parsing a Python source once: the tree, or the error the parser raised."""
+    tree: Optional[ast.Module]
+    error: Optional[Exception]
+
+@functools.lru_cache(maxsize=8)
+def parse_python(code: str) -> PythonParse:
+    """
+    Parse Python code, sharing the result between everything that needs it.
+    
+    Syntax validation, the code metrics and the AI chunker all parse the same
+    code during one review; the small cache makes that a single parse. The
+    tree must not be modified.
+    
+    Args:
+        code: Python source code string
+    
+    Returns:
+        PythonParse with the tree, or with the exception if the code doesn't parse
+    """
+    try:
+        return PythonParse(ast.parse(code, '<string>'), None)
+    except Exception as e: # SyntaxError, or ValueError/RecursionError/MemoryError on pathological input
+        return PythonParse(None, e)
+
+def python_complexity(tree: ast.Module) -> Optional[Dict[str, Any]]:
+    """
+    Complexity metrics of a parsed Python module.
+    
+    Cyclomatic complexity is McCabe's, per function, as computed by the
+    mccabe package (flake8's C901 and pylint's too-complex check); top-level
+    if/loop/try blocks outside functions are measured on their own.
+    
+    Args:
+        tree: Module from parse_python
+    
+    Returns:
+        Dictionary with the detect_code_complexity keys (cyclomatic_complexity is
+        the highest per-function value), plus "function_complexity" by name and
+        "import_count"; None if mccabe isn't installed
+    """
+    try:
+        import mccabe # Installed with pylint
+    except ImportError:
+        return None
+    
+    visitor = mccabe.PathGraphingAstVisitor()
+    visitor.preorder(tree, visitor)
+    function_complexity = {graph.entity: graph.complexity() for graph in visitor.graphs.values()}
+    
+    counts = {"function_count": 0, "class_count": 0, "conditional_statements": 0, "loop_statements": 0, "import_count": 0}
+    max_depth = 0
+    stack = [(node, 0) for node in tree.body] # (statement, number of enclosing blocks)
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, _FUNCTIONS):
+            counts["function_count"] += 1
+        elif isinstance(node, ast.ClassDef):
+            counts["class_count"] += 1
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            counts["import_count"] += 1
+        elif isinstance(node, ast.If):
+            counts["conditional_statements"] += 1
+        elif isinstance(node, _LOOPS):
+            counts["loop_statements"] += 1
+        
+        child_depth = depth
+        if isinstance(node, _COMPOUND):
+            max_depth = max(max_depth, depth)
+            child_depth = depth + 1
+        for child in _child_statements(node):
+            # An elif is an If alone in the orelse, at the same column; it isn't nested deeper
+            is_elif = (isinstance(node, ast.If) and isinstance(child, ast.If) and node.orelse == [child]
+                       and child.col_offset == node.col_offset)
+            stack.append((child, depth if is_elif else child_depth))
+    
+    return {
+        "cyclomatic_complexity": max(function_complexity.values(), default=1),
+        "nesting_depth": max_depth,
+        **counts,
+        "function_complexity": function_complexity
+    }
+
+def _child_statements(node: ast.AST):
+    """Statements directly inside node's blocks; expressions can't contain statements, so they are skipped."""
+    for field in _BLOCK_FIELDS:
+        for child in getattr(node, field, ()):
+            if isinstance(child, ast.stmt):
+                yield child
+            else:
+                yield from child.body # ExceptHandler or match_case
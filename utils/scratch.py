@@ -0,0 +1,101 @@
+import atexit
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Optional
+from config import TOOL_IO_CONFIG
+
+_root: Optional[str] = None
+_pool: Optional["WorkspacePool"] = None
+_pool_lock = threading.Lock()
+
+def scratch_root() -> str:
+    """
+    Directory for the files of tools that can't read source from stdin.
+    
+    TOOL_IO_CONFIG["scratch_dir"] (/dev/shm by default, which is RAM-backed) if
+    it is a writable directory, otherwise the system temporary directory.
+    """
+    global _root
+    if _root is None:
+        preferred = TOOL_IO_CONFIG["scratch_dir"]
+        if preferred and os.path.isdir(preferred) and os.access(preferred, os.W_OK | os.X_OK):
+            _root = preferred
+        else:
+            _root = tempfile.gettempdir()
+    return _root
+
+class Workspace:
+    """An empty directory borrowed from a WorkspacePool; use as a context manager to give it back."""
+    
+    def __init__(self, pool: "WorkspacePool", path: str):
+        self.pool = pool
+        self.path = path
+    
+    def __enter__(self) -> str:
+        return self.path
+    
+    def __exit__(self, *exc_info) -> None:
+        self.pool.release(self.path)
+
+class WorkspacePool:
+    """
+    A fixed number of private scratch directories, each used by one analysis at a time.
+    
+    The directories are created up front under one owner-only parent and
+    emptied when they are released, so the files of concurrent analyses can
+    never collide and the number of workspaces (and the scratch space they
+    can hold) stays bounded.
+    """
+    
+    def __init__(self, root: str, size: int):
+        self.directory = tempfile.mkdtemp(prefix="workspaces-", dir=root)
+        self._idle: "queue.LifoQueue[str]" = queue.LifoQueue() # Most recently used first
+        for index in range(size):
+            path = os.path.join(self.directory, str(index))
+            os.mkdir(path)
+            self._idle.put(path)
+    
+    def acquire(self, timeout: Optional[float] = None) -> Workspace:
+        """
+        Borrow an empty workspace, waiting while all are in use.
+        
+        Args:
+            timeout: Seconds to wait for one to be released (None waits indefinitely)
+        
+        Returns:
+            The Workspace
+        
+        Raises:
+            TimeoutError: If none was released in time
+        """
+        try:
+            return Workspace(self, self._idle.get(timeout=timeout))
+        except queue.Empty:
+            raise TimeoutError(f"no scratch workspace was free within {timeout}s") from None
+    
+    def release(self, path: str) -> None:
+        """Empty the workspace and return it to the pool."""
+        for entry in os.scandir(path):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        self._idle.put(path)
+    
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def get_workspace_pool() -> WorkspacePool:
+    """The process-wide pool of TOOL_IO_CONFIG["workspaces"] workspaces under scratch_root, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkspacePool(scratch_root(), TOOL_IO_CONFIG["workspaces"])
+            atexit.register(_pool.close)
+        return _pool
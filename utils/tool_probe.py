@@ -0,0 +1,250 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from config import TOOL_PROBE_CONFIG
+
+class ToolInfo(NamedTuple):
+    """Where an external tool is installed and which version it is."""
+    name: str
+    path: Optional[str] # Absolute path of the executable (or JAR, config file, Python package); None if missing
+    version: Optional[str] = None # First line the tool printed for its version flag
+    
+    @property
+    def available(self) -> bool:
+        return self.path is not None
+
+class _Tool(NamedTuple):
+    resolve: Callable[[], Optional[str]] # Absolute path, found without running anything
+    version_cmd: Optional[Callable[[str], List[str]]] = None # Command printing the version of the resolved path
+    requires: Optional[str] = None # Another tool it runs on
+
+_paths: Optional[Dict[str, Optional[str]]] = None # Resolved without starting any process
+_paths_lock = threading.Lock()
+_probe: Optional[Dict[str, ToolInfo]] = None # Paths and versions
+_probe_lock = threading.Lock()
+
+def _which(name: str) -> Callable[[], Optional[str]]:
+    return lambda: _absolute(shutil.which(name))
+
+def _absolute(path: Optional[str]) -> Optional[str]:
+    return os.path.abspath(path) if path else None
+
+def _node_bin(name: str) -> Callable[[], Optional[str]]:
+    """An npm package's executable as npx resolves it: local node_modules/.bin, then PATH, then the global prefix."""
+    def resolve() -> Optional[str]:
+        directory = os.getcwd()
+        while True:
+            local = os.path.join(directory, "node_modules", ".bin", name)
+            if os.path.isfile(local):
+                return local
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        found = shutil.which(name)
+        if found:
+            return os.path.abspath(found)
+        node = shutil.which("node")
+        if node:
+            # Where the ESLint worker also looks: <prefix>/lib/node_modules
+            global_bin = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(node))), "lib", "node_modules", name, "bin", f"{name}.js")
+            if os.path.isfile(global_bin):
+                return global_bin
+        return None
+    return resolve
+
+def _existing_file(env_var: str, default: str) -> Callable[[], Optional[str]]:
+    def resolve() -> Optional[str]:
+        path = os.getenv(env_var, default)
+        return os.path.abspath(path) if os.path.isfile(path) else None
+    return resolve
+
+def _pylint() -> Optional[str]:
+    import importlib.util
+    spec = importlib.util.find_spec("pylint")
+    return os.path.abspath(spec.origin) if spec and spec.origin else None
+
+def _java_cmd(path: str) -> List[str]:
+    return [shutil.which("java") or "java", "-jar", path, "--version"]
+
+# The external tools the analyzers run, by the names used with require_tool
+TOOLS: Dict[str, _Tool] = {
+    "pylint": _Tool(_pylint, lambda path: [sys.executable, "-m", "pylint", "--version"]),
+    "node": _Tool(_which("node"), lambda path: [path, "--version"]),
+    "eslint": _Tool(_node_bin("eslint"), lambda path: [shutil.which("node") or "node", path, "--version"], requires="node"),
+    "stylelint": _Tool(_node_bin("stylelint"), lambda path: [shutil.which("node") or "node", path, "--version"], requires="node"),
+    "java": _Tool(_which("java"), lambda path: [path, "-version"]),
+    "javac": _Tool(_which("javac"), lambda path: [path, "-version"]),
+    "checkstyle": _Tool(_existing_file("CHECKSTYLE_JAR", "checkstyle-11.0.0-all.jar"), _java_cmd, requires="java"),
+    "checkstyle_config": _Tool(_existing_file("CHECKSTYLE_CONFIG", "google_checks.xml")),
+    "cppcheck": _Tool(_which("cppcheck"), lambda path: [path, "--version"]),
+    "g++": _Tool(_which("g++"), lambda path: [path, "--version"]),
+    "go": _Tool(_which("go"), lambda path: [path, "version"]),
+    "staticcheck": _Tool(_which("staticcheck"), lambda path: [path, "-version"])
+}
+
+def probe_tools(refresh: bool = False) -> Dict[str, ToolInfo]:
+    """
+    Find every tool in TOOLS and its version.
+    
+    Paths are resolved without starting any process, so a missing tool costs
+    nothing. The version commands of the tools that were found run
+    concurrently, and their output is cached on disk
+    (TOOL_PROBE_CONFIG["cache_path"]) under the path, size and mtime of the
+    executable: an unchanged install is not run again in later processes,
+    an upgraded one is. The result is kept for the life of the process.
+    
+    Args:
+        refresh: Probe again instead of returning this process's earlier result
+    
+    Returns:
+        ToolInfo by tool name
+    """
+    global _probe
+    with _probe_lock:
+        if _probe is None or refresh:
+            _probe = _run_probe(_tool_paths(refresh))
+        return _probe
+
+def tool_info(name: str) -> ToolInfo:
+    """
+    ToolInfo of one tool, without waiting for any version command.
+    
+    The path comes from the same resolution as probe_tools, which starts no
+    process; the version is filled in once probe_tools has finished and is
+    None until then. A tool that wasn't found, or whose file no longer exists,
+    is resolved again, so installing or removing a tool is picked up by a
+    running process.
+    """
+    path = _tool_paths()[name]
+    if path is None or not os.path.exists(path):
+        path = _resolve_again(name)
+    probed = _probe.get(name) if _probe is not None else None
+    return ToolInfo(name, path, probed.version if probed is not None and probed.path == path else None)
+
+def require_tool(name: str) -> str:
+    """
+    Absolute path of a tool, for analyzers to call before running it.
+    
+    Raises:
+        FileNotFoundError: If the probe didn't find it (as running it would, without the fork)
+    """
+    info = tool_info(name)
+    if not info.available:
+        raise FileNotFoundError(f"{name} not found")
+    return info.path
+
+def node_tool_cmd(name: str) -> List[str]:
+    """
+    Command prefix running an npm package's executable found by the probe, without npx.
+    
+    A .js entry point (the global-prefix fallback) runs on the probed node;
+    a node_modules/.bin shim or PATH executable runs as it is.
+    
+    Raises:
+        FileNotFoundError: If the tool or node wasn't found
+    """
+    path = require_tool(name)
+    return [require_tool("node"), path] if path.endswith(".js") else [path]
+
+def tool_stamp(name: str) -> Optional[List]:
+    """
+    Identity of a tool's installed file (resolved path, size and mtime), or None if it is missing.
+    
+    It changes when the tool is upgraded, like the version, but is known
+    without running anything, so result cache keys can include it.
+    """
+    info = tool_info(name)
+    return _stamp(info.path) if info.available else None
+
+def start_probe() -> None:
+    """Run probe_tools in a background thread to fill in the versions; analyses only need paths and don't wait for it."""
+    if _probe is None:
+        threading.Thread(target=probe_tools, name="tool-probe", daemon=True).start()
+
+def _tool_paths(refresh: bool = False) -> Dict[str, Optional[str]]:
+    """Path of every tool in TOOLS, or None if it or a tool it runs on is missing."""
+    global _paths
+    with _paths_lock:
+        if _paths is None or refresh:
+            paths = {name: tool.resolve() for name, tool in TOOLS.items()}
+            for name, tool in TOOLS.items():
+                if tool.requires and not paths[tool.requires]:
+                    paths[name] = None
+            _paths = paths
+        return _paths
+
+def _resolve_again(name: str) -> Optional[str]:
+    """Resolve one tool's path and update the resolved paths; its version is left unknown until the next full probe."""
+    global _paths
+    tool = TOOLS[name]
+    path = tool.resolve()
+    if path and tool.requires and not tool_info(tool.requires).available:
+        path = None
+    with _paths_lock:
+        if _paths.get(name) != path:
+            _paths = {**_paths, name: path} # Callers may hold the previous dict
+    return path
+
+def _run_probe(paths: Dict[str, Optional[str]]) -> Dict[str, ToolInfo]:
+    cache = _load_cache()
+    stamps = {name: _stamp(path) for name, path in paths.items() if path}
+    versions: Dict[str, Optional[str]] = {}
+    to_run = []
+    for name, stamp in stamps.items():
+        cached = cache.get(name)
+        if cached and cached.get("stamp") == stamp:
+            versions[name] = cached.get("version")
+        elif TOOLS[name].version_cmd:
+            to_run.append(name)
+    
+    if to_run:
+        with ThreadPoolExecutor(max_workers=len(to_run)) as executor:
+            for name, version in zip(to_run, executor.map(lambda name: _version(TOOLS[name].version_cmd(paths[name])), to_run)):
+                versions[name] = version
+        _save_cache({name: {"stamp": stamp, "version": versions.get(name)} for name, stamp in stamps.items()})
+    
+    return {name: ToolInfo(name, path, versions.get(name)) for name, path in paths.items()}
+
+def _stamp(path: str) -> List:
+    """Identity of an installed file: resolved path, size and modification time."""
+    real = os.path.realpath(path)
+    try:
+        stat = os.stat(real)
+    except OSError:
+        return [real, None, None]
+    return [real, stat.st_size, stat.st_mtime_ns]
+
+def _version(cmd: List[str]) -> Optional[str]:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=TOOL_PROBE_CONFIG["timeout"])
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    for line in (result.stdout + "\n" + result.stderr).splitlines():
+        if line.strip():
+            return line.strip()
+    return None
+
+def _load_cache() -> Dict[str, Dict]:
+    try:
+        with open(TOOL_PROBE_CONFIG["cache_path"], encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache: Dict[str, Dict]) -> None:
+    path = TOOL_PROBE_CONFIG["cache_path"]
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, path)
+    except OSError:
+        pass # The cache only saves time
@@ -0,0 +1,124 @@
+import asyncio
+import subprocess
+from typing import Any, Dict, Generator, List, NamedTuple, Optional, Union
+
+class ToolCall(NamedTuple):
+    """A linter/compiler invocation requested by an analyzer."""
+    cmd: List[str]
+    timeout: float = 30
+    cwd: Optional[str] = None
+    input: Optional[str] = None
+
+class WorkerCall(NamedTuple):
+    """A request to a long-lived tool worker (see utils.worker_pool)."""
+    cmd: List[str]
+    payload: Dict[str, Any]
+    timeout: float = 30
+    cwd: Optional[str] = None
+
+class WorkspaceCall(NamedTuple):
+    """A request for an empty scratch directory from the workspace pool (see utils.scratch)."""
+    timeout: float = 30
+
+# Analyzer steps are written as generators that yield ToolCall objects and receive
+# the finished subprocess.CompletedProcess back (or WorkerCall objects, which
+# receive the worker's JSON response dict, or WorkspaceCall objects, which receive
+# a utils.scratch.Workspace to enter at once: `with (yield WorkspaceCall()) as path`).
+# The same step can then be driven by blocking subprocess.run or by asyncio
+# subprocesses without duplicating the parsing and error handling. Failures (FileNotFoundError, TimeoutExpired) are
+# thrown back into the generator so its own except-branches handle them.
+ToolStep = Generator[Union[ToolCall, WorkerCall, WorkspaceCall], Any, Any]
+
+def run_tool(call: Union[ToolCall, WorkerCall, WorkspaceCall]) -> Any:
+    """Run a tool call with blocking subprocess.run (or a pooled worker request, or wait for a workspace)."""
+    if isinstance(call, WorkerCall):
+        from utils.worker_pool import get_worker_pool
+        return get_worker_pool(call.cmd, call.cwd).request(call.payload, call.timeout)
+    if isinstance(call, WorkspaceCall):
+        from utils.scratch import get_workspace_pool
+        return get_workspace_pool().acquire(call.timeout)
+    return subprocess.run(
+        call.cmd,
+        input=call.input,
+        cwd=call.cwd,
+        capture_output=True,
+        text=True,
+        timeout=call.timeout
+    )
+
+async def run_tool_async(call: Union[ToolCall, WorkerCall, WorkspaceCall]) -> Any:
+    """
+    Run a tool call with asyncio.create_subprocess_exec.
+
+    Mirrors subprocess.run: raises FileNotFoundError if the executable is missing
+    and subprocess.TimeoutExpired (after killing the process) on timeout. The
+    process is killed as well if the awaiting task is cancelled.
+    Worker requests use blocking pipes and waiting for a workspace blocks, so
+    both run in the default executor.
+    """
+    if isinstance(call, WorkerCall):
+        return await asyncio.get_running_loop().run_in_executor(None, run_tool, call)
+    if isinstance(call, WorkspaceCall):
+        acquiring = asyncio.get_running_loop().run_in_executor(None, run_tool, call)
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # Nobody will use a workspace the wait ends up getting; give it straight back
+            acquiring.add_done_callback(lambda done: done.cancelled() or done.exception() or done.result().__exit__(None, None, None))
+            raise
+    
+    process = await asyncio.create_subprocess_exec(
+        *call.cmd,
+        cwd=call.cwd,
+        stdin=asyncio.subprocess.PIPE if call.input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdin_data = call.input.encode("utf-8") if call.input is not None else None
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(stdin_data), timeout=call.timeout)
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(call.cmd, call.timeout)
+    finally:
+        if process.returncode is None:
+            # Timed out or cancelled: don't leave the child running
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass # Exited in the meantime
+            await process.wait()
+
+    return subprocess.CompletedProcess(
+        call.cmd,
+        process.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace")
+    )
+
+def drive(step: ToolStep) -> Any:
+    """Run an analyzer step to completion with blocking subprocesses."""
+    try:
+        call = next(step)
+        while True:
+            try:
+                result = run_tool(call)
+            except Exception as e:
+                call = step.throw(e)
+            else:
+                call = step.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+async def drive_async(step: ToolStep) -> Any:
+    """Run an analyzer step to completion with asyncio subprocesses."""
+    try:
+        call = next(step)
+        while True:
+            try:
+                result = await run_tool_async(call)
+            except Exception as e:
+                call = step.throw(e)
+            else:
+                call = step.send(result)
+    except StopIteration as stop:
+        return stop.value
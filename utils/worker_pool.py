@@ -0,0 +1,206 @@
+import atexit
+import json
+import queue
+import subprocess
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class WorkerError(RuntimeError):
+    """A long-lived worker crashed, hung up, or answered with an error."""
+
+class PersistentWorker:
+    """
+    One long-lived tool process speaking line-delimited JSON over stdin/stdout.
+
+    Each request is a single JSON object on one line; the worker answers with a
+    single JSON object carrying the same "id". Requests are serialized, so a
+    worker handles one snippet at a time.
+    """
+
+    def __init__(self, cmd: List[str], cwd: Optional[str] = None):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.requests_served = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Spawn the worker process (raises FileNotFoundError if the executable is missing)."""
+        self._process = subprocess.Popen(
+            self.cmd,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self._lines = queue.Queue()
+        # A reader thread lets request() wait with a timeout on a blocking pipe
+        threading.Thread(target=self._read_lines, args=(self._process.stdout, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _read_lines(stream, lines: "queue.Queue[Optional[str]]") -> None:
+        for line in stream:
+            lines.put(line)
+        lines.put(None) # EOF
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Send one request and wait for its response.
+
+        Raises:
+            subprocess.TimeoutExpired: No answer within timeout (the worker is killed)
+            WorkerError: The worker exited, broke the protocol or reported an error
+        """
+        if not self.alive:
+            self.start()
+
+        self._next_id += 1
+        request_id = self._next_id
+        try:
+            self._process.stdin.write(json.dumps(dict(payload, id=request_id)) + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise WorkerError(f"worker {self.cmd[0]} is not accepting requests: {e}")
+
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                self.close()
+                raise subprocess.TimeoutExpired(self.cmd, timeout)
+            if line is None:
+                self.close()
+                raise WorkerError(f"worker {self.cmd[0]} exited unexpectedly")
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                continue # Stray output from the tool; responses are always JSON objects
+            if not isinstance(response, dict) or response.get("id") != request_id:
+                continue
+            break
+
+        self.requests_served += 1
+        if response.get("error"):
+            raise WorkerError(response["error"])
+        return response
+
+    def close(self) -> None:
+        """Stop the worker (closing stdin lets it exit cleanly; kill if it doesn't)."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+class WorkerPool:
+    """A bounded set of PersistentWorkers for one command, recycled after max_requests."""
+
+    def __init__(self, cmd: List[str], cwd: Optional[str] = None, size: int = 2, max_requests: int = 500):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.size = max(1, size)
+        self.max_requests = max_requests
+        self._idle: "queue.LifoQueue[PersistentWorker]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._workers: List[PersistentWorker] = []
+
+    def request(self, payload: Dict[str, Any], timeout: float = 30) -> Dict[str, Any]:
+        """Run a request on an idle worker, starting one if the pool isn't full yet."""
+        worker = self._acquire()
+        try:
+            return worker.request(payload, timeout)
+        finally:
+            if self.max_requests and worker.requests_served >= self.max_requests:
+                worker.close() # Recycle to bound memory growth in the tool's caches
+                worker.requests_served = 0
+            self._idle.put(worker)
+
+    def _acquire(self) -> PersistentWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                worker = PersistentWorker(self.cmd, cwd=self.cwd)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def close(self) -> None:
+        """Stop every worker in the pool."""
+        with self._lock:
+            for worker in self._workers:
+                worker.close()
+
+_pools: Dict[Tuple[Tuple[str, ...], Optional[str]], WorkerPool] = {}
+_pools_lock = threading.Lock()
+
+def get_worker_pool(cmd: List[str], cwd: Optional[str] = None) -> WorkerPool:
+    """Get the process-wide pool for a worker command, sized by LINTER_WORKER_CONFIG."""
+    from config import LINTER_WORKER_CONFIG
+
+    key = (tuple(cmd), cwd)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = WorkerPool(
+                cmd,
+                cwd=cwd,
+                size=LINTER_WORKER_CONFIG["pool_size"],
+                max_requests=LINTER_WORKER_CONFIG["max_requests"]
+            )
+            _pools[key] = pool
+        return pool
+
+@atexit.register
+def shutdown_worker_pools() -> None:
+    """Stop all worker processes (runs at interpreter exit)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+def serve(handler: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+    """
+    Worker side of the protocol: answer JSON requests from stdin until EOF.
+
+    The handler's return value is sent back with the request's "id"; an exception
+    is reported as {"error": ...} and the worker keeps serving. Anything the tool
+    prints is redirected to stderr so it can't corrupt the response stream.
+    """
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = handler(request)
+        except BaseException as e: # Tools like to raise SystemExit on bad input
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            response = {"error": f"{type(e).__name__}: {e}"}
+        response["id"] = request_id
+        channel.write(json.dumps(response) + "\n")
+        channel.flush()